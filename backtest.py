@@ -0,0 +1,144 @@
+"""
+Backtest of the trend labels the price analysis uses.
+
+Loads the daily history of the chosen symbols with one bulk download
+(then served from the local price store), labels every date of every
+symbol the way fetch_historical_prices does ("Strong Uptrend", "Sideways"
+...) and reports how returns over the following days were distributed
+for each label. With --sweep-strong / --sweep-weak it also scores every
+pair of thresholds on the grid (see tools.backtest.sweep_thresholds).
+
+Usage:
+    python backtest.py --symbols all
+    python backtest.py --symbols BTC,ETH,SOL --lookbacks 7,30 --horizons 7,30
+    python backtest.py --symbols all --sweep-strong 5:25:1 --sweep-weak 1:10:0.5
+    python backtest.py --symbols all --fake --json Data/backtest.json
+"""
+import argparse
+import json
+import time
+import numpy as np
+from dotenv import load_dotenv
+from utils import config
+from tools.backtest import (forward_returns, label_distribution, load_history, sweep_thresholds,
+                            trend_features)
+from tools.symbols import SYMBOL_TO_YAHOO
+from tools.indicators import STRONG_TREND_PCT, TREND_PCT
+
+# Column headings for TREND_LABELS in the sweep table
+_SHORT_LABELS = ["StrUp", "Up", "StrDown", "Down", "Side"]
+
+
+def parse_grid(spec: str) -> np.ndarray:
+    """'start:stop:step' (stop inclusive) or comma-separated values"""
+    if ":" in spec:
+        start, stop, step = (float(part) for part in spec.split(":"))
+        return np.round(np.arange(start, stop + step / 2, step), 6)
+    return np.array([float(part) for part in spec.split(",")])
+
+
+def _fmt(value: float, fmt: str) -> str:
+    return "n/a" if value != value else format(value, fmt)
+
+
+def print_distribution(rows: list, lookback: int, horizon: int, strong: float, weak: float):
+    print(f"\n📊 {lookback}-day trend label -> {horizon}-day forward return "
+          f"(thresholds ±{weak:g}% / ±{strong:g}%)")
+    print(f"{'label':<30} {'count':>8} {'mean':>8} {'median':>8} {'std':>8} {'hit':>6} "
+          f"{'p10':>8} {'p90':>8} {'mom+':>8} {'mom-':>8}")
+    for row in rows:
+        print(f"{row['label']:<30} {row['count']:>8} {_fmt(row['mean'], '+.2f'):>8} "
+              f"{_fmt(row['median'], '+.2f'):>8} {_fmt(row['std'], '.2f'):>8} "
+              f"{_fmt(row['hit_rate'] * 100, '.0f'):>5}% {_fmt(row['p10'], '+.2f'):>8} "
+              f"{_fmt(row['p90'], '+.2f'):>8} {_fmt(row['mean_momentum_agrees'], '+.2f'):>8} "
+              f"{_fmt(row['mean_momentum_disagrees'], '+.2f'):>8}")
+
+
+def print_sweep(results: list, top: int):
+    print(f"\n🔎 Best of {len(results)} threshold pairs by information coefficient:")
+    print(f"{'strong':>7} {'weak':>6} {'ic':>7} {'spread':>8} {'eta2':>7}  label mean (count)")
+    for result in results[:top]:
+        means = "  ".join(
+            f"{short} {_fmt(label['mean'], '+.2f')} ({label['count']})"
+            for short, label in zip(_SHORT_LABELS, result["labels"])
+        )
+        print(f"{result['strong']:>7g} {result['weak']:>6g} {_fmt(result['ic'], '+.4f'):>7} "
+              f"{_fmt(result['spread'], '+.2f'):>8} {_fmt(result['eta2'] * 100, '.2f'):>6}%  {means}")
+
+
+def run(args) -> dict:
+    """Load the history once, then evaluate every lookback x horizon"""
+    symbols = list(SYMBOL_TO_YAHOO) if args.symbols == "all" else [
+        s.strip().upper() for s in args.symbols.split(",") if s.strip()
+    ]
+    start = time.perf_counter()
+    dates, close = load_history(symbols, args.history_days)
+    load_time = time.perf_counter() - start
+    print(f"📥 Loaded {close.shape[0]} symbols x {close.shape[1]} days in {load_time:.2f}s")
+
+    start = time.perf_counter()
+    output = {"symbols": symbols, "days": int(close.shape[1]), "results": []}
+    for lookback in args.lookbacks:
+        price_change, momentum = trend_features(close, lookback)
+        for horizon in args.horizons:
+            forward = forward_returns(close, horizon)
+            result = {
+                "lookback": lookback,
+                "horizon": horizon,
+                "labels": label_distribution(price_change, forward, momentum, args.strong, args.weak),
+            }
+            print_distribution(result["labels"], lookback, horizon, args.strong, args.weak)
+            if args.sweep_strong is not None or args.sweep_weak is not None:
+                result["sweep"] = sweep_thresholds(
+                    price_change, forward,
+                    parse_grid(args.sweep_strong) if args.sweep_strong else np.array([args.strong]),
+                    parse_grid(args.sweep_weak) if args.sweep_weak else np.array([args.weak])
+                )
+                print_sweep(result["sweep"], args.top)
+            output["results"].append(result)
+    output["compute_seconds"] = time.perf_counter() - start
+    print(f"\n⏱️  Evaluated in {output['compute_seconds']:.2f}s (history load {load_time:.2f}s)")
+    return output
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Cryptocurrency Analysis Agent - trend label backtest")
+    parser.add_argument("--symbols", default="all",
+                        help="Comma-separated symbols, or 'all' for every mapped coin")
+    parser.add_argument("--history-days", type=int, default=config.BACKTEST_HISTORY_DAYS,
+                        help="Days of history to evaluate")
+    parser.add_argument("--lookbacks", type=lambda s: [int(x) for x in s.split(",")],
+                        default=list(config.BACKTEST_LOOKBACK_DAYS),
+                        help="Comma-separated analysis windows in days (the --days of a report)")
+    parser.add_argument("--horizons", type=lambda s: [int(x) for x in s.split(",")],
+                        default=list(config.BACKTEST_HORIZONS),
+                        help="Comma-separated forward-return horizons in days")
+    parser.add_argument("--strong", type=float, default=STRONG_TREND_PCT, help="Strong-trend threshold (%%)")
+    parser.add_argument("--weak", type=float, default=TREND_PCT, help="Trend threshold (%%)")
+    parser.add_argument("--sweep-strong", metavar="GRID",
+                        help="Strong thresholds to sweep, 'start:stop:step' or comma-separated")
+    parser.add_argument("--sweep-weak", metavar="GRID",
+                        help="Trend thresholds to sweep, 'start:stop:step' or comma-separated")
+    parser.add_argument("--top", type=int, default=10, help="Threshold pairs to print per sweep")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    parser.add_argument("--fake", action="store_true",
+                        help="Use the offline fake Yahoo provider (no network)")
+    return parser.parse_args(argv)
+
+
+def main():
+    load_dotenv()
+    args = parse_args()
+    if args.fake:
+        from utils.fakes import install_fakes
+        install_fakes(yahoo_latency=0.0)
+
+    output = run(args)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2)
+        print(f"💾 Results saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark for the rolling correlation engine at universe scale.
+
+Builds synthetic daily bars for N symbols over several years (with a
+common market factor and some late listings), then times aligning the
+closes, a full window load, one incremental day, and reading the
+correlation matrix and betas back out. Also reports the resident size of
+the window statistics and checks that a run of incremental updates agrees
+with an exact recompute.
+
+Usage:
+    python -m benchmarks.bench_correlation
+    python -m benchmarks.bench_correlation --symbols 500 --years 5 --window 365
+"""
+import argparse
+import statistics
+import time
+import numpy as np
+from tools.correlation import RollingCorrelation, aligned_returns
+from tools.price_store import BAR_DTYPE
+
+
+def _synthetic_bars(symbols: int, days: int, seed: int) -> list:
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0, 0.025, days)
+    betas = rng.uniform(0.3, 1.8, symbols)
+    returns = betas[:, None] * market + rng.normal(0, 0.03, (symbols, days))
+    close = 100 * np.exp(np.cumsum(returns, axis=1))
+    end = np.datetime64("2026-01-01")
+    bars_list = []
+    for i in range(symbols):
+        # A quarter of the universe listed partway through the history
+        start = int(rng.integers(0, days // 2)) if i % 4 == 3 else 0
+        bars = np.zeros(days - start, dtype=BAR_DTYPE)
+        bars["date"] = end - np.arange(days - start)[::-1]
+        bars["close"] = close[i, start:]
+        bars_list.append(bars)
+    return bars_list
+
+
+def _median(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def run(args) -> dict:
+    """Time each engine stage and return the medians"""
+    bars_list = _synthetic_bars(args.symbols, args.years * 365, args.seed)
+    symbols = [f"S{i}" for i in range(args.symbols)]
+    dates, returns = aligned_returns(bars_list)
+
+    rolling = RollingCorrelation(symbols, args.window)
+    history = slice(None, -args.incremental)
+    rolling.load(dates[history], returns[:, history])
+    start = time.perf_counter()
+    for column in range(returns.shape[1] - args.incremental, returns.shape[1]):
+        rolling.push(dates[column], returns[:, column])
+    incremental = (time.perf_counter() - start) / args.incremental
+
+    exact = RollingCorrelation(symbols, args.window)
+    exact.load(dates, returns)
+    drift = float(np.nanmax(np.abs(rolling.correlation() - exact.correlation())))
+
+    stats_bytes = sum(m.nbytes for m in (rolling.count, rolling.sum_x, rolling.sum_xx, rolling.sum_xy))
+    window_bytes = sum(r.nbytes for _, r in rolling.days)
+    return {
+        "align_s": _median(lambda: aligned_returns(bars_list), args.runs),
+        "load_s": _median(lambda: exact.load(dates, returns), args.runs),
+        "incremental_day_s": incremental,
+        "read_s": _median(lambda: (exact.correlation(), exact.beta("S0"), exact.dispersion()), args.runs),
+        "state_mb": (stats_bytes + window_bytes) / 1e6,
+        "returns_mb": returns.nbytes / 1e6,
+        "max_drift": drift,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling correlation engine benchmark")
+    parser.add_argument("--symbols", type=int, default=300)
+    parser.add_argument("--years", type=int, default=4)
+    parser.add_argument("--window", type=int, default=90)
+    parser.add_argument("--incremental", type=int, default=400,
+                        help="Days appended one at a time after the initial load")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    result = run(args)
+    print(f"{args.symbols} symbols, {args.years} years, {args.window}-day window")
+    print(f"{'align closes':<24} {result['align_s'] * 1000:>10.1f} ms")
+    print(f"{'full window load':<24} {result['load_s'] * 1000:>10.1f} ms")
+    print(f"{'incremental day':<24} {result['incremental_day_s'] * 1000:>10.1f} ms")
+    print(f"{'read corr/beta/disp':<24} {result['read_s'] * 1000:>10.1f} ms")
+    print(f"{'window state':<24} {result['state_mb']:>10.1f} MB  (aligned history {result['returns_mb']:.1f} MB)")
+    print(f"{'max |incremental - exact|':<24} {result['max_drift']:>10.2e}")
+
+
+if __name__ == "__main__":
+    main()
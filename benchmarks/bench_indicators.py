@@ -0,0 +1,60 @@
+"""
+Benchmark for tools.indicators.compute_indicators.
+
+Runs the engine on synthetic random-walk price matrices of growing symbol
+counts and history lengths and prints the per-symbol cost, which should
+fall as the universe grows.
+
+Usage:
+    python -m benchmarks.bench_indicators
+    python -m benchmarks.bench_indicators --symbols 1 10 100 500 --bars 365 1825
+"""
+import argparse
+import time
+import numpy as np
+from tools.indicators import compute_indicators
+
+
+def _random_walk(symbols: int, bars: int, seed: int = 0) -> tuple:
+    """Synthetic close/high/low/volume matrices of shape (symbols, bars)"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.03, (symbols, bars)), axis=1))
+    spread = np.abs(rng.normal(0, 0.01, (symbols, bars)))
+    return close, close * (1 + spread), close * (1 - spread), rng.uniform(1e6, 1e9, (symbols, bars))
+
+
+def run(symbol_counts: list, bar_counts: list, repeat: int = 3) -> list:
+    """Time compute_indicators for every (symbols, bars) combination"""
+    rows = []
+    for bars in bar_counts:
+        for symbols in symbol_counts:
+            close, high, low, volume = _random_walk(symbols, bars)
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                compute_indicators(close, high, low, volume)
+                best = min(best, time.perf_counter() - start)
+            rows.append({
+                "symbols": symbols,
+                "bars": bars,
+                "total_ms": best * 1000,
+                "per_symbol_us": best / symbols * 1e6,
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the indicator engine")
+    parser.add_argument("--symbols", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--bars", type=int, nargs="+", default=[365, 1825])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'symbols':>8} {'bars':>6} {'total ms':>10} {'per symbol us':>14}")
+    for row in run(args.symbols, args.bars, args.repeat):
+        print(f"{row['symbols']:>8} {row['bars']:>6} {row['total_ms']:>10.2f} "
+              f"{row['per_symbol_us']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
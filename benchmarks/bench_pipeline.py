@@ -0,0 +1,181 @@
+"""
+Offline end-to-end benchmark for the analysis pipeline.
+
+Runs AnalysisPipeline against the fake LLM, Exa and Yahoo providers in
+utils/fakes.py, so it needs no network or API keys. It measures:
+
+- end-to-end latency of a single query (cold local stores and warm)
+- throughput of N concurrent analyses
+- peak Python memory (tracemalloc) during the concurrent run
+
+Results can be saved as a baseline and later runs compared against it;
+the script exits non-zero when a metric regresses past --tolerance.
+
+Usage:
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --save-baseline
+    python -m benchmarks.bench_pipeline --compare
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from utils import config
+from utils.fakes import install_fakes
+from tools import providers
+from tools.price_store import default_store
+from tools.news_store import default_news_store
+from tools.report_index import default_report_index
+from tools.correlation import default_correlation
+from crypto_agents import AnalysisPipeline
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Metrics where larger is better; everything else is a cost
+_HIGHER_IS_BETTER = {"throughput_per_s"}
+
+_WATCHLIST = ["BTC", "ETH", "SOL", "ADA", "DOT", "AVAX", "LINK", "XRP", "DOGE", "LTC",
+              "ATOM", "XLM", "ALGO", "VET", "ICP", "FIL", "UNI", "BCH", "SHIB", "MATIC"]
+
+
+def _fresh_state(workdir: str):
+    """Point the local stores at an empty directory so the next run is cold"""
+    shutil.rmtree(workdir, ignore_errors=True)
+    os.makedirs(workdir)
+    default_store.root = os.path.join(workdir, "ohlcv")
+    default_news_store.path = os.path.join(workdir, "news.sqlite")
+    default_report_index.path = os.path.join(workdir, "reports.sqlite")
+    default_correlation.reset()
+
+
+async def _latency(pipeline: AnalysisPipeline, runs: int, workdir: str) -> dict:
+    cold, warm = [], []
+    for _ in range(runs):
+        _fresh_state(workdir)
+        start = time.perf_counter()
+        await pipeline.run("analyze ETH for 60 days")
+        cold.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await pipeline.run("analyze ETH for 60 days")
+        warm.append(time.perf_counter() - start)
+    return {
+        "latency_cold_s": statistics.median(cold),
+        "latency_warm_s": statistics.median(warm),
+    }
+
+
+async def _throughput(pipeline: AnalysisPipeline, n: int, workdir: str) -> dict:
+    _fresh_state(workdir)
+    requests = [
+        {"cryptocurrency": _WATCHLIST[i % len(_WATCHLIST)], "days": 30, "focus": "general overview"}
+        for i in range(n)
+    ]
+    tracemalloc.start()
+    start = time.perf_counter()
+    results = await pipeline.run_batch(requests, concurrency=n, save=False)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    failed = sum(1 for r in results if "error" in r)
+    return {
+        "concurrent_n": n,
+        "concurrent_wall_s": elapsed,
+        "throughput_per_s": n / elapsed,
+        "peak_memory_mb": peak / 1024 / 1024,
+        "failed": failed,
+    }
+
+
+def run(args) -> dict:
+    """Run the benchmark with the given latencies and return its metrics"""
+    config.LLM_CACHE_ENABLED = False
+    # Serving a saved report would time a file read instead of the pipeline
+    config.REPORT_REUSE_ENABLED = False
+    llm = install_fakes(
+        llm_latency=args.llm_latency,
+        exa_latency=args.exa_latency,
+        yahoo_latency=args.yahoo_latency,
+        info_latency=args.info_latency
+    )
+    pipeline = AnalysisPipeline(llm)
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    try:
+        metrics = asyncio.run(_latency(pipeline, args.runs, workdir))
+        metrics.update(asyncio.run(_throughput(pipeline, args.concurrent, workdir)))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        providers.reset()
+    metrics["settings"] = {
+        "llm_latency": args.llm_latency,
+        "exa_latency": args.exa_latency,
+        "yahoo_latency": args.yahoo_latency,
+        "info_latency": args.info_latency,
+        "runs": args.runs,
+        "concurrent": args.concurrent,
+    }
+    return metrics
+
+
+def compare(metrics: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Compare metrics against a baseline.
+
+    Returns:
+        Lines describing every metric, with regressions marked
+    """
+    lines = []
+    for key, value in metrics.items():
+        if key == "settings" or key not in baseline or not isinstance(value, (int, float)):
+            continue
+        old = baseline[key]
+        change = (value - old) / old if old else 0.0
+        worse = -change if key in _HIGHER_IS_BETTER else change
+        flag = "REGRESSION" if worse > tolerance else "ok"
+        lines.append(f"{key:<20} {old:>10.3f} -> {value:>10.3f} ({change:+.1%}) {flag}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end pipeline benchmark")
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--exa-latency", type=float, default=0.3)
+    parser.add_argument("--yahoo-latency", type=float, default=0.2)
+    parser.add_argument("--info-latency", type=float, default=0.6)
+    parser.add_argument("--runs", type=int, default=3, help="Latency samples (median is reported)")
+    parser.add_argument("--concurrent", type=int, default=10, help="Analyses in the throughput run")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Allowed relative regression before failing (default: 10%%)")
+    args = parser.parse_args()
+
+    metrics = run(args)
+    print(json.dumps(metrics, indent=2))
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(metrics, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if args.compare:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("settings") != metrics["settings"]:
+            print("\nWarning: baseline was recorded with different settings")
+        lines = compare(metrics, baseline, args.tolerance)
+        print("\n" + "\n".join(lines))
+        if any(line.endswith("REGRESSION") for line in lines):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark for sectioned vs single-call report generation.
+
+Runs ReportWriter.agenerate (one long completion) and
+ReportWriter.agenerate_sectioned (concurrent section drafts plus a summary
+pass) on the fake chat model, whose latency is a fixed time-to-first-token
+plus a per-word generation cost, and prints the wall-clock time of each.
+
+Usage:
+    python -m benchmarks.bench_report
+    python -m benchmarks.bench_report --ttft 0.8 --per-word 0.015 --report-sentences 45
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from utils import config
+from utils.fakes import FakeChatModel
+from crypto_agents import ReportWriter
+
+_PRICE = "Price rose 12% over the window with RSI near 64 and volatility compressing."
+_NEWS = "Sentiment is mildly bullish on ETF inflows; regulatory headlines remain a risk."
+
+
+async def _time(generate, runs: int) -> tuple:
+    samples, report = [], ""
+    for i in range(runs):
+        start = time.perf_counter()
+        # Vary the focus so each run is a distinct prompt
+        report = await generate("BTC", 30, f"general overview {i}", _NEWS, _PRICE)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), len(report.split())
+
+
+def run(args) -> dict:
+    """Time both report modes and return their medians"""
+    config.LLM_CACHE_ENABLED = False
+    llm = FakeChatModel(
+        latency=args.ttft,
+        decode_latency=args.per_word,
+        response_sentences=args.report_sentences
+    )
+    writer = ReportWriter(llm)
+    single, single_words = asyncio.run(_time(writer.agenerate, args.runs))
+    sectioned, sectioned_words = asyncio.run(_time(writer.agenerate_sectioned, args.runs))
+    return {
+        "single_s": single,
+        "single_words": single_words,
+        "sectioned_s": sectioned,
+        "sectioned_words": sectioned_words,
+        "speedup": single / sectioned if sectioned else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sectioned vs single-call report benchmark")
+    parser.add_argument("--ttft", type=float, default=0.5, help="Fake time to first token (s)")
+    parser.add_argument("--per-word", type=float, default=0.01, help="Fake generation time per word (s)")
+    parser.add_argument("--report-sentences", type=int, default=70,
+                        help="Sentences the fake model writes when not length-capped")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    result = run(args)
+    print(f"{'mode':<12} {'wall (s)':>10} {'words':>8}")
+    print(f"{'single':<12} {result['single_s']:>10.2f} {result['single_words']:>8}")
+    print(f"{'sectioned':<12} {result['sectioned_s']:>10.2f} {result['sectioned_words']:>8}")
+    print(f"\nSectioned mode is {result['speedup']:.2f}x the speed of single-call mode")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Cold-start import benchmark.
+
+Imports each entry point in a fresh interpreter with `python -X importtime`
+and reports the median import time, the packages that cost the most, and
+which heavy dependencies were loaded at import. Entry points are expected
+to stay light: LangChain, the provider SDKs and pandas should load only
+when a stage needs them.
+
+Results can be saved as a baseline and compared like bench_pipeline; the
+script exits non-zero when an import time regresses past --tolerance or a
+light entry point starts importing a heavy dependency.
+
+Usage:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --save-baseline
+    python -m benchmarks.bench_startup --compare
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from benchmarks.bench_pipeline import compare
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline_startup.json")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Module -> whether it should import without any heavy dependency
+_TARGETS = {
+    "main": True,
+    "server": False,
+    "crypto_agents.pipeline": False,
+    "tools.data_fetch": False,
+}
+_HEAVY = ("langchain_openai", "langchain", "openai", "yfinance", "exa_py", "pandas", "curl_cffi")
+
+
+def _import_once(module: str) -> tuple:
+    """
+    Import module in a fresh interpreter.
+
+    Returns:
+        Tuple of (seconds, {top-level package: self seconds}, heavy packages loaded)
+    """
+    probe = f"import sys, {module}; print(','.join(sorted(m for m in sys.modules if '.' not in m)))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    total, packages = 0.0, {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(self_us) / 1e6
+        if name == module:
+            total = int(cumulative_us) / 1e6
+    loaded = set(result.stdout.strip().split(","))
+    return total, packages, sorted(m for m in _HEAVY if m in loaded)
+
+
+def run(args) -> tuple:
+    """Median import time per target, plus the top packages and heavy modules of the last run"""
+    metrics, details = {}, {}
+    for module in _TARGETS:
+        samples = [_import_once(module) for _ in range(args.runs)]
+        metrics[f"import_{module}_s"] = statistics.median(s[0] for s in samples)
+        _, packages, heavy = samples[-1]
+        details[module] = {
+            "top": sorted(packages.items(), key=lambda item: -item[1])[:args.top],
+            "heavy": heavy,
+        }
+    metrics["settings"] = {"runs": args.runs, "python": sys.version.split()[0]}
+    return metrics, details
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per target (median is reported)")
+    parser.add_argument("--top", type=int, default=5, help="Most expensive packages to list per target")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.20,
+                        help="Allowed relative regression before failing (default: 20%%)")
+    args = parser.parse_args()
+
+    metrics, details = run(args)
+    failed = False
+    for module, info in details.items():
+        print(f"{module:<24} {metrics[f'import_{module}_s']:>7.3f}s  "
+              + ", ".join(f"{name} {seconds:.3f}s" for name, seconds in info["top"]))
+        if info["heavy"]:
+            print(f"{'':<24} heavy: {', '.join(info['heavy'])}")
+            if _TARGETS[module]:
+                print(f"{'':<24} REGRESSION: {module} should not import heavy dependencies")
+                failed = True
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(metrics, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if args.compare:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("settings") != metrics["settings"]:
+            print("\nWarning: baseline was recorded with different settings")
+        lines = compare(metrics, baseline, args.tolerance)
+        print("\n" + "\n".join(lines))
+        failed = failed or any(line.endswith("REGRESSION") for line in lines)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
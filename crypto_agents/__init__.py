@@ -1,6 +1,29 @@
-from .customer_communicator import CustomerCommunicator
-from .news_analyst import NewsAnalyst
-from .price_analyst import PriceAnalyst
-from .report_writer import ReportWriter
+"""
+Agents and the pipeline that runs them.
 
-__all__ = ['CustomerCommunicator', 'NewsAnalyst', 'PriceAnalyst', 'ReportWriter']
\ No newline at end of file
+Submodules are imported on first attribute access (PEP 562), so importing
+the package, e.g. for query_parser, doesn't load LangChain.
+"""
+import importlib
+
+_EXPORTS = {
+    'CustomerCommunicator': '.customer_communicator',
+    'NewsAnalyst': '.news_analyst',
+    'PriceAnalyst': '.price_analyst',
+    'ReportWriter': '.report_writer',
+    'AnalysisPipeline': '.pipeline',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
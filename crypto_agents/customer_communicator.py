@@ -1,7 +1,13 @@
-from langchain_openai import ChatOpenAI
+from typing import TYPE_CHECKING
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
+from utils.tracing import current_span, span, traced
 from pydantic import BaseModel, Field
+from utils import config
+from .query_parser import parse_query
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
 
 
 class CryptoRequest(BaseModel):
@@ -11,21 +17,12 @@ class CryptoRequest(BaseModel):
 
 
 class CustomerCommunicator:
-    def __init__(self, llm: ChatOpenAI):
+    def __init__(self, llm: "ChatOpenAI"):
         self.llm = llm
         self.parser = JsonOutputParser(pydantic_object=CryptoRequest)
-
-    def gather_requirements(self, user_input: str) -> dict:
-        """
-        Parse user input and extract structured analysis requirements.
-
-        Args:
-            user_input: Raw user query
-
-        Returns:
-            Dictionary with cryptocurrency, days, and focus
-        """
-        prompt = ChatPromptTemplate.from_messages([
+        # How many queries each path answered: fast_path / llm / fallback
+        self.path_counts = {"fast_path": 0, "llm": 0, "fallback": 0}
+        self.prompt = ChatPromptTemplate.from_messages([
             ("system", """You are a helpful assistant that extracts cryptocurrency 
             analysis requirements from user input.
 
@@ -41,19 +38,101 @@ class CustomerCommunicator:
             ("user", "{input}")
         ])
 
-        chain = prompt | self.llm | self.parser
+    @traced("customer_communicator")
+    def gather_requirements(self, user_input: str) -> dict:
+        """
+        Parse user input and extract structured analysis requirements.
+
+        Args:
+            user_input: Raw user query
+
+        Returns:
+            Dictionary with cryptocurrency, days, focus, and the source
+            that answered (fast_path, llm or fallback)
+        """
+        fast = self._fast_path(user_input)
+        if fast is not None:
+            current_span().set(source="fast_path")
+            return fast
+
+        chain = self.prompt | self.llm
 
         try:
-            result = chain.invoke({
-                "input": user_input,
-                "format_instructions": self.parser.get_format_instructions()
-            })
-            return result
+            with span("llm") as s:
+                message = chain.invoke({
+                    "input": user_input,
+                    "format_instructions": self.parser.get_format_instructions()
+                })
+                s.record_llm(message)
+            result = self.parser.invoke(message)
+            return self._record(result, "llm")
         except Exception as e:
             print(f"Error parsing requirements: {e}")
             # Sensible fallback defaults
-            return {
+            return self._record({
+                "cryptocurrency": "BTC",
+                "days": 30,
+                "focus": "general overview"
+            }, "fallback")
+
+    @traced("customer_communicator")
+    async def agather_requirements(self, user_input: str) -> dict:
+        """
+        Async version of gather_requirements, built on the chain's ainvoke.
+
+        Args:
+            user_input: Raw user query
+
+        Returns:
+            Dictionary with cryptocurrency, days, focus, and source
+        """
+        fast = self._fast_path(user_input)
+        if fast is not None:
+            current_span().set(source="fast_path")
+            return fast
+
+        chain = self.prompt | self.llm
+
+        try:
+            with span("llm") as s:
+                message = await chain.ainvoke({
+                    "input": user_input,
+                    "format_instructions": self.parser.get_format_instructions()
+                })
+                s.record_llm(message)
+            result = self.parser.invoke(message)
+            return self._record(result, "llm")
+        except Exception as e:
+            print(f"Error parsing requirements: {e}")
+            return self._record({
                 "cryptocurrency": "BTC",
                 "days": 30,
                 "focus": "general overview"
-            }
\ No newline at end of file
+            }, "fallback")
+
+    @staticmethod
+    def fast_parse(user_input: str):
+        """Local parse of the query the fast path would answer with; None when not confident enough"""
+        if not config.FAST_PATH_ENABLED:
+            return None
+        parsed = parse_query(user_input)
+        if parsed["cryptocurrency"] is None or parsed["confidence"] < config.FAST_PATH_MIN_CONFIDENCE:
+            return None
+        return parsed
+
+    def _fast_path(self, user_input: str):
+        """Local parse of the query; None when it isn't confident enough"""
+        parsed = self.fast_parse(user_input)
+        if parsed is None:
+            return None
+        return self._record({
+            "cryptocurrency": parsed["cryptocurrency"],
+            "days": parsed["days"],
+            "focus": parsed["focus"]
+        }, "fast_path")
+
+    def _record(self, result: dict, source: str) -> dict:
+        """Count which path answered and tag the result with it"""
+        self.path_counts[source] += 1
+        result["source"] = source
+        return result
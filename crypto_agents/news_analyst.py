@@ -1,32 +1,18 @@
-from langchain_openai import ChatOpenAI
+import asyncio
+from typing import TYPE_CHECKING, Optional
 from langchain_core.prompts import ChatPromptTemplate
-from tools.data_fetch import fetch_crypto_news
+from utils.tracing import span, traced
+from tools.data_fetch import format_news, get_news
+from tools.records import ErrorResult, NewsDigest
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
 
 
 class NewsAnalyst:
-    def __init__(self, llm: ChatOpenAI):
+    def __init__(self, llm: "ChatOpenAI"):
         self.llm = llm
-
-    def analyze(self, cryptocurrency: str) -> str:
-        """
-        Fetch and analyze recent news for a cryptocurrency.
-
-        Args:
-            cryptocurrency: Crypto symbol e.g. BTC, ETH
-
-        Returns:
-            Structured news analysis as a string
-        """
-        # Use the @tool function directly to fetch news
-        raw_news = fetch_crypto_news.invoke({
-            "cryptocurrency": cryptocurrency,
-            "num_results": 5
-        })
-
-        if "Error" in raw_news or "No recent news" in raw_news:
-            return f"No news analysis available: {raw_news}"
-
-        prompt = ChatPromptTemplate.from_messages([
+        self.prompt = ChatPromptTemplate.from_messages([
             ("system", """You are an expert cryptocurrency news analyst.
             
             Analyze the provided news articles and produce a structured analysis covering:
@@ -41,12 +27,86 @@ class NewsAnalyst:
             the sections above."""),
             ("user", "Analyze the following news for {crypto}:\n\n{news}")
         ])
+        self.cluster_prompt = ChatPromptTemplate.from_messages([
+            ("system", """You are an expert cryptocurrency news analyst.
+
+            The articles below all report the same market-wide story. Summarize
+            it in 2-3 sentences: what happened, its sentiment (Bullish / Bearish /
+            Neutral) and what it means for the crypto market as a whole."""),
+            ("user", "{news}")
+        ])
+
+    @traced("news_analyst")
+    def analyze(self, cryptocurrency: str) -> str:
+        """
+        Fetch and analyze recent news for a cryptocurrency.
+
+        Args:
+            cryptocurrency: Crypto symbol e.g. BTC, ETH
+
+        Returns:
+            Structured news analysis as a string
+        """
+        news = get_news(cryptocurrency, 5)
+        if isinstance(news, ErrorResult):
+            return f"No news analysis available: {news.render()}"
+
+        chain = self.prompt | self.llm
 
-        chain = prompt | self.llm
+        with span("llm") as s:
+            response = chain.invoke({
+                "crypto": cryptocurrency,
+                "news": news.render()
+            })
+            s.record_llm(response)
+
+        return response.content
+
+    @traced("news_analyst")
+    async def aanalyze(self, cryptocurrency: str, news: Optional[NewsDigest] = None) -> str:
+        """
+        Async version of analyze; the news fetch runs in a worker thread.
+
+        Args:
+            cryptocurrency: Crypto symbol e.g. BTC, ETH
+            news: Already fetched news (e.g. a speculative prefetch or a
+                batch run's shared news layer); fetched here when None
+
+        Returns:
+            Structured news analysis as a string
+        """
+        if news is None:
+            news = await asyncio.to_thread(get_news, cryptocurrency, 5)
+
+        if isinstance(news, ErrorResult):
+            return f"No news analysis available: {news.render()}"
+
+        chain = self.prompt | self.llm
+
+        with span("llm") as s:
+            response = await chain.ainvoke({
+                "crypto": cryptocurrency,
+                "news": news.render()
+            })
+            s.record_llm(response)
+
+        return response.content
+
+    @traced("news_cluster")
+    async def asummarize_cluster(self, articles: list) -> str:
+        """
+        Summarize one market-wide story shared by several coins' news.
+
+        Args:
+            articles: Article dicts (title, url, highlights) of one cluster
+
+        Returns:
+            Short summary of the story
+        """
+        chain = self.cluster_prompt | self.llm
 
-        response = chain.invoke({
-            "crypto": cryptocurrency,
-            "news": raw_news
-        })
+        with span("llm") as s:
+            response = await chain.ainvoke({"news": format_news("Market-wide story", articles)})
+            s.record_llm(response)
 
-        return response.content
\ No newline at end of file
+        return response.content
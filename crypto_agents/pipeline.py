@@ -0,0 +1,487 @@
+import asyncio
+import inspect
+import sys
+import time
+from dataclasses import replace
+from typing import TYPE_CHECKING
+from .customer_communicator import CustomerCommunicator
+from .news_analyst import NewsAnalyst
+from .price_analyst import PriceAnalyst
+from .query_parser import parse_days, scan_symbols
+from .report_writer import ReportWriter
+from tools.data_fetch import prepare_news, search_news
+from tools.market_snapshot import get_market_snapshot
+from tools.news_clusters import split_shared
+from tools.price_store import default_store
+from tools.records import NewsDigest
+from tools.report_index import default_report_index
+from tools.symbols import _get_yahoo_symbol
+from utils import config
+from utils.scheduler import deadline, remaining
+from utils.tracing import current_span, span
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
+
+async def _timed(name: str, coro, timings: dict):
+    """Await a coroutine and record its wall time (seconds) under name"""
+    start = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        timings[name] = time.perf_counter() - start
+
+
+async def _bounded(name: str, coro, timings: dict, fallback: str):
+    """Like _timed, but give up at the current deadline and return fallback text"""
+    try:
+        return await asyncio.wait_for(_timed(name, coro, timings), remaining())
+    except asyncio.TimeoutError:
+        current_span().add("timed_out")
+        return fallback
+
+
+class AnalysisPipeline:
+    def __init__(self, llm: "ChatOpenAI"):
+        self.llm = llm
+        self.communicator = CustomerCommunicator(llm)
+        self.news_analyst = NewsAnalyst(llm)
+        self.price_analyst = PriceAnalyst(llm)
+        self.report_writer = ReportWriter(llm)
+        self.shared_news_stats = {}
+        # Speculative prefetch outcomes: fetches started, kept (hits), started
+        # for the wrong coin (wasted: a cancelled fetch's worker thread still
+        # runs to completion and spends provider quota), and queries whose
+        # confirmed coin had not been speculated on (misses)
+        self.prefetch_stats = {"speculated": 0, "hits": 0, "misses": 0, "wasted": 0}
+
+    async def run(self, user_input: str) -> dict:
+        """
+        Run the full pipeline for a raw user query.
+
+        Args:
+            user_input: Raw user query
+
+        Returns:
+            Dictionary with requirements, analyses, report and per-branch timings
+        """
+        timings = {}
+        start = time.perf_counter()
+        requirements, news = await _timed(
+            "requirements",
+            self.gather_requirements(user_input),
+            timings
+        )
+
+        result = await self.analyze(
+            cryptocurrency=requirements.get("cryptocurrency", "BTC"),
+            days=requirements.get("days", 30),
+            focus=requirements.get("focus", "general overview"),
+            news=news
+        )
+        result["timings"] = {**timings, **result["timings"]}
+        result["timings"]["total"] = time.perf_counter() - start
+        return result
+
+    def _speculate(self, cryptocurrency: str, days: int) -> list:
+        """
+        Start fetching price history and news for a coin the query probably names.
+
+        The market snapshot lands in the price store, where the PriceAnalyst's
+        own fetch finds it fresh; the news task resolves to the articles.
+
+        Returns:
+            [price task, news task]
+        """
+        async def fetch(name, func, *args):
+            with span("speculative_fetch", cryptocurrency=cryptocurrency, data=name):
+                return await asyncio.to_thread(func, *args)
+
+        tasks = [
+            asyncio.create_task(fetch(
+                "price", get_market_snapshot, cryptocurrency, _get_yahoo_symbol(cryptocurrency), days
+            )),
+            asyncio.create_task(fetch("news", search_news, cryptocurrency, 5)),
+        ]
+        for task in tasks:
+            # Failures surface when a kept task is awaited; discarded ones are dropped
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return tasks
+
+    async def gather_requirements(self, user_input: str) -> tuple:
+        """
+        Parse a raw query while speculatively fetching data for it.
+
+        With SPECULATIVE_PREFETCH on, the coins a lexical scan of the query
+        finds (at most SPECULATIVE_MAX_SYMBOLS) have their price history and
+        news fetched while the CustomerCommunicator parses the query. The
+        fetch for the coin the parse confirms is kept; the others are
+        discarded and counted as wasted (cancelling the task does not stop
+        the provider call already running in its thread). Queries the local
+        fast path parses confidently are not speculated on: the parse takes
+        no time to overlap with. Outcomes are recorded in self.prefetch_stats.
+
+        Args:
+            user_input: Raw user query
+
+        Returns:
+            Tuple of (requirements dict, news) where news is an awaitable
+            resolving to a NewsDigest for run_analysts, or None when nothing
+            was prefetched for the confirmed coin
+        """
+        candidates = scan_symbols(user_input)[:config.SPECULATIVE_MAX_SYMBOLS]
+        if not config.SPECULATIVE_PREFETCH or not candidates or self.communicator.fast_parse(user_input):
+            return await self.communicator.agather_requirements(user_input), None
+
+        days = min(parse_days(user_input) or 30, config.MAX_HISTORY_DAYS)
+        with span("speculative_prefetch", candidates=len(candidates)) as s:
+            tasks = {coin: self._speculate(coin, days) for coin in candidates}
+            self.prefetch_stats["speculated"] += len(tasks)
+            try:
+                requirements = await self.communicator.agather_requirements(user_input)
+            except BaseException:
+                for task in (t for pair in tasks.values() for t in pair):
+                    task.cancel()
+                self.prefetch_stats["wasted"] += len(tasks)
+                raise
+
+            confirmed = str(requirements.get("cryptocurrency", "BTC")).upper()
+            kept = tasks.pop(confirmed, None)
+            self.prefetch_stats["hits" if kept else "misses"] += 1
+            for pair in tasks.values():
+                for task in pair:
+                    task.cancel()
+            self.prefetch_stats["wasted"] += len(tasks)
+            s.set(hit=kept is not None, discarded=len(tasks))
+
+        if kept is None:
+            return requirements, None
+
+        async def news():
+            try:
+                articles = await kept[1]
+            except Exception:
+                return None  # The NewsAnalyst fetches its own
+            return prepare_news(confirmed, articles) if articles else None
+
+        return requirements, news()
+
+    async def run_analysts(self, cryptocurrency: str, days: int, timings: dict,
+                           news=None) -> tuple:
+        """
+        Run news and price analysis concurrently.
+
+        The news branch (Exa + LLM) and the price branch (two Yahoo fetches +
+        LLM) are independent, so the slower of the two sets the time to report.
+        Both run under an ANALYST_DEADLINE_SECONDS deadline that provider
+        calls inherit; a branch that misses it is replaced by a short
+        "unavailable" note so the report still gets written.
+
+        Args:
+            cryptocurrency: Crypto symbol e.g. BTC, ETH
+            days: Number of days of historical data
+            timings: Dictionary that per-branch wall times are written into
+            news: Pre-fetched NewsDigest for the NewsAnalyst, or an awaitable
+                resolving to it; the analyst fetches its own when None
+
+        Returns:
+            Tuple of (news_analysis, price_analysis)
+        """
+        async def analyze_news():
+            digest = await news if inspect.isawaitable(news) else news
+            return await self.news_analyst.aanalyze(cryptocurrency, digest)
+
+        seconds = config.ANALYST_DEADLINE_SECONDS
+        with deadline(seconds):
+            return await asyncio.gather(
+                _bounded(
+                    "news", analyze_news(), timings,
+                    f"No news analysis available: timed out after {seconds}s"
+                ),
+                _bounded(
+                    "price", self.price_analyst.aanalyze(cryptocurrency, days), timings,
+                    f"Could not retrieve price data for {cryptocurrency}: timed out after {seconds}s"
+                )
+            )
+
+    async def write_report(self, cryptocurrency: str, days: int, focus: str,
+                           news_analysis: str, price_analysis: str, timings: dict) -> str:
+        """
+        Generate the final report, recording its wall time under 'report'.
+
+        Uses the sectioned (parallel sections + summary pass) writer when
+        REPORT_SECTIONED is on, otherwise a single completion.
+        """
+        generate = (
+            self.report_writer.agenerate_sectioned if config.REPORT_SECTIONED
+            else self.report_writer.agenerate
+        )
+        return await _timed(
+            "report",
+            generate(
+                cryptocurrency=cryptocurrency,
+                days=days,
+                focus=focus,
+                news_analysis=news_analysis,
+                price_analysis=price_analysis
+            ),
+            timings
+        )
+
+    async def stream_report(self, cryptocurrency: str, days: int, focus: str,
+                            news_analysis: str, price_analysis: str, timings: dict,
+                            sink=sys.stdout) -> dict:
+        """
+        Stream the final report to a sink and straight into Reports/.
+
+        Records the wall time under 'report' and time-to-first-token under
+        'report_ttft'.
+
+        Returns:
+            Dictionary with report, filename, ttft and total (see ReportWriter.astream_report)
+        """
+        result = await _timed(
+            "report",
+            self.report_writer.astream_report(
+                cryptocurrency=cryptocurrency,
+                days=days,
+                focus=focus,
+                news_analysis=news_analysis,
+                price_analysis=price_analysis,
+                sink=sink
+            ),
+            timings
+        )
+        if result["ttft"] is not None:
+            timings["report_ttft"] = result["ttft"]
+        return result
+
+    def fresh_report(self, cryptocurrency: str, days: int, focus: str):
+        """
+        A saved report for the same coin, days and focus within REPORT_FRESH_SECONDS.
+
+        Returns:
+            Dict with path, filename, created_at, age and report (see
+            ReportIndex.find_fresh), or None when reuse is off or nothing matches
+        """
+        if not (config.REPORT_REUSE_ENABLED and config.REPORT_INDEX_ENABLED):
+            return None
+        with span("report_index", cryptocurrency=cryptocurrency) as s:
+            hit = default_report_index.find_fresh(cryptocurrency, days, focus)
+            s.set(hit=hit is not None)
+        return hit
+
+    def save_report(self, result: dict) -> str:
+        """Save an analyze() result's report with its request and inputs; returns the filename"""
+        return self.report_writer.save(
+            result["report"],
+            result["cryptocurrency"],
+            days=result["days"],
+            focus=result["focus"],
+            news_analysis=result["news_analysis"],
+            price_analysis=result["price_analysis"]
+        )
+
+    async def analyze(self, cryptocurrency: str, days: int = 30, focus: str = "general overview",
+                      news=None) -> dict:
+        """
+        Run news and price analysis concurrently, then write the report.
+
+        A fresh saved report for the same request (see fresh_report) is
+        returned instead, with its file under 'filepath' and 'reused' set.
+
+        Args:
+            cryptocurrency: Crypto symbol e.g. BTC, ETH
+            days: Number of days of historical data
+            focus: User's area of interest
+            news: Pre-fetched NewsDigest (or awaitable) for the NewsAnalyst; fetched when None
+
+        Returns:
+            Dictionary with requirements, analyses, report and per-branch timings
+        """
+        timings = {}
+        start = time.perf_counter()
+
+        saved = self.fresh_report(cryptocurrency, days, focus)
+        if saved is not None:
+            if inspect.iscoroutine(news):
+                news.close()
+            return {
+                "cryptocurrency": cryptocurrency,
+                "days": days,
+                "focus": focus,
+                "news_analysis": None,
+                "price_analysis": None,
+                "report": saved["report"],
+                "filepath": saved["filename"],
+                "reused": True,
+                "timings": {"total": time.perf_counter() - start},
+            }
+
+        with span("analysis", cryptocurrency=cryptocurrency, days=days):
+            news_analysis, price_analysis = await self.run_analysts(cryptocurrency, days, timings, news)
+            report = await self.write_report(
+                cryptocurrency, days, focus, news_analysis, price_analysis, timings
+            )
+        timings["total"] = time.perf_counter() - start
+
+        return {
+            "cryptocurrency": cryptocurrency,
+            "days": days,
+            "focus": focus,
+            "news_analysis": news_analysis,
+            "price_analysis": price_analysis,
+            "report": report,
+            "timings": timings
+        }
+
+    async def run_batch(self, requests: list, concurrency: int = config.BATCH_CONCURRENCY,
+                        save: bool = True) -> list:
+        """
+        Analyze many coins in one process, one report per coin.
+
+        Each request is either a raw query string (parsed by the
+        CustomerCommunicator) or a dict with cryptocurrency / days / focus.
+        Price history for every symbol is topped up with a single bulk
+        Yahoo download before any analysis starts, and at most
+        `concurrency` coins are in their LLM stages at any time. In
+        multi-coin runs, news is fetched and clustered across coins in the
+        background (see shared_news); each coin's news branch waits for it
+        while its price branch proceeds.
+
+        Args:
+            requests: Raw queries and/or requirement dicts
+            concurrency: Maximum number of coins analyzed at once
+            save: Save each report to the Reports folder
+
+        Returns:
+            List of pipeline result dicts in request order; failed coins
+            carry an 'error' key instead of a report
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def parse(request):
+            if isinstance(request, dict):
+                return request
+            async with semaphore:
+                return await self.communicator.agather_requirements(request)
+
+        parsed = await asyncio.gather(*(parse(r) for r in requests))
+        parsed = [
+            {
+                "cryptocurrency": r.get("cryptocurrency", "BTC"),
+                "days": r.get("days", 30),
+                "focus": r.get("focus", "general overview"),
+            }
+            for r in parsed
+        ]
+
+        # One bulk download for the whole watchlist; each coin's
+        # fetch_historical_prices call then reads from the local store
+        async def prefetch_prices():
+            start = time.perf_counter()
+            yahoo_symbols = [_get_yahoo_symbol(r["cryptocurrency"]) for r in parsed]
+            max_days = min(max((r["days"] for r in parsed), default=30), config.MAX_HISTORY_DAYS)
+            try:
+                await asyncio.to_thread(default_store.bulk_update, yahoo_symbols, max_days)
+            except Exception as e:
+                print(f"Bulk price download failed, falling back to per-coin fetches: {e}")
+            return time.perf_counter() - start
+
+        # Shared news for multi-coin runs, fetched while prices download
+        async def prefetch_news():
+            start = time.perf_counter()
+            news = {}
+            if config.NEWS_SHARED_CLUSTERING and len({r["cryptocurrency"] for r in parsed}) > 1:
+                try:
+                    news = await self.shared_news(
+                        [r["cryptocurrency"] for r in parsed], asyncio.Semaphore(concurrency)
+                    )
+                except Exception as e:
+                    print(f"Shared news layer failed, falling back to per-coin news: {e}")
+            return news, time.perf_counter() - start
+
+        # Price branches start as soon as prices are in; news branches wait for the shared layer
+        news_task = asyncio.create_task(prefetch_news())
+        prefetch_time = await prefetch_prices()
+
+        async def coin_news(cryptocurrency):
+            # Shielded: one coin's news branch timing out must not cancel the shared fetch
+            news, _ = await asyncio.shield(news_task)
+            return news.get(cryptocurrency)
+
+        async def analyze_one(requirements):
+            async with semaphore:
+                try:
+                    result = await self.analyze(**requirements, news=coin_news(requirements["cryptocurrency"]))
+                except Exception as e:
+                    return {**requirements, "error": str(e)}
+            result["timings"]["bulk_prices"] = prefetch_time
+            news, shared_news_time = await asyncio.shield(news_task)
+            if news:
+                result["timings"]["shared_news"] = shared_news_time
+            if save and not result.get("reused"):
+                result["filepath"] = self.save_report(result)
+            return result
+
+        return await asyncio.gather(*(analyze_one(r) for r in parsed))
+
+    async def shared_news(self, cryptocurrencies: list, semaphore: asyncio.Semaphore) -> dict:
+        """
+        Fetch news for every coin of a run and summarize shared stories once.
+
+        Articles returned for several coins (same URL or near-duplicate
+        content, see tools.news_clusters) are summarized by one LLM call per
+        story. Each coin then gets its own articles, compressed as usual,
+        followed by the summaries of the shared stories its search returned.
+        Records counts in self.shared_news_stats.
+
+        Args:
+            cryptocurrencies: Coin symbols of the run
+            semaphore: Bounds concurrent searches and summary calls
+
+        Returns:
+            Dict of coin -> NewsDigest for NewsAnalyst.aanalyze; coins whose
+            search failed are left out and fetch their own news
+        """
+        coins = list(dict.fromkeys(cryptocurrencies))
+
+        async def search(coin):
+            async with semaphore:
+                return await asyncio.to_thread(search_news, coin, 5)
+
+        with span("shared_news", coins=len(coins)) as s:
+            results = await asyncio.gather(*(search(c) for c in coins), return_exceptions=True)
+            news_by_coin = {
+                coin: articles for coin, articles in zip(coins, results)
+                if not isinstance(articles, BaseException)
+            }
+            shared, specific = split_shared(news_by_coin)
+
+            async def summarize(cluster):
+                async with semaphore:
+                    return await self.news_analyst.asummarize_cluster(cluster.articles)
+
+            summaries = await asyncio.gather(*(summarize(c) for c in shared))
+
+            digests = {}
+            for coin in news_by_coin:
+                stories = tuple(
+                    f"- {cluster.title}: {summary.strip()}"
+                    for cluster, summary in zip(shared, summaries) if coin in cluster.coins
+                )
+                if specific[coin]:
+                    digests[coin] = replace(prepare_news(coin, specific[coin]), stories=stories)
+                elif stories:
+                    digests[coin] = NewsDigest(coin, stories=stories)
+
+            self.shared_news_stats = {
+                "coins": len(news_by_coin),
+                "shared_stories": len(shared),
+                "shared_articles": sum(len(c.coins) for c in shared),
+                # Each shared story would otherwise be read once per coin
+                "story_reads_saved": sum(len(c.coins) - 1 for c in shared),
+            }
+            s.set(**self.shared_news_stats)
+        return digests
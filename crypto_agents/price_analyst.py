@@ -1,37 +1,20 @@
-from langchain_openai import ChatOpenAI
+import asyncio
+from typing import TYPE_CHECKING
 from langchain_core.prompts import ChatPromptTemplate
-from tools.data_fetch import fetch_current_price, fetch_historical_prices
+from utils.tracing import span, traced
+from tools.data_fetch import get_market_data
+from tools.correlation import render_cross_asset
+from tools.intraday import render_intraday
+from tools.records import ErrorResult
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
 
 
 class PriceAnalyst:
-    def __init__(self, llm: ChatOpenAI):
+    def __init__(self, llm: "ChatOpenAI"):
         self.llm = llm
-
-    def analyze(self, cryptocurrency: str, days: int = 30) -> str:
-        """
-        Fetch and analyze price data for a cryptocurrency.
-
-        Args:
-            cryptocurrency: Crypto symbol e.g. BTC, ETH
-            days: Number of days of historical data
-
-        Returns:
-            Structured price analysis as a string
-        """
-        # Fetch both current and historical data using @tool functions
-        current_data = fetch_current_price.invoke({
-            "cryptocurrency": cryptocurrency
-        })
-
-        historical_data = fetch_historical_prices.invoke({
-            "cryptocurrency": cryptocurrency,
-            "days": days
-        })
-
-        if "Error" in current_data and "Error" in historical_data:
-            return f"Could not retrieve price data for {cryptocurrency}"
-
-        prompt = ChatPromptTemplate.from_messages([
+        self.prompt = ChatPromptTemplate.from_messages([
             ("system", """You are an expert cryptocurrency price analyst.
             
             Analyze the provided price data and produce a structured analysis covering:
@@ -41,7 +24,8 @@ class PriceAnalyst:
             3. **Volatility Assessment**: How volatile has it been recently?
             4. **Support & Resistance**: Key price levels based on the data
             5. **Moving Averages**: What the SMAs suggest about momentum
-            6. **Short-term Outlook**: What the data suggests may happen next
+            6. **Cross-Asset Context**: How it moves with BTC and the wider market (correlation, beta, dispersion)
+            7. **Short-term Outlook**: What the data suggests may happen next
             
             Be technical, precise, and back your analysis with the numbers provided.
             Format your response clearly with the sections above."""),
@@ -52,16 +36,78 @@ CURRENT DATA:
 
 HISTORICAL DATA:
 {historical}
+
+CROSS-ASSET CONTEXT:
+{cross_asset}
 """)
         ])
 
-        chain = prompt | self.llm
+    @traced("price_analyst")
+    def analyze(self, cryptocurrency: str, days: int = 30) -> str:
+        """
+        Fetch and analyze price data for a cryptocurrency.
+
+        Args:
+            cryptocurrency: Crypto symbol e.g. BTC, ETH
+            days: Number of days of historical data
+
+        Returns:
+            Structured price analysis as a string
+        """
+        # One Yahoo round-trip yields both the current metrics and the history
+        data = get_market_data(cryptocurrency, days)
+        if isinstance(data, ErrorResult):
+            return f"Could not retrieve price data for {cryptocurrency}"
+        cross_asset = render_cross_asset(cryptocurrency)
+        # Short timeframes also get indicators over intraday bars
+        intraday = render_intraday(cryptocurrency, days)
+
+        chain = self.prompt | self.llm
+
+        with span("llm") as s:
+            response = chain.invoke({
+                "crypto": cryptocurrency,
+                "days": days,
+                "current": data.quote.render(),
+                "historical": "\n".join(filter(None, [data.stats.render(), intraday])),
+                "cross_asset": cross_asset
+            })
+            s.record_llm(response)
+
+        return response.content
+
+    @traced("price_analyst")
+    async def aanalyze(self, cryptocurrency: str, days: int = 30) -> str:
+        """
+        Async version of analyze. The market snapshot, the cross-asset
+        context and the intraday section are built concurrently in worker
+        threads so they don't block the event loop.
+
+        Args:
+            cryptocurrency: Crypto symbol e.g. BTC, ETH
+            days: Number of days of historical data
+
+        Returns:
+            Structured price analysis as a string
+        """
+        data, cross_asset, intraday = await asyncio.gather(
+            asyncio.to_thread(get_market_data, cryptocurrency, days),
+            asyncio.to_thread(render_cross_asset, cryptocurrency),
+            asyncio.to_thread(render_intraday, cryptocurrency, days)
+        )
+        if isinstance(data, ErrorResult):
+            return f"Could not retrieve price data for {cryptocurrency}"
+
+        chain = self.prompt | self.llm
 
-        response = chain.invoke({
-            "crypto": cryptocurrency,
-            "days": days,
-            "current": current_data,
-            "historical": historical_data
-        })
+        with span("llm") as s:
+            response = await chain.ainvoke({
+                "crypto": cryptocurrency,
+                "days": days,
+                "current": data.quote.render(),
+                "historical": "\n".join(filter(None, [data.stats.render(), intraday])),
+                "cross_asset": cross_asset
+            })
+            s.record_llm(response)
 
-        return response.content
\ No newline at end of file
+        return response.content
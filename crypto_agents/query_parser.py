@@ -0,0 +1,162 @@
+"""
+Deterministic requirement extraction for simple queries.
+
+Handles queries like "analyze ETH for 60 days" or "bitcoin news last
+3 months" without an LLM round-trip. parse_query returns a confidence
+score; CustomerCommunicator only trusts the result above
+FAST_PATH_MIN_CONFIDENCE and otherwise falls back to the LLM.
+"""
+import re
+from tools.symbols import SYMBOL_TO_YAHOO
+
+# Full names and common nicknames for the coins in SYMBOL_TO_YAHOO
+COIN_NAMES = {
+    "bitcoin": "BTC",
+    "ethereum": "ETH",
+    "ether": "ETH",
+    "solana": "SOL",
+    "cardano": "ADA",
+    "polkadot": "DOT",
+    "polygon": "MATIC",
+    "avalanche": "AVAX",
+    "chainlink": "LINK",
+    "uniswap": "UNI",
+    "ripple": "XRP",
+    "dogecoin": "DOGE",
+    "shiba inu": "SHIB",
+    "shiba": "SHIB",
+    "litecoin": "LTC",
+    "bitcoin cash": "BCH",
+    "cosmos": "ATOM",
+    "stellar": "XLM",
+    "algorand": "ALGO",
+    "vechain": "VET",
+    "internet computer": "ICP",
+    "filecoin": "FIL",
+}
+
+# Symbols that are also ordinary English words; only trusted when written in capitals
+AMBIGUOUS_SYMBOLS = {"DOT", "LINK", "UNI", "ATOM", "FIL"}
+
+_NAME_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(name) for name in sorted(COIN_NAMES, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE
+)
+_YAHOO_PATTERN = re.compile(r"\b([A-Za-z0-9]{2,10})-USD\b", re.IGNORECASE)
+_TOKEN_PATTERN = re.compile(r"\b[A-Za-z]{2,6}\b")
+
+_UNIT_DAYS = {
+    "d": 1, "day": 1, "days": 1,
+    "w": 7, "wk": 7, "wks": 7, "week": 7, "weeks": 7,
+    "mo": 30, "mos": 30, "month": 30, "months": 30,
+    "q": 90, "quarter": 90, "quarters": 90,
+    "y": 365, "yr": 365, "yrs": 365, "year": 365, "years": 365,
+}
+_DURATION_PATTERN = re.compile(
+    r"\b(\d{1,4})\s*(" + "|".join(sorted(_UNIT_DAYS, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE
+)
+# Minutes / hours ("5m", "4h"): bar sizes rather than a timeframe in days; left to the LLM
+_SUBDAY_PATTERN = re.compile(
+    r"\b\d{1,4}\s*(?:m|min|mins|minute|minutes|h|hr|hrs|hour|hours)\b", re.IGNORECASE
+)
+_WORD_DURATION_PATTERN = re.compile(
+    r"\b(?:a|an|one|last|past|this)\s+(day|week|month|quarter|year)\b", re.IGNORECASE
+)
+
+_FOCUS_KEYWORDS = {
+    "price trends": ("price", "chart", "technical", "trend", "momentum", "volatility",
+                     "support", "resistance", "moving average", "sma", "rsi", "macd"),
+    "news sentiment": ("news", "sentiment", "headline", "headlines", "announcement",
+                       "announcements", "events", "narrative"),
+}
+
+
+def scan_symbols(text: str) -> list:
+    """
+    Cheap lexical scan for the coins a query mentions.
+
+    Args:
+        text: Raw user query
+
+    Returns:
+        Distinct symbols in order of first mention
+    """
+    found = {}
+    for match in _YAHOO_PATTERN.finditer(text):
+        found.setdefault(match.group(1).upper(), match.start())
+    for match in _NAME_PATTERN.finditer(text):
+        found.setdefault(COIN_NAMES[match.group(1).lower()], match.start())
+    for match in _TOKEN_PATTERN.finditer(text):
+        token = match.group(0)
+        symbol = token.upper()
+        if symbol not in SYMBOL_TO_YAHOO:
+            continue
+        if symbol in AMBIGUOUS_SYMBOLS and token != symbol:
+            continue
+        found.setdefault(symbol, match.start())
+    return sorted(found, key=found.get)
+
+
+def parse_days(text: str):
+    """Extract a duration in days, or None if the query doesn't give one"""
+    match = _DURATION_PATTERN.search(text)
+    if match:
+        return int(match.group(1)) * _UNIT_DAYS[match.group(2).lower()]
+    match = _WORD_DURATION_PATTERN.search(text)
+    if match:
+        return _UNIT_DAYS[match.group(1).lower()]
+    return None
+
+
+def parse_focus(text: str) -> str:
+    """Keyword-based focus detection"""
+    lowered = text.lower()
+    matched = [
+        focus for focus, keywords in _FOCUS_KEYWORDS.items()
+        if any(re.search(rf"\b{re.escape(k)}\b", lowered) for k in keywords)
+    ]
+    if len(matched) == 1:
+        return matched[0]
+    if matched:
+        return " and ".join(matched)
+    return "general overview"
+
+
+def parse_query(text: str) -> dict:
+    """
+    Extract analysis requirements without an LLM.
+
+    Args:
+        text: Raw user query
+
+    Returns:
+        Dictionary with cryptocurrency, days, focus and a confidence in [0, 1].
+        cryptocurrency is None unless exactly one coin was found.
+    """
+    symbols = scan_symbols(text)
+    days = parse_days(text)
+
+    confidence = 0.0
+    if len(symbols) == 1:
+        confidence += 0.6
+        if days is not None:
+            confidence += 0.3
+        elif not re.search(r"\d", text):
+            # No number anywhere - the default timeframe is what the LLM would pick too
+            confidence += 0.3
+        if len(text.split()) <= 20:
+            confidence += 0.1
+
+    # Comparisons, long conversational queries and sub-day durations are left to the LLM
+    if re.search(r"\b(vs|versus|compare|compared|against)\b", text, re.IGNORECASE):
+        confidence = min(confidence, 0.5)
+    if _SUBDAY_PATTERN.search(text):
+        confidence = min(confidence, 0.5)
+
+    return {
+        "cryptocurrency": symbols[0] if len(symbols) == 1 else None,
+        "days": days if days is not None else 30,
+        "focus": parse_focus(text),
+        "confidence": round(confidence, 2),
+    }
@@ -1,36 +1,81 @@
-from langchain_openai import ChatOpenAI
+from typing import TYPE_CHECKING
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.callbacks import AsyncCallbackHandler
+from utils import config
+from utils.tracing import span, traced
+from tools.report_index import default_report_index
 from datetime import datetime
 import re
+import asyncio
 import os
+import sys
+import time
 
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
 
-class ReportWriter:
-    def __init__(self, llm: ChatOpenAI):
-        self.llm = llm
 
-    def generate(
-        self,
-        cryptocurrency: str,
-        days: int,
-        focus: str,
-        news_analysis: str,
-        price_analysis: str
-    ) -> str:
-        """
-        Synthesize news and price analyses into a comprehensive markdown report.
+# Detail sections drafted concurrently in sectioned mode, in report order,
+# with the analyses each one is given
+DETAIL_SECTIONS = {
+    "Market Overview": ("Current market position, context, and broader market conditions.", ("price", "news")),
+    "Price Analysis": ("Detailed breakdown using the price analysis data provided.", ("price",)),
+    "News & Sentiment Analysis": ("Detailed breakdown using the news analysis data provided.", ("news",)),
+    "Risks & Considerations": ("Key risks investors should be aware of.", ("price", "news")),
+}
+# Written in one final pass over the drafted detail sections
+SUMMARY_SECTIONS = ("Executive Summary", "Key Insights", "Outlook")
+# Layout of the stitched report
+SECTION_ORDER = [
+    "Executive Summary", "Market Overview", "Price Analysis", "News & Sentiment Analysis",
+    "Key Insights", "Risks & Considerations", "Outlook",
+]
+_DATA_LABELS = {"price": "PRICE ANALYSIS", "news": "NEWS ANALYSIS"}
 
-        Args:
-            cryptocurrency: Crypto symbol
-            days: Analysis timeframe in days
-            focus: User's area of interest
-            news_analysis: Output from NewsAnalyst
-            price_analysis: Output from PriceAnalyst
 
-        Returns:
-            Full markdown report as a string
-        """
-        prompt = ChatPromptTemplate.from_messages([
+class _ReportStream(AsyncCallbackHandler):
+    """Copies streamed tokens to a sink (e.g. stdout) and a partial report file"""
+
+    def __init__(self, partial_path: str, sink=None):
+        self.partial_path = partial_path
+        self.sink = sink
+        self.file = open(partial_path, "w", encoding="utf-8")
+        self.start = time.perf_counter()
+        self.ttft = None
+        self.received = False
+
+    def write(self, text: str):
+        if not text:
+            return
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self.start
+        self.file.write(text)
+        self.file.flush()
+        if self.sink is not None:
+            self.sink.write(text)
+            self.sink.flush()
+
+    async def on_llm_new_token(self, token: str, **kwargs):
+        self.received = True
+        self.write(token)
+
+    def finalize(self, filepath: str):
+        """fsync the partial file and atomically move it into place"""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        os.replace(self.partial_path, filepath)
+
+    def abort(self):
+        self.file.close()
+        if os.path.exists(self.partial_path):
+            os.remove(self.partial_path)
+
+
+class ReportWriter:
+    def __init__(self, llm: "ChatOpenAI"):
+        self.llm = llm
+        self.prompt = ChatPromptTemplate.from_messages([
             ("system", """You are a professional cryptocurrency market analyst writing 
             a comprehensive research report.
 
@@ -60,9 +105,9 @@ class ReportWriter:
             ## Outlook
             Short-term outlook based on the combined analysis.
 
-            ---
-            *Report generated on {date} | Timeframe: {days} days | Focus: {focus}*
-            *This report is for informational purposes only and does not constitute financial advice.*
+            Do not add a footer; the generation date and disclaimer are appended
+            automatically. The analysis timeframe is {days} days and the reader's
+            focus is: {focus}.
 
             Make the report detailed, professional, and actionable.
             Use markdown formatting throughout (headers, bold, bullet points, etc.)."""),
@@ -75,39 +120,320 @@ NEWS ANALYSIS:
 {news}
 """)
         ])
+        self.section_prompt = ChatPromptTemplate.from_messages([
+            ("system", """You are a professional cryptocurrency market analyst writing
+            one section of a research report on {crypto}.
+
+            Write only the body of the "{section}" section: {instructions}
+            Do not repeat the section heading or write any other section.
+            The analysis timeframe is {days} days and the reader's focus is: {focus}.
+            Use markdown formatting (bold, bullet points) and keep it under {words} words."""),
+            ("user", "{data}")
+        ])
+        self.summary_prompt = ChatPromptTemplate.from_messages([
+            ("system", """You are a professional cryptocurrency market analyst finishing
+            a research report on {crypto}. The detail sections are already written.
+
+            Based only on them, write exactly these three sections, each starting
+            with its level-2 markdown heading:
 
-        chain = prompt | self.llm
+            ## Executive Summary
+            A concise 3-4 sentence overview of the current state and key findings.
+
+            ## Key Insights
+            3-5 bullet points of the most important takeaways.
 
-        response = chain.invoke({
-            "crypto": cryptocurrency,
-            "days": days,
-            "focus": focus,
-            "date": datetime.now().strftime("%Y-%m-%d %H:%M UTC"),
-            "price": price_analysis,
-            "news": news_analysis
-        })
+            ## Outlook
+            Short-term outlook based on the combined analysis.
 
-        return response.content
+            The analysis timeframe is {days} days and the reader's focus is: {focus}.
+            Keep it under {words} words in total."""),
+            ("user", "{sections}")
+        ])
 
-    def save(self, content: str, cryptocurrency: str) -> str:
+    @traced("report_writer")
+    def generate(
+        self,
+        cryptocurrency: str,
+        days: int,
+        focus: str,
+        news_analysis: str,
+        price_analysis: str
+    ) -> str:
         """
-        Save the report as a markdown file.
+        Synthesize news and price analyses into a comprehensive markdown report.
 
         Args:
-            content: Markdown report content
-            cryptocurrency: Crypto symbol for filename
+            cryptocurrency: Crypto symbol
+            days: Analysis timeframe in days
+            focus: User's area of interest
+            news_analysis: Output from NewsAnalyst
+            price_analysis: Output from PriceAnalyst
 
         Returns:
-            Path to the saved file
+            Full markdown report as a string
+        """
+        chain = self.prompt | self.llm
+
+        with span("llm") as s:
+            response = chain.invoke({
+                "crypto": cryptocurrency,
+                "days": days,
+                "focus": focus,
+                "price": price_analysis,
+                "news": news_analysis
+            })
+            s.record_llm(response)
+
+        return response.content + self._footer(days, focus)
+
+    @traced("report_writer")
+    async def agenerate(
+        self,
+        cryptocurrency: str,
+        days: int,
+        focus: str,
+        news_analysis: str,
+        price_analysis: str
+    ) -> str:
+        """
+        Async version of generate, built on the chain's ainvoke.
+
+        Args:
+            cryptocurrency: Crypto symbol
+            days: Analysis timeframe in days
+            focus: User's area of interest
+            news_analysis: Output from NewsAnalyst
+            price_analysis: Output from PriceAnalyst
+
+        Returns:
+            Full markdown report as a string
+        """
+        chain = self.prompt | self.llm
+
+        with span("llm") as s:
+            response = await chain.ainvoke({
+                "crypto": cryptocurrency,
+                "days": days,
+                "focus": focus,
+                "price": price_analysis,
+                "news": news_analysis
+            })
+            s.record_llm(response)
+
+        return response.content + self._footer(days, focus)
+
+    async def _draft_section(self, section: str, cryptocurrency: str, days: int, focus: str,
+                             analyses: dict) -> str:
+        """Draft one detail section from the analyses it depends on"""
+        instructions, inputs = DETAIL_SECTIONS[section]
+        chain = self.section_prompt | self.llm
+
+        with span("section", section=section) as s:
+            response = await chain.ainvoke({
+                "crypto": cryptocurrency,
+                "section": section,
+                "instructions": instructions,
+                "days": days,
+                "focus": focus,
+                "words": config.REPORT_SECTION_WORDS,
+                "data": "\n\n".join(f"{_DATA_LABELS[key]}:\n{analyses[key]}" for key in inputs)
+            })
+            s.record_llm(response)
+
+        return response.content.strip()
+
+    @staticmethod
+    def _split_sections(markdown: str) -> dict:
+        """Map '## Heading' -> body for each level-2 section in markdown"""
+        sections = {}
+        for match in re.finditer(r"^##\s+(.+?)\s*\n(.*?)(?=^##\s|\Z)", markdown, re.M | re.S):
+            sections[match.group(1).strip().rstrip(":")] = match.group(2).strip()
+        return sections
+
+    @traced("report_writer")
+    async def agenerate_sectioned(
+        self,
+        cryptocurrency: str,
+        days: int,
+        focus: str,
+        news_analysis: str,
+        price_analysis: str
+    ) -> str:
+        """
+        Generate the report section by section instead of in one completion.
+
+        The detail sections (Market Overview, Price Analysis, News &
+        Sentiment, Risks) are drafted as concurrent LLM calls, then one
+        short call writes the Executive Summary, Key Insights and Outlook
+        from those drafts. The result is stitched into the same layout as
+        generate(), so wall time follows the longest section plus the
+        summary pass rather than the length of the whole report.
+
+        Args:
+            cryptocurrency: Crypto symbol
+            days: Analysis timeframe in days
+            focus: User's area of interest
+            news_analysis: Output from NewsAnalyst
+            price_analysis: Output from PriceAnalyst
+
+        Returns:
+            Full markdown report as a string
+        """
+        analyses = {"price": price_analysis, "news": news_analysis}
+        drafts = await asyncio.gather(*(
+            self._draft_section(section, cryptocurrency, days, focus, analyses)
+            for section in DETAIL_SECTIONS
+        ))
+        sections = dict(zip(DETAIL_SECTIONS, drafts))
+
+        chain = self.summary_prompt | self.llm
+        with span("summary") as s:
+            response = await chain.ainvoke({
+                "crypto": cryptocurrency,
+                "days": days,
+                "focus": focus,
+                "words": config.REPORT_SUMMARY_WORDS,
+                "sections": "\n\n".join(f"## {name}\n{body}" for name, body in sections.items())
+            })
+            s.record_llm(response)
+
+        summary = self._split_sections(response.content)
+        if not any(name in summary for name in SUMMARY_SECTIONS):
+            # No recognisable headings: keep the whole pass as the summary
+            summary = {"Executive Summary": response.content.strip()}
+        sections.update({name: summary.get(name, "") for name in SUMMARY_SECTIONS})
+
+        report = f"# {cryptocurrency} Cryptocurrency Analysis Report\n\n" + "\n\n".join(
+            f"## {name}\n\n{sections[name]}" for name in SECTION_ORDER if sections.get(name)
+        )
+        return report + self._footer(days, focus)
+
+    @staticmethod
+    def _footer(days: int, focus: str) -> str:
+        """
+        Report footer. Kept out of the prompt so the rendered prompt does not
+        change every minute, which lets repeated requests hit the LLM cache.
+        """
+        return (
+            "\n\n---\n"
+            f"*Report generated on {datetime.now().strftime('%Y-%m-%d %H:%M UTC')} "
+            f"| Timeframe: {days} days | Focus: {focus}*\n"
+            "*This report is for informational purposes only and does not constitute financial advice.*\n"
+        )
+
+    @traced("report_writer")
+    async def astream_report(
+        self,
+        cryptocurrency: str,
+        days: int,
+        focus: str,
+        news_analysis: str,
+        price_analysis: str,
+        sink=sys.stdout
+    ) -> dict:
         """
+        Generate the report while streaming tokens to a sink and to disk.
 
+        Tokens are appended to a hidden partial file in Reports/ as they
+        arrive; once the completion and footer are written the file is
+        fsynced and renamed into place, so a finished report never appears
+        half-written. A cached completion arrives as a single chunk.
+
+        Args:
+            cryptocurrency: Crypto symbol
+            days: Analysis timeframe in days
+            focus: User's area of interest
+            news_analysis: Output from NewsAnalyst
+            price_analysis: Output from PriceAnalyst
+            sink: Text stream tokens are echoed to (None to disable)
+
+        Returns:
+            Dictionary with report, filename, ttft (seconds to first token) and total seconds
+        """
+        filepath = self._report_path(cryptocurrency)
+        directory, filename = os.path.split(filepath)
+        stream = _ReportStream(os.path.join(directory, f".{filename}.partial"), sink)
+
+        # stream=True makes the model stream through the callback while the
+        # call still goes through the LLM cache lookup and update
+        chain = self.prompt | self.llm.bind(stream=True)
+
+        try:
+            with span("llm") as s:
+                response = await chain.ainvoke({
+                    "crypto": cryptocurrency,
+                    "days": days,
+                    "focus": focus,
+                    "price": price_analysis,
+                    "news": news_analysis
+                }, config={"callbacks": [stream]})
+                s.record_llm(response)
+                if not stream.received:
+                    stream.write(response.content)
+                s.set(ttft_ms=round((stream.ttft or 0) * 1000, 1))
+
+            footer = self._footer(days, focus)
+            stream.write(footer)
+            stream.finalize(filepath)
+        except BaseException:
+            stream.abort()
+            raise
+
+        if config.REPORT_INDEX_ENABLED:
+            default_report_index.add(
+                filepath, cryptocurrency, response.content + footer, days=days, focus=focus,
+                news_analysis=news_analysis, price_analysis=price_analysis
+            )
+
+        return {
+            "report": response.content + footer,
+            "filename": filename,
+            "ttft": stream.ttft,
+            "total": time.perf_counter() - stream.start,
+        }
+
+    @staticmethod
+    def _report_path(cryptocurrency: str) -> str:
+        """Timestamped path for a new report, creating Reports/ if needed"""
         reports_dir = "Reports"
         os.makedirs(reports_dir, exist_ok = True)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"{cryptocurrency}_report_{timestamp}.md"
-        filepath = os.path.join(reports_dir, filename)
+        # Reports for one coin saved within the same second (batch, service)
+        # must not overwrite each other, or the index would point at the wrong one
+        n = 1
+        while os.path.exists(os.path.join(reports_dir, filename)):
+            n += 1
+            filename = f"{cryptocurrency}_report_{timestamp}_{n}.md"
+        return os.path.join(reports_dir, filename)
+
+    def save(self, content: str, cryptocurrency: str, days: int = None, focus: str = None,
+             news_analysis: str = None, price_analysis: str = None) -> str:
+        """
+        Save the report as a markdown file and record it in the report index.
+
+        Args:
+            content: Markdown report content
+            cryptocurrency: Crypto symbol for filename
+            days: Timeframe the report covers; reports saved without it are
+                never served again as fresh
+            focus: User's area of interest
+            news_analysis: NewsAnalyst output the report was written from
+            price_analysis: PriceAnalyst output the report was written from
+
+        Returns:
+            Path to the saved file
+        """
+        filepath = self._report_path(cryptocurrency)
+        filename = os.path.basename(filepath)
 
         with open(filepath, "w", encoding="utf-8") as f:
             f.write(content)
 
+        if config.REPORT_INDEX_ENABLED:
+            default_report_index.add(
+                filepath, cryptocurrency, content, days=days, focus=focus,
+                news_analysis=news_analysis, price_analysis=price_analysis
+            )
         return filename
\ No newline at end of file
@@ -1,67 +1,282 @@
 import os
+import time
+import asyncio
+import argparse
+import importlib
+import threading
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 from utils import config
-from crypto_agents import CustomerCommunicator, NewsAnalyst, PriceAnalyst, ReportWriter
+from utils.scheduler import default_scheduler
+from utils.tracing import format_flame, start_trace, write_trace
+from tools import providers
+from tools.news_store import default_news_store
+
+# LangChain, the agents and the provider SDKs are imported when first
+# needed (see build_pipeline), so the prompt appears without waiting on them
+if TYPE_CHECKING:
+    from crypto_agents import AnalysisPipeline
 
 load_dotenv()
 
 
-def main():
-    print("=" * 60)
-    print("       🤖 Cryptocurrency Analysis Agent")
-    print("=" * 60)
+def _print_timings(timings: dict):
+    """Print how long each pipeline branch took"""
+    print("\n⏱️  Timings: " + " | ".join(
+        f"{name}: {seconds:.2f}s" for name, seconds in timings.items()
+    ))
 
-    # Initialize shared LLM
-    llm = ChatOpenAI(
-        model= config.MODEL_NAME,
-        temperature=config.TEMPERATURE,
-        openai_api_key=os.getenv("OPENAI_API_KEY")
-    )
 
-    # Initialize all agents with the shared LLM
-    communicator = CustomerCommunicator(llm)
-    news_analyst = NewsAnalyst(llm)
-    price_analyst = PriceAnalyst(llm)
-    report_writer = ReportWriter(llm)
+def _print_cache_stats():
+    """Print LLM cache and news store hit/miss counters for this run"""
+    from utils.llm_cache import get_llm_cache
+    cache = get_llm_cache()
+    if cache is not None:
+        stats = cache.stats()
+        print(f"💾 LLM cache: {stats['hits']} hits / {stats['misses']} misses "
+              f"({stats['entries']} entries)")
+    if config.NEWS_STORE_ENABLED:
+        stats = default_news_store.stats()
+        print(f"🗞️  News store: {stats['fresh_hits']} fresh hits / {stats['refreshes']} incremental "
+              f"/ {stats['full_fetches']} full fetches ({stats['articles']} articles)")
+
+
+def _print_prefetch_stats(pipeline: "AnalysisPipeline"):
+    """Print how the speculative prefetch during requirement parsing went"""
+    stats = pipeline.prefetch_stats
+    if stats["speculated"]:
+        print(f"🔮 Prefetch: {stats['hits']} hits / {stats['misses']} misses, "
+              f"{stats['wasted']} wasted fetches")
+
 
-    # Step 1: Get user input
-    user_input = input("\n💬 What would you like to analyze?\n> ")
+def _print_provider_stats():
+    """Print connection reuse and scheduling counters for each provider"""
+    for name, stats in providers.pool_stats().items():
+        print(f"🔌 {name}: {stats['requests']} requests, {stats['new_connections']} new connections "
+              f"/ {stats['reused_connections']} reused (pool size {stats['pool_size']})")
+    for name, stats in default_scheduler.stats().items():
+        if stats["calls"]:
+            print(f"🚦 {name}: {stats['calls']} calls, {stats['retries']} retries, "
+                  f"{stats['failures']} failed, {stats['throttled_seconds']:.2f}s throttled")
+
+
+async def run_analysis(pipeline: "AnalysisPipeline", user_input: str, stream: bool = False):
+    timings = {}
+    start = time.perf_counter()
 
     # Step 2: Extract structured requirements
     print("\n📋 Processing your request...")
-    requirements = communicator.gather_requirements(user_input)
+    # Data for the coins the query names is fetched while it is parsed
+    requirements, news = await pipeline.gather_requirements(user_input)
+    timings["requirements"] = time.perf_counter() - start
     crypto = requirements.get("cryptocurrency", "BTC")
     days = requirements.get("days", 30)
     focus = requirements.get("focus", "general overview")
 
-    print(f"\n🔍 Analyzing {crypto} over the last {days} days (Focus: {focus})")
+    print(f"\n🔍 Analyzing {crypto} over the last {days} days (Focus: {focus}) "
+          f"[parsed by: {requirements.get('source', 'llm')}]")
 
-    # Step 3: Run news analysis
-    print("\n📰 Fetching and analyzing news...")
-    news_analysis = news_analyst.analyze(crypto)
+    saved = pipeline.fresh_report(crypto, days, focus)
+    if saved is not None:
+        if news is not None:
+            news.close()
+        timings["total"] = time.perf_counter() - start
+        print(f"\n♻️  Reusing report saved {saved['age'] / 60:.0f} min ago (--regenerate to refresh)")
+        print("\n" + "=" * 60)
+        print(saved["report"])
+        print("=" * 60)
+        print(f"\n✅ Report: {saved['filename']}")
+        _print_timings(timings)
+        return
 
-    # Step 4: Run price analysis
+    # Steps 3-4: News and price analysis run concurrently
+    print("\n📰 Fetching and analyzing news...")
     print("📊 Fetching and analyzing price data...")
-    price_analysis = price_analyst.analyze(crypto, days)
+    news_analysis, price_analysis = await pipeline.run_analysts(crypto, days, timings, news)
 
     # Step 5: Generate report
     print("✍️  Generating report...")
-    report = report_writer.generate(
-        cryptocurrency=crypto,
-        days=days,
-        focus=focus,
-        news_analysis=news_analysis,
-        price_analysis=price_analysis
+    if stream:
+        # Steps 5-6: tokens are printed and written to Reports/ as they arrive
+        print("\n" + "=" * 60)
+        result = await pipeline.stream_report(
+            crypto, days, focus, news_analysis, price_analysis, timings
+        )
+        timings["total"] = time.perf_counter() - start
+        filepath = result["filename"]
+        print("=" * 60)
+    else:
+        report = await pipeline.write_report(
+            crypto, days, focus, news_analysis, price_analysis, timings
+        )
+        timings["total"] = time.perf_counter() - start
+
+        # Step 6: Save and display
+        filepath = pipeline.report_writer.save(
+            report, crypto, days=days, focus=focus,
+            news_analysis=news_analysis, price_analysis=price_analysis
+        )
+
+        print("\n" + "=" * 60)
+        print(report)
+        print("=" * 60)
+
+    print(f"\n✅ Report saved to: {filepath}")
+    _print_timings(timings)
+    _print_prefetch_stats(pipeline)
+    _print_cache_stats()
+    _print_provider_stats()
+
+
+def _load_batch_requests(args) -> list:
+    """Build the batch request list from --batch and --watchlist"""
+    requests = []
+    if args.batch:
+        with open(args.batch, "r", encoding="utf-8") as f:
+            requests.extend(
+                line.strip() for line in f
+                if line.strip() and not line.strip().startswith("#")
+            )
+    if args.watchlist:
+        from tools.symbols import SYMBOL_TO_YAHOO
+        if args.watchlist.lower() == "all":
+            symbols = list(SYMBOL_TO_YAHOO)
+        else:
+            symbols = [s.strip().upper() for s in args.watchlist.split(",") if s.strip()]
+        requests.extend(
+            {"cryptocurrency": symbol, "days": args.days, "focus": args.focus}
+            for symbol in symbols
+        )
+    return requests
+
+
+async def run_batch(pipeline: "AnalysisPipeline", requests: list, concurrency: int):
+    print(f"\n📦 Batch mode: {len(requests)} analyses, concurrency {concurrency}")
+    start = time.perf_counter()
+    results = await pipeline.run_batch(requests, concurrency=concurrency)
+
+    for result in results:
+        if "error" in result:
+            print(f"❌ {result['cryptocurrency']}: {result['error']}")
+        else:
+            reused = " (reused)" if result.get("reused") else ""
+            print(f"✅ {result['cryptocurrency']}: {result['filepath']} "
+                  f"({result['timings']['total']:.2f}s){reused}")
+    print(f"\n⏱️  Batch finished in {time.perf_counter() - start:.2f}s")
+    counts = pipeline.communicator.path_counts
+    print(f"🧭 Requirements: {counts['fast_path']} fast path / {counts['llm']} LLM "
+          f"/ {counts['fallback']} fallback")
+    shared = pipeline.shared_news_stats
+    if shared:
+        print(f"📰 Shared news: {shared['shared_stories']} market-wide stories summarized once "
+              f"({shared['story_reads_saved']} per-coin reads saved)")
+    _print_cache_stats()
+    _print_provider_stats()
+
+
+def show_reports(query: str, reindex: bool = False):
+    """List recent saved reports, or search their text, from the report index"""
+    from tools.report_index import default_report_index
+    if reindex:
+        print(f"🗂️  Indexed {default_report_index.sync()} reports not yet in the index")
+    if query:
+        rows = default_report_index.search(query)
+    else:
+        rows = default_report_index.list()
+    if not rows:
+        print("No matching reports")
+    for row in rows:
+        created = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["created_at"]))
+        print(f"📄 {created}  {row['symbol']:<6} {row['days'] or '?':>4}d  "
+              f"{row['focus'] or '-':<24} {os.path.basename(row['path'])}")
+        if row.get("snippet"):
+            print(f"    {' '.join(row['snippet'].split())}")
+
+
+def _preload():
+    """Import what build_pipeline needs (run in the background while the user types)"""
+    for module in ("langchain_openai", "utils.llm_cache", "crypto_agents.pipeline"):
+        importlib.import_module(module)
+
+
+def build_pipeline() -> "AnalysisPipeline":
+    """All agents on one shared ChatOpenAI"""
+    from langchain_openai import ChatOpenAI
+    from utils.llm_cache import get_llm_cache
+    from utils.scheduler import openai_rate_limiter
+    from crypto_agents import AnalysisPipeline
+
+    llm = ChatOpenAI(
+        model= config.MODEL_NAME,
+        temperature=config.TEMPERATURE,
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        cache=get_llm_cache(),
+        rate_limiter=openai_rate_limiter(),
+        max_retries=config.OPENAI_MAX_RETRIES
     )
+    return AnalysisPipeline(llm)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Cryptocurrency Analysis Agent")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Analyze every query in FILE (one per line) and exit")
+    parser.add_argument("--watchlist", metavar="SYMBOLS",
+                        help="Comma-separated symbols to analyze, or 'all' for every mapped coin")
+    parser.add_argument("--days", type=int, default=30,
+                        help="Timeframe for --watchlist analyses (default: 30)")
+    parser.add_argument("--focus", default="general overview",
+                        help="Focus for --watchlist analyses")
+    parser.add_argument("--concurrency", type=int, default=config.BATCH_CONCURRENCY,
+                        help="Coins analyzed at the same time in batch mode")
+    parser.add_argument("--sectioned", action="store_true",
+                        help="Draft report sections as concurrent LLM calls, then summarize "
+                             "(ignored with --stream)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Print the report as it is generated instead of all at once")
+    parser.add_argument("--regenerate", action="store_true",
+                        help="Always write a new report, even if a fresh one for the same request is saved")
+    parser.add_argument("--reports", nargs="?", const="", metavar="QUERY",
+                        help="List recent saved reports, or full-text search them for QUERY, and exit")
+    parser.add_argument("--reindex", action="store_true",
+                        help="With --reports: first index report files saved before the index existed")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print a per-stage timing summary and write a JSON trace file")
+    return parser.parse_args(argv)
 
-    # Step 6: Save and display
-    filepath = report_writer.save(report, crypto)
 
-    print("\n" + "=" * 60)
-    print(report)
+def main():
+    args = parse_args()
+    if args.sectioned:
+        config.REPORT_SECTIONED = True
+    if args.regenerate:
+        config.REPORT_REUSE_ENABLED = False
+    if args.reports is not None:
+        show_reports(args.reports, reindex=args.reindex)
+        return
+
     print("=" * 60)
-    print(f"\n✅ Report saved to: {filepath}")
+    print("       🤖 Cryptocurrency Analysis Agent")
+    print("=" * 60)
+
+    if args.batch or args.watchlist:
+        requests = _load_batch_requests(args)
+        run = run_batch(build_pipeline(), requests, args.concurrency)
+    else:
+        # Step 1: Get user input, importing the agents while the user types
+        threading.Thread(target=_preload, daemon=True).start()
+        user_input = input("\n💬 What would you like to analyze?\n> ")
+        run = run_analysis(build_pipeline(), user_input, stream=args.stream)
+
+    if not args.profile:
+        asyncio.run(run)
+        return
+
+    with start_trace("run") as root:
+        asyncio.run(run)
+    print("\n🔬 Profile:")
+    print(format_flame(root))
+    print(f"\n📝 Trace saved to: {write_trace(root)}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,346 @@
+"""
+Long-lived HTTP service mode for the analysis pipeline.
+
+Keeps the chat model, the four agents, the provider clients and the local
+stores warm between requests instead of paying start-up cost per query.
+
+- Identical analyses (same cryptocurrency, days and focus) that arrive
+  while one is already queued or running are coalesced onto it, so every
+  caller gets the same result from a single computation.
+- Distinct analyses wait in a bounded queue served by a fixed number of
+  workers; when the queue is full new work is rejected with 503 and a
+  Retry-After header instead of piling up. Raw queries being parsed (an
+  LLM call plus a speculative prefetch) count against the same limit.
+
+Endpoints:
+    POST /analyze   {"query": "..."} or {"cryptocurrency": "ETH", "days": 60, "focus": "..."}
+    GET  /health    queue depth, in-flight analyses and request counters
+
+Usage:
+    python server.py
+    python server.py --fake          # offline, with the providers in utils/fakes.py
+"""
+import argparse
+import asyncio
+import json
+import os
+from dotenv import load_dotenv
+from utils import config
+from crypto_agents import AnalysisPipeline
+from tools import providers
+from tools.news_store import default_news_store
+from tools.report_index import default_report_index
+from utils.scheduler import default_scheduler
+
+load_dotenv()
+
+_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable",
+}
+
+
+class Overloaded(Exception):
+    """Raised when the analysis queue is full"""
+
+
+class AnalysisServer:
+    def __init__(self, pipeline: AnalysisPipeline, workers: int = config.SERVER_WORKERS,
+                 queue_size: int = config.SERVER_QUEUE_SIZE, save: bool = True):
+        """
+        Args:
+            pipeline: Shared pipeline whose agents stay warm across requests
+            workers: Number of analyses computed at the same time
+            queue_size: Distinct analyses allowed to wait for a worker
+            save: Save each report to the Reports folder
+        """
+        self.pipeline = pipeline
+        self.workers = workers
+        self.save = save
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.inflight = {}
+        self.parsing = 0
+        self.stats = {"requests": 0, "computed": 0, "coalesced": 0, "rejected": 0, "failed": 0}
+        self._tasks = []
+
+    @staticmethod
+    def _key(requirements: dict) -> tuple:
+        return (
+            str(requirements["cryptocurrency"]).upper(),
+            int(requirements["days"]),
+            " ".join(str(requirements["focus"]).lower().split()),
+        )
+
+    async def submit(self, requirements: dict) -> dict:
+        """
+        Run an analysis, sharing any identical one already queued or running.
+
+        Args:
+            requirements: Dict with cryptocurrency, days and focus
+
+        Returns:
+            Pipeline result dict plus 'coalesced' (True when this caller
+            joined an existing computation); raises Overloaded when the
+            queue is full
+        """
+        self.stats["requests"] += 1
+        key = self._key(requirements)
+
+        future = self.inflight.get(key)
+        coalesced = future is not None
+        if coalesced:
+            self.stats["coalesced"] += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            # Mark the exception as retrieved even if every caller disconnected
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            try:
+                self.queue.put_nowait((key, requirements, future))
+            except asyncio.QueueFull:
+                self.stats["rejected"] += 1
+                raise Overloaded(f"{self.queue.maxsize} analyses already queued")
+            self.inflight[key] = future
+
+        # A caller going away must not cancel work other callers share
+        result = await asyncio.shield(future)
+        return {**result, "coalesced": coalesced}
+
+    async def _worker(self):
+        while True:
+            key, requirements, future = await self.queue.get()
+            try:
+                result = await self.pipeline.analyze(
+                    cryptocurrency=key[0],
+                    days=key[1],
+                    focus=requirements["focus"]
+                )
+                if self.save and not result.get("reused"):
+                    result["filepath"] = self.pipeline.save_report(result)
+                self.stats["computed"] += 1
+                future.set_result(result)
+            except Exception as e:
+                self.stats["failed"] += 1
+                future.set_exception(e)
+            finally:
+                self.inflight.pop(key, None)
+                self.queue.task_done()
+
+    def health(self) -> dict:
+        return {
+            "status": "ok",
+            "queued": self.queue.qsize(),
+            "parsing": self.parsing,
+            "queue_size": self.queue.maxsize,
+            "inflight": len(self.inflight),
+            "workers": self.workers,
+            **self.stats,
+            "requirements": dict(self.pipeline.communicator.path_counts),
+            "prefetch": dict(self.pipeline.prefetch_stats),
+            "providers": providers.pool_stats(),
+            "scheduler": default_scheduler.stats(),
+            "news_store": default_news_store.stats() if config.NEWS_STORE_ENABLED else None,
+            "reports": default_report_index.stats() if config.REPORT_INDEX_ENABLED else None,
+        }
+
+    async def _requirements(self, body: dict) -> dict:
+        """
+        Requirement dict from a request body (raw query or explicit fields).
+
+        Raises Overloaded when a raw query arrives while queued analyses and
+        queries being parsed already fill the queue, and ValueError when the
+        body (or the parsed query) asks for fewer than one day.
+        """
+        if "query" in body:
+            if self.parsing + self.queue.qsize() >= self.queue.maxsize:
+                self.stats["rejected"] += 1
+                raise Overloaded(f"{self.queue.maxsize} analyses already queued or being parsed")
+            self.parsing += 1
+            try:
+                # Prefetched news isn't passed on (requests are coalesced by
+                # requirements), but the fetch still warms the price and news stores
+                body, news = await self.pipeline.gather_requirements(str(body["query"]))
+            finally:
+                self.parsing -= 1
+            if news is not None:
+                news.close()
+        elif "cryptocurrency" not in body:
+            raise ValueError("Body needs either 'query' or 'cryptocurrency'")
+        days = int(body.get("days", 30))
+        if days < 1:
+            raise ValueError(f"'days' must be at least 1, got {days}")
+        return {
+            "cryptocurrency": str(body["cryptocurrency"]).upper(),
+            "days": min(days, config.MAX_HISTORY_DAYS),
+            "focus": str(body.get("focus", "general overview")),
+        }
+
+    async def handle(self, method: str, path: str, body: bytes) -> tuple:
+        """
+        Route one request.
+
+        Returns:
+            (status, payload dict, extra headers dict)
+        """
+        path = path.split("?", 1)[0]
+        if path == "/health":
+            if method != "GET":
+                return 405, {"error": "Use GET"}, {}
+            return 200, self.health(), {}
+        if path != "/analyze":
+            return 404, {"error": f"Unknown path {path}"}, {}
+        if method != "POST":
+            return 405, {"error": "Use POST"}, {}
+
+        try:
+            requirements = await self._requirements(json.loads(body or b"{}"))
+        except Overloaded as e:
+            return 503, {"error": f"Server busy: {e}"}, {"Retry-After": "5"}
+        except (ValueError, TypeError, AttributeError, KeyError) as e:
+            # KeyError: the LLM's parse of a query is not validated and may lack a field
+            return 400, {"error": f"Invalid request: {e}"}, {}
+        except Exception as e:
+            return 500, {"error": str(e)}, {}
+
+        try:
+            result = await self.submit(requirements)
+        except Overloaded as e:
+            return 503, {"error": f"Server busy: {e}"}, {"Retry-After": "5"}
+        except Exception as e:
+            return 500, {"error": str(e), **requirements}, {}
+        return 200, result, {}
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Minimal HTTP/1.1 with keep-alive; one request at a time per connection"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "Malformed request line"}, {}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = (
+                    headers.get("connection", "").lower() != "close"
+                    and version.upper() == "HTTP/1.1"
+                )
+                try:
+                    length = int(headers.get("content-length", 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, 400, {"error": "Invalid Content-Length"}, {}, False)
+                    break
+                if length > config.SERVER_MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "Body too large"}, {}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload, extra = await self.handle(method.upper(), path, body)
+                await self._respond(writer, status, payload, extra, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: dict,
+                       extra: dict, keep_alive: bool):
+        data = json.dumps(payload, default=str).encode("utf-8")
+        headers = {
+            "Content-Type": "application/json",
+            "Content-Length": str(len(data)),
+            "Connection": "keep-alive" if keep_alive else "close",
+            **extra,
+        }
+        head = f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in headers.items()
+        )
+        writer.write(head.encode("latin-1") + b"\r\n" + data)
+        await writer.drain()
+
+    async def start(self, host: str = config.SERVER_HOST, port: int = config.SERVER_PORT):
+        """Start the workers and listen; returns the asyncio server"""
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        return await asyncio.start_server(self._serve_connection, host, port)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+def build_pipeline(fake: bool = False) -> AnalysisPipeline:
+    """Pipeline on ChatOpenAI and the real providers, or on the offline fakes"""
+    if fake:
+        from utils.fakes import install_fakes
+        return AnalysisPipeline(install_fakes())
+
+    from langchain_openai import ChatOpenAI
+    from utils.llm_cache import get_llm_cache
+    from utils.scheduler import openai_rate_limiter
+    llm = ChatOpenAI(
+        model=config.MODEL_NAME,
+        temperature=config.TEMPERATURE,
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        cache=get_llm_cache(),
+        rate_limiter=openai_rate_limiter(),
+        max_retries=config.OPENAI_MAX_RETRIES
+    )
+    return AnalysisPipeline(llm)
+
+
+async def serve(args):
+    server = AnalysisServer(
+        build_pipeline(args.fake),
+        workers=args.workers,
+        queue_size=args.queue_size,
+        save=not args.no_save
+    )
+    listener = await server.start(args.host, args.port)
+    print(f"🌐 Serving on http://{args.host}:{args.port} "
+          f"({args.workers} workers, queue {args.queue_size}{', fake providers' if args.fake else ''})")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await server.stop()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Cryptocurrency Analysis Agent - HTTP service")
+    parser.add_argument("--host", default=config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=config.SERVER_WORKERS,
+                        help="Analyses computed at the same time")
+    parser.add_argument("--queue-size", type=int, default=config.SERVER_QUEUE_SIZE,
+                        help="Distinct analyses allowed to wait before requests get 503")
+    parser.add_argument("--no-save", action="store_true",
+                        help="Return reports without writing them to Reports/")
+    parser.add_argument("--fake", action="store_true",
+                        help="Use the offline fake LLM, Exa and Yahoo providers (no API keys)")
+    return parser.parse_args(argv)
+
+
+def main():
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped")
+
+
+if __name__ == "__main__":
+    main()
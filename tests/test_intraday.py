@@ -0,0 +1,80 @@
+"""
+Intraday downloads go through the real yfinance history() argument
+handling; only the HTTP request is replaced, by a handler that serves
+synthetic chart JSON and rejects over-long spans the way Yahoo does.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+import yfinance as yf
+from tools.intraday import INTERVALS, _now, download_intraday
+from utils.fakes import FakeYahoo
+
+
+class _Response:
+    def __init__(self, payload: dict):
+        self.payload = payload
+        self.text = ""
+
+    def json(self) -> dict:
+        return self.payload
+
+
+def _chart(params: dict) -> dict:
+    seconds = INTERVALS[params["interval"]][0]
+    period1, period2 = params["period1"], params["period2"]
+    timestamps = list(range(period1 - period1 % seconds, period2, seconds))
+    close = [100.0 + i * 0.01 for i in range(len(timestamps))]
+    return {"chart": {"error": None, "result": [{
+        "meta": {"currency": "USD", "symbol": "BTC-USD", "exchangeTimezoneName": "UTC",
+                 "instrumentType": "CRYPTOCURRENCY", "dataGranularity": params["interval"],
+                 "regularMarketPrice": close[-1], "validRanges": ["1d", "5d", "1mo"]},
+        "timestamp": timestamps,
+        "indicators": {"quote": [{"open": close, "high": close, "low": close,
+                                  "close": close, "volume": [1.0] * len(close)}]},
+    }]}}
+
+
+@pytest.fixture
+def ticker(monkeypatch):
+    """A real yf.Ticker whose HTTP requests are answered locally; records each request"""
+    ticker = yf.Ticker("BTC-USD")
+    ticker._tz = "UTC"
+    requests = []
+
+    def get(url, params=None, timeout=None, **kwargs):
+        limit = INTERVALS[params["interval"]][1] * 86400
+        if params["period2"] - params["period1"] > limit:
+            return _Response({"chart": {"result": None, "error": {
+                "code": "Unprocessable Entity", "description": "span exceeds the interval's limit"}}})
+        requests.append(params)
+        return _Response(_chart(params))
+
+    data = ticker._data
+    monkeypatch.setattr(data, "get", get)
+    monkeypatch.setattr(data, "cache_get", get)
+    ticker.requests = requests
+    return ticker
+
+
+def test_chunked_download_through_yfinance(ticker):
+    start = _now() - np.timedelta64(20 * 86400, "s")
+    bars = download_intraday("BTC-USD", "1m", start, ticker=ticker)
+
+    assert len(ticker.requests) == 3
+    assert all(r["period2"] - r["period1"] <= 7 * 86400 for r in ticker.requests)
+    for previous, current in zip(ticker.requests, ticker.requests[1:]):
+        assert current["period1"] == previous["period2"]
+    assert len(bars) > 0
+    assert np.all(np.diff(bars["date"].astype("int64")) == 60)
+    assert bars["date"][0] <= start + np.timedelta64(60, "s")
+
+
+def test_fake_parses_dates_like_yfinance():
+    fake = FakeYahoo(latency=0).Ticker("BTC-USD")
+    with pytest.raises(ValueError):
+        fake.history(start="2026-10-10T03:00:00", interval="5m")
+    start = _now() - np.timedelta64(86400, "s")
+    bars = fake.history(start=int(start.astype("int64")), interval="5m")
+    assert len(bars) > 0
+    assert bars.index[0] >= pd.Timestamp(int(start.astype("int64")), unit="s", tz="UTC")
@@ -0,0 +1,234 @@
+"""
+Vectorized backtest of the trend labels over full price histories.
+
+The PriceAnalyst labels a coin from its period change over the requested
+window (see tools.indicators.classify_trend) and shows its 7-day momentum
+next to it. This module evaluates that classification at every date of
+every symbol at once: closes are aligned on a daily calendar as a
+(symbols x dates) matrix, and the period change, momentum and forward
+returns are computed as shifted-matrix arithmetic, so there is no loop
+over dates.
+
+Threshold sweeps sort the (period change, forward return) pairs once;
+every label bucket of every threshold pair is then a contiguous range of
+that order, and its count, mean, variance and hit rate come from prefix
+sums. A grid of thousands of threshold pairs costs a few searchsorted
+calls.
+
+Forward returns of neighbouring dates overlap, so counts overstate the
+number of independent observations.
+"""
+from typing import List, Optional
+import numpy as np
+from tools.indicators import TREND_LABELS, align_field, classify_trend, STRONG_TREND_PCT, TREND_PCT
+
+# compute_indicators needs this many bars for momentum (last 7 vs the 7 before)
+_MOMENTUM_BARS = 14
+
+
+def load_history(symbols: List[str], days: int) -> tuple:
+    """
+    Daily closes of several symbols from the price store (one bulk download).
+
+    Args:
+        symbols: Crypto symbols e.g. ['BTC', 'ETH']
+        days: History length in days
+
+    Returns:
+        Tuple of (dates, close) as returned by tools.indicators.align_field
+    """
+    from tools.symbols import _get_yahoo_symbol
+    from tools.price_store import default_store
+
+    yahoo_symbols = [_get_yahoo_symbol(s) for s in symbols]
+    default_store.bulk_update(yahoo_symbols, days)
+    bars = [default_store.window(y, days, refresh=False) for y in yahoo_symbols]
+    return align_field(bars, "close")
+
+
+def _shift(x: np.ndarray, periods: int) -> np.ndarray:
+    """Values `periods` columns earlier (later when negative), NaN where out of range"""
+    out = np.full_like(x, np.nan)
+    if periods > 0:
+        out[:, periods:] = x[:, :-periods]
+    elif periods < 0:
+        out[:, :periods] = x[:, -periods:]
+    else:
+        out[:] = x
+    return out
+
+
+def _rolling_mean(x: np.ndarray, k: int) -> np.ndarray:
+    """Mean of the last k columns at every column; NaN unless all k are present"""
+    valid = ~np.isnan(x)
+    total = np.cumsum(np.where(valid, x, 0.0), axis=1)
+    count = np.cumsum(valid, axis=1)
+    total = np.concatenate([np.zeros((len(x), 1)), total], axis=1)
+    count = np.concatenate([np.zeros((len(x), 1), dtype=count.dtype), count], axis=1)
+    window_total = total[:, k:] - total[:, :-k]
+    window_count = count[:, k:] - count[:, :-k]
+    out = np.full_like(x, np.nan)
+    out[:, k - 1:] = np.where(window_count == k, window_total / k, np.nan)
+    return out
+
+
+def trend_features(close: np.ndarray, lookback: int) -> tuple:
+    """
+    Period change and 7-day momentum at every date, as the PriceAnalyst sees them.
+
+    On a gap-free daily series these equal indicators_for_bars on the
+    `lookback`-day window ending at each date: the window holds lookback+1
+    bars, and momentum is 0 when it is shorter than 14 bars.
+
+    Args:
+        close: (symbols, dates) closes on a daily calendar
+        lookback: Analysis window in days
+
+    Returns:
+        Tuple of (price_change, momentum) in %, same shape as close, NaN
+        where the window is incomplete
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price_change = (close / _shift(close, lookback) - 1) * 100
+        if lookback + 1 >= _MOMENTUM_BARS:
+            weekly = _rolling_mean(close, 7)
+            momentum = (weekly / _shift(weekly, 7) - 1) * 100
+        else:
+            momentum = np.where(np.isnan(price_change), np.nan, 0.0)
+    return price_change, momentum
+
+
+def forward_returns(close: np.ndarray, horizon: int) -> np.ndarray:
+    """Return (%) from each date's close to the close `horizon` days later"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (_shift(close, -horizon) / close - 1) * 100
+
+
+def label_distribution(price_change: np.ndarray, forward: np.ndarray,
+                       momentum: Optional[np.ndarray] = None,
+                       strong: float = STRONG_TREND_PCT, weak: float = TREND_PCT) -> List[dict]:
+    """
+    Forward-return distribution per trend label.
+
+    Args:
+        price_change: Period changes (%) from trend_features
+        forward: Forward returns (%) from forward_returns
+        momentum: 7-day momentum (%); adds the mean forward return split by
+            whether momentum agreed with the label's direction
+        strong: Strong-trend threshold (%)
+        weak: Trend threshold (%)
+
+    Returns:
+        One dict per label with count, mean, median, std, hit_rate (share of
+        positive forward returns), p10 and p90
+    """
+    valid = ~np.isnan(price_change) & ~np.isnan(forward)
+    labels = classify_trend(price_change[valid], strong, weak)
+    returns = forward[valid]
+    momentum = momentum[valid] if momentum is not None else None
+
+    rows = []
+    for index, name in enumerate(TREND_LABELS):
+        mask = labels == index
+        sample = returns[mask]
+        row = {"label": str(name), "count": int(mask.sum())}
+        if len(sample):
+            p10, median, p90 = np.percentile(sample, [10, 50, 90])
+            row.update(mean=float(sample.mean()), median=float(median), std=float(sample.std()),
+                       hit_rate=float((sample > 0).mean()), p10=float(p10), p90=float(p90))
+        else:
+            row.update(mean=np.nan, median=np.nan, std=np.nan, hit_rate=np.nan, p10=np.nan, p90=np.nan)
+        if momentum is not None:
+            # Up labels expect rising momentum, down labels falling; sideways splits on sign
+            direction = -1 if index in (2, 3) else 1
+            agrees = momentum[mask] * direction > 0
+            row["mean_momentum_agrees"] = float(sample[agrees].mean()) if agrees.any() else np.nan
+            row["mean_momentum_disagrees"] = float(sample[~agrees].mean()) if (~agrees).any() else np.nan
+        rows.append(row)
+    return rows
+
+
+def sweep_thresholds(price_change: np.ndarray, forward: np.ndarray,
+                     strong_values: np.ndarray, weak_values: np.ndarray) -> List[dict]:
+    """
+    Evaluate every (strong, weak) threshold pair with weak < strong.
+
+    Each pair is scored by its information coefficient (the correlation of
+    the label, as an ordinal from strong downtrend -2 to strong uptrend +2,
+    with the forward return), by the spread between the mean forward
+    return of the up labels and of the down labels, and by eta squared,
+    the share of forward-return variance the five labels explain.
+
+    Args:
+        price_change: Period changes (%) from trend_features
+        forward: Forward returns (%) from forward_returns
+        strong_values: Candidate strong-trend thresholds (%)
+        weak_values: Candidate trend thresholds (%)
+
+    Returns:
+        One dict per pair (strong, weak, ic, spread, eta2, and per-label
+        counts and means), highest information coefficient first
+    """
+    valid = ~np.isnan(price_change) & ~np.isnan(forward)
+    order = np.argsort(price_change[valid], kind="stable")
+    x, y = price_change[valid][order], forward[valid][order]
+    if not len(x):
+        return []
+
+    def prefix(values):
+        return np.concatenate([[0.0], np.cumsum(values)])
+    sums, squares, hits = prefix(y), prefix(y * y), prefix(y > 0)
+
+    strong, weak = np.meshgrid(np.asarray(strong_values, float), np.asarray(weak_values, float), indexing="ij")
+    keep = weak < strong
+    strong, weak = strong[keep], weak[keep]
+
+    # Bucket edges in sorted order, matching classify_trend's strict inequalities;
+    # columns are labels 2, 3, 4, 1, 0 (ascending period change)
+    edges = np.stack([
+        np.zeros(len(strong), dtype=int),
+        np.searchsorted(x, -strong, side="left"),
+        np.searchsorted(x, -weak, side="left"),
+        np.searchsorted(x, weak, side="right"),
+        np.searchsorted(x, strong, side="right"),
+        np.full(len(strong), len(x)),
+    ], axis=1)
+    lo, hi = edges[:, :-1], edges[:, 1:]
+    count = hi - lo
+    total = sums[hi] - sums[lo]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / count
+        hit_rate = (hits[hi] - hits[lo]) / count
+
+    grand_mean = sums[-1] / len(y)
+    total_ss = squares[-1] - len(y) * grand_mean ** 2
+    between_ss = np.nansum(count * (mean - grand_mean) ** 2, axis=1)
+    down = (total[:, 0] + total[:, 1]) / (count[:, 0] + count[:, 1])
+    up = (total[:, 3] + total[:, 4]) / (count[:, 3] + count[:, 4])
+    # Ordinal of each bucket column (labels 2, 3, 4, 1, 0)
+    ordinal = np.array([-2.0, -1.0, 0.0, 1.0, 2.0])
+    n = len(y)
+    mean_ordinal = count @ ordinal / n
+    var_ordinal = count @ (ordinal ** 2) / n - mean_ordinal ** 2
+    cov = total @ ordinal / n - mean_ordinal * grand_mean
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spread = up - down
+        eta2 = between_ss / total_ss if total_ss > 0 else np.full(len(strong), np.nan)
+        ic = cov / np.sqrt(var_ordinal * total_ss / n)
+
+    label_columns = {0: 4, 1: 3, 2: 0, 3: 1, 4: 2}
+    results = []
+    for g in np.argsort(-np.nan_to_num(ic, nan=-np.inf), kind="stable"):
+        results.append({
+            "strong": float(strong[g]),
+            "weak": float(weak[g]),
+            "ic": float(ic[g]),
+            "spread": float(spread[g]),
+            "eta2": float(eta2[g]),
+            "labels": [
+                {"label": str(TREND_LABELS[index]), "count": int(count[g, column]),
+                 "mean": float(mean[g, column]), "hit_rate": float(hit_rate[g, column])}
+                for index, column in label_columns.items()
+            ],
+        })
+    return results
@@ -0,0 +1,381 @@
+"""
+Cross-asset correlation, beta and dispersion over the supported coin universe.
+
+Daily closes of N symbols are aligned on one calendar (crypto trades every
+day) and turned into float32 log returns, NaN where a symbol has no bar.
+RollingCorrelation keeps, for one window of W days, the pairwise sums that
+correlations and betas are computed from:
+
+    count[i, j]  days on which both i and j have a return
+    sum_x[i, j]  sum of i's returns on those days (sum_x[j, i] is j's)
+    sum_xx[i, j] sum of i's squared returns on those days
+    sum_xy[i, j] sum of i's times j's returns
+
+A new day adds a rank-1 update to each N x N matrix and the day leaving the
+window subtracts one, so keeping the statistics current costs O(N^2) per
+bar instead of O(N^2 * W). Every CORRELATION_REBUILD_EVERY updates the sums
+are recomputed from the window with one matrix product, which bounds
+float32 drift. Memory is four N x N float32 matrices plus the N x W window.
+
+CorrelationEngine keeps one RollingCorrelation per CORRELATION_WINDOWS
+window, tops them up from the local price store, and renders the summary
+the PriceAnalyst gets.
+"""
+import threading
+import time
+from collections import deque
+from typing import List, Optional
+import numpy as np
+from tools.indicators import align_field
+from utils import config
+from utils.tracing import span
+
+_FLOAT = np.float32
+
+
+def aligned_returns(bars_list: list) -> tuple:
+    """
+    Daily log returns of several symbols on a shared calendar.
+
+    Args:
+        bars_list: Per-symbol BAR_DTYPE arrays (see tools.price_store)
+
+    Returns:
+        Tuple of (dates, returns): datetime64[D] array of length T and a
+        float32 (symbols, T) matrix, NaN where either close is missing
+    """
+    dates, close = align_field(bars_list, "close")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_close = np.log(np.where(close > 0, close, np.nan))
+    return dates[1:], np.diff(log_close, axis=1).astype(_FLOAT, copy=False)
+
+
+class RollingCorrelation:
+    """Pairwise correlation / beta statistics over a sliding window of daily returns"""
+
+    def __init__(self, symbols: List[str], window: int,
+                 min_observations: int = config.CORRELATION_MIN_OBSERVATIONS,
+                 rebuild_every: int = config.CORRELATION_REBUILD_EVERY):
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.window = window
+        self.min_observations = min_observations
+        self.rebuild_every = rebuild_every
+        n = len(self.symbols)
+        self.count = np.zeros((n, n), dtype=_FLOAT)
+        self.sum_x = np.zeros((n, n), dtype=_FLOAT)
+        self.sum_xx = np.zeros((n, n), dtype=_FLOAT)
+        self.sum_xy = np.zeros((n, n), dtype=_FLOAT)
+        # (date, returns) per day in the window, oldest first
+        self.days = deque()
+        self._updates = 0
+
+    @property
+    def last_date(self) -> Optional[np.datetime64]:
+        return self.days[-1][0] if self.days else None
+
+    def _accumulate(self, rows: np.ndarray, signs: np.ndarray):
+        """Add (sign +1) or remove (sign -1) days' returns, one row per day, as a single low-rank update"""
+        mask = (~np.isnan(rows)).astype(_FLOAT)
+        x = np.nan_to_num(rows)
+        signed_mask = mask * signs[:, None]
+        signed_x = x * signs[:, None]
+        self.count += signed_mask.T @ mask
+        self.sum_x += signed_x.T @ mask
+        self.sum_xx += (signed_x * x).T @ mask
+        self.sum_xy += signed_x.T @ x
+
+    def load(self, dates: np.ndarray, returns: np.ndarray):
+        """Replace the window with the last `window` columns of a returns matrix"""
+        dates, returns = dates[-self.window:], returns[:, -self.window:]
+        self.days = deque(zip(dates, returns.T.copy()))
+        self.rebuild()
+
+    def rebuild(self):
+        """Recompute all sums from the window with matrix products"""
+        if not self.days:
+            for matrix in (self.count, self.sum_x, self.sum_xx, self.sum_xy):
+                matrix.fill(0)
+            return
+        returns = np.stack([r for _, r in self.days], axis=1)
+        mask = (~np.isnan(returns)).astype(_FLOAT)
+        x = np.nan_to_num(returns)
+        self.count = mask @ mask.T
+        self.sum_x = x @ mask.T
+        self.sum_xx = (x * x) @ mask.T
+        self.sum_xy = x @ x.T
+        self._updates = 0
+
+    def push(self, date: np.datetime64, returns: np.ndarray):
+        """Add one day's returns (length N) and drop the day leaving the window"""
+        returns = np.asarray(returns, dtype=_FLOAT)
+        self.days.append((date, returns))
+        rows = [returns]
+        while len(self.days) > self.window:
+            rows.append(self.days.popleft()[1])
+        self._accumulate(np.stack(rows), np.array([1.0] + [-1.0] * (len(rows) - 1), dtype=_FLOAT))
+        self._updates += 1
+        if self._updates >= self.rebuild_every:
+            self.rebuild()
+
+    def pop(self):
+        """Remove the newest day (e.g. because its bar was revised)"""
+        if self.days:
+            self._accumulate(self.days.pop()[1][None, :], np.array([-1.0], dtype=_FLOAT))
+
+    def _moments(self) -> tuple:
+        """Per-pair means, variances and covariance over the days both symbols traded"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            count = np.where(self.count >= self.min_observations, self.count, np.nan)
+            mean = self.sum_x / count              # mean[i, j]: i's mean on the pair's days
+            var = np.maximum(self.sum_xx / count - mean * mean, 0)
+            cov = self.sum_xy / count - mean * mean.T
+        return var, cov
+
+    def correlation(self) -> np.ndarray:
+        """N x N correlation matrix (NaN for pairs with too few shared days)"""
+        var, cov = self._moments()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.sqrt(var * var.T)
+        return np.clip(corr, -1, 1)
+
+    def beta(self, benchmark: str) -> np.ndarray:
+        """Beta of every symbol against the benchmark symbol"""
+        b = self.index[benchmark]
+        var, cov = self._moments()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return cov[:, b] / var[b, :]
+
+    def against(self, dates: np.ndarray, returns: np.ndarray, benchmark: str) -> tuple:
+        """
+        Correlation and beta of a series that is not in the universe, from the window's days.
+
+        O(N x W), with the same pairwise conventions as correlation() and beta().
+
+        Args:
+            dates: Dates of the series' returns, sorted
+            returns: The series' daily log returns
+            benchmark: Symbol the beta is measured against
+
+        Returns:
+            Tuple of (correlation with every symbol, beta vs the benchmark)
+        """
+        n = len(self.symbols)
+        if not self.days:
+            return np.full(n, np.nan), float("nan")
+        window = np.array([d for d, _ in self.days])
+        position = np.minimum(np.searchsorted(dates, window), max(len(dates) - 1, 0))
+        y = np.full(len(window), np.nan)
+        if len(dates):
+            found = dates[position] == window
+            y[found] = returns[position[found]]
+        x = np.stack([r for _, r in self.days], axis=1).astype(float)
+
+        both = ~np.isnan(x) & ~np.isnan(y)
+        xs, ys = np.where(both, x, 0.0), np.where(both, y, 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            count = np.where(both.sum(axis=1) >= self.min_observations, both.sum(axis=1), np.nan)
+            mean_x, mean_y = xs.sum(axis=1) / count, ys.sum(axis=1) / count
+            var_x = np.maximum((xs * xs).sum(axis=1) / count - mean_x ** 2, 0)
+            var_y = np.maximum((ys * ys).sum(axis=1) / count - mean_y ** 2, 0)
+            cov = (xs * ys).sum(axis=1) / count - mean_x * mean_y
+            corr = np.clip(cov / np.sqrt(var_x * var_y), -1, 1)
+            b = self.index[benchmark]
+            beta = float(cov[b] / var_x[b])
+        return corr, beta
+
+    def dispersion(self) -> float:
+        """Mean cross-sectional standard deviation of daily returns over the window (%)"""
+        if not self.days:
+            return float("nan")
+        returns = np.stack([r for _, r in self.days], axis=1)
+        valid = np.sum(~np.isnan(returns), axis=0) >= 2
+        if not valid.any():
+            return float("nan")
+        return float(np.nanmean(np.nanstd(returns[:, valid], axis=0)) * 100)
+
+
+class CorrelationEngine:
+    """
+    Rolling correlation windows over a coin universe, topped up from the price store.
+
+    update() aligns the stored closes, adds only the days each window
+    hasn't seen (re-adding the newest one, whose bar may have been revised)
+    and reloads a window only when the universe changes or it is too far
+    behind. Results are served from the cached sums until new bars arrive.
+
+    The universe is the mapped coins only. A coin outside it gets its row
+    computed on demand against the cached windows (RollingCorrelation.against),
+    so requests for different unmapped coins don't rebuild the windows.
+    """
+
+    def __init__(self, windows: tuple = config.CORRELATION_WINDOWS,
+                 benchmark: str = config.CORRELATION_BENCHMARK):
+        self.windows = tuple(sorted(windows))
+        self.benchmark = benchmark
+        self.rolling = {}
+        self.symbols = []
+        self.updated_at = 0.0
+        self.stats_counts = {"updates": 0, "days_added": 0, "reloads": 0}
+        self._lock = threading.Lock()
+        # Held for a whole refresh (downloads included), never while serving summaries
+        self._refresh_lock = threading.Lock()
+
+    def reset(self):
+        """Drop the cached windows so the next refresh downloads and rebuilds them"""
+        with self._lock:
+            self.rolling = {}
+            self.symbols = []
+            self.updated_at = 0.0
+
+    def universe(self) -> List[str]:
+        from tools.symbols import SYMBOL_TO_YAHOO
+        return [self.benchmark] + [s for s in SYMBOL_TO_YAHOO if s != self.benchmark]
+
+    def _stale(self, symbols: List[str], max_age: float) -> bool:
+        with self._lock:
+            return symbols != self.symbols or time.time() - self.updated_at >= max_age
+
+    def update(self, symbols: List[str], dates: np.ndarray, returns: np.ndarray):
+        """
+        Bring every window up to date with an aligned returns matrix.
+
+        Args:
+            symbols: Row labels of returns
+            dates: Column dates (see aligned_returns)
+            returns: float32 (symbols, days) log returns
+        """
+        if symbols != self.symbols:
+            self.symbols = list(symbols)
+            self.rolling = {w: RollingCorrelation(self.symbols, w) for w in self.windows}
+        self.stats_counts["updates"] += 1
+        for window, rolling in self.rolling.items():
+            last = rolling.last_date
+            if (last is None or last < dates[0] or last > dates[-1]
+                    or np.sum(dates >= last) > window // 4):
+                rolling.load(dates, returns)
+                self.stats_counts["reloads"] += 1
+                continue
+            rolling.pop()
+            new = np.nonzero(dates >= last)[0]
+            for column in new:
+                rolling.push(dates[column], returns[:, column])
+            self.stats_counts["days_added"] += len(new)
+        self.updated_at = time.time()
+
+    def refresh(self, max_age: float = config.PRICE_STORE_REFRESH_SECONDS):
+        """
+        Top up the universe from the price store (one bulk download) unless recently done.
+
+        The download runs outside the engine lock, so summaries are served
+        from the cached sums meanwhile. One refresh runs at a time; a caller
+        that finds one running keeps the cached sums instead of waiting,
+        unless there are none yet.
+        """
+        from tools.symbols import _get_yahoo_symbol
+        from tools.price_store import default_store
+
+        symbols = self.universe()
+        if not self._stale(symbols, max_age):
+            return
+        if not self._refresh_lock.acquire(blocking=not self.symbols):
+            return
+        try:
+            if not self._stale(symbols, max_age):
+                return
+            with span("correlation.refresh", symbols=len(symbols)):
+                yahoo_symbols = [_get_yahoo_symbol(s) for s in symbols]
+                days = self.windows[-1] + 2
+                default_store.bulk_update(yahoo_symbols, days)
+                bars = [default_store.window(y, days, refresh=False) for y in yahoo_symbols]
+                dates, returns = aligned_returns(bars)
+                if len(dates):
+                    with self._lock:
+                        self.update(symbols, dates, returns)
+        finally:
+            self._refresh_lock.release()
+
+    def _outside_returns(self, symbol: str) -> tuple:
+        """Dates and log returns of a coin outside the universe, from the price store"""
+        from tools.symbols import _get_yahoo_symbol
+        from tools.price_store import default_store
+
+        bars = default_store.window(_get_yahoo_symbol(symbol), self.windows[-1] + 2)
+        dates, returns = aligned_returns([bars])
+        return dates, returns[0]
+
+    def summary(self, symbol: str, top: int = 3) -> str:
+        """
+        Render where a symbol stands relative to the benchmark, ETH and the universe.
+
+        Returns:
+            Prompt text, one line per metric with a column per window
+        """
+        symbol = symbol.upper()
+        # Fetched before taking the lock; the universe itself is left unchanged
+        outside = None if symbol in self.universe() else self._outside_returns(symbol)
+        with self._lock:
+            if not self.symbols or (outside is None and symbol not in self.symbols):
+                return f"No cross-asset data for {symbol}"
+            i = None if outside is not None else self.rolling[self.windows[0]].index[symbol]
+            results = {}
+            for window, rolling in self.rolling.items():
+                corr = rolling.correlation()
+                off_diagonal = corr[~np.eye(len(corr), dtype=bool)]
+                if outside is None:
+                    row, beta = corr[i], rolling.beta(self.benchmark)[i]
+                else:
+                    row, beta = rolling.against(*outside, self.benchmark)
+                results[window] = {
+                    "corr": row,
+                    "beta": beta,
+                    "avg_corr": float(np.nanmean(off_diagonal)) if np.isfinite(off_diagonal).any() else float("nan"),
+                    "dispersion": rolling.dispersion(),
+                }
+            symbols = list(self.symbols)
+
+        def row(label, values, fmt):
+            return f"- {label:<30}" + " / ".join(
+                "n/a" if value != value else format(value, fmt) for value in values
+            )
+
+        windows = self.windows
+        index = {s: n for n, s in enumerate(symbols)}
+        lines = [f"Cross-Asset Context for {symbol} ({' / '.join(f'{w}d' for w in windows)} windows, "
+                 f"{len(symbols)} coins):"]
+        for other in dict.fromkeys((self.benchmark, "ETH")):
+            if other != symbol and other in index:
+                lines.append(row(f"Correlation with {other}:",
+                                 [results[w]["corr"][index[other]] for w in windows], "+.2f"))
+        if symbol != self.benchmark:
+            lines.append(row(f"Beta vs {self.benchmark}:", [results[w]["beta"] for w in windows], ".2f"))
+        lines.append(row("Universe avg correlation:", [results[w]["avg_corr"] for w in windows], "+.2f"))
+        lines.append(row("Return dispersion (daily %):", [results[w]["dispersion"] for w in windows], ".2f"))
+
+        corr = results[windows[-1]]["corr"].copy()
+        if i is not None:
+            corr[i] = np.nan
+        ranked = [n for n in np.argsort(-np.nan_to_num(corr, nan=-np.inf)) if not np.isnan(corr[n])]
+        if ranked:
+            for label, picks in (("Most", ranked[:top]), ("Least", ranked[::-1][:top])):
+                lines.append(f"- {label + f' correlated ({windows[-1]}d):':<30}"
+                             + ", ".join(f"{symbols[n]} {corr[n]:+.2f}" for n in picks))
+        return "\n".join(lines)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.stats_counts, "symbols": len(self.symbols)}
+
+
+default_correlation = CorrelationEngine()
+
+
+def render_cross_asset(cryptocurrency: str) -> str:
+    """Cross-asset summary for the PriceAnalyst prompt (never raises)"""
+    if not config.CORRELATION_ENABLED:
+        return "Not requested"
+    try:
+        default_correlation.refresh()
+        return default_correlation.summary(cryptocurrency)
+    except Exception as e:
+        return f"Cross-asset context unavailable: {e}"
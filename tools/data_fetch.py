@@ -1,92 +1,164 @@
-import requests
-import pandas as pd
-from typing import List, Dict, Optional
-from langchain.tools import tool
+from typing import List, Dict, Optional, Union
+from langchain_core.tools import tool
 from datetime import datetime
 import os
-import yfinance as yf
-from exa_py import Exa
-
-SYMBOL_TO_YAHOO = {
-    "BTC": "BTC-USD",
-    "ETH": "ETH-USD",
-    "SOL": "SOL-USD",
-    "ADA": "ADA-USD",
-    "DOT": "DOT-USD",
-    "MATIC": "MATIC-USD",
-    "AVAX": "AVAX-USD",
-    "LINK": "LINK-USD",
-    "UNI": "UNI-USD",
-    "XRP": "XRP-USD",
-    "DOGE": "DOGE-USD",
-    "SHIB": "SHIB-USD",
-    "LTC": "LTC-USD",
-    "BCH": "BCH-USD",
-    "ATOM": "ATOM-USD",
-    "XLM": "XLM-USD",
-    "ALGO": "ALGO-USD",
-    "VET": "VET-USD",
-    "ICP": "ICP-USD",
-    "FIL": "FIL-USD",
-}
-
-
-def _get_yahoo_symbol(symbol: str) -> str:
-    """Convert crypto symbol to Yahoo Finance format"""
-    symbol = symbol.upper()
-    # If already in Yahoo format (e.g., BTC-USD), return as is
-    if "-USD" in symbol:
-        return symbol
-    return SYMBOL_TO_YAHOO.get(symbol, f"{symbol}-USD")
-
-
-@tool
-def fetch_crypto_news(cryptocurrency: str, num_results: int = 5) -> str:
+from utils import config
+from tools import providers
+from tools.price_store import default_store
+from tools.indicators import indicators_for_bars
+from tools.intraday import render_intraday
+from tools.market_snapshot import get_market_snapshot
+from tools.records import ErrorResult, MarketData, NewsDigest, PriceStats, QuoteSnapshot
+from tools.news_compress import compress_news
+from tools.news_store import default_news_store
+from tools.symbols import SYMBOL_TO_YAHOO, _get_yahoo_symbol  # noqa: F401 (re-exported)
+from utils.scheduler import default_scheduler
+from utils.tracing import span, traced
+
+def search_news(cryptocurrency: str, num_results: int = 5) -> list:
     """
-    Fetch recent news articles about a cryptocurrency using Exa API.
+    Recent news about a cryptocurrency, served from the local news store
+    while fresh and otherwise refreshed incrementally from Exa.
 
     Args:
         cryptocurrency: Symbol or name of cryptocurrency (e.g., 'BTC', 'Bitcoin')
-        num_results: Number of news articles to fetch (default: 5, max: 10)
+        num_results: Number of news articles to fetch (max: 10)
 
     Returns:
-        Formatted string containing recent news articles with titles and snippets
+        List of article dicts with title, url, highlights and published_date;
+        raises on missing API key or provider errors
     """
+    num_results = min(num_results, 10)
+    if not config.NEWS_STORE_ENABLED:
+        return _exa_search(cryptocurrency, num_results)
+    return default_news_store.get(
+        cryptocurrency,
+        num_results,
+        lambda n, since: _exa_search(cryptocurrency, n, since)
+    )
+
+
+def _exa_search(cryptocurrency: str, num_results: int,
+                start_published_date: Optional[str] = None) -> list:
+    """Exa search returning article dicts, optionally only those published since a date"""
     exa_api_key = os.getenv("EXA_API_KEY")
-
     if not exa_api_key:
-        return "Error: EXA_API_KEY not found. Please add the key in .env"
-
-    try:
-        exa = Exa(exa_api_key)
-        result = exa.search(
+        raise ValueError("EXA_API_KEY not found. Please add the key in .env")
+
+    exa = providers.exa_client(exa_api_key)
+    extra = {"start_published_date": start_published_date} if start_published_date else {}
+    with span("exa.search", incremental=bool(start_published_date)) as s:
+        result = default_scheduler.call(
+            "exa",
+            exa.search,
             f"{cryptocurrency} cryptocurrency news",
-            num_results=min(num_results, 10),
+            num_results=num_results,
             type="auto",
             contents={
                 "highlights": {
                     "max_characters": 4000
                 }
-            }
+            },
+            **extra
         )
+        s.set(articles=len(result.results))
+
+    return [
+        {
+            "title": article.title,
+            "url": article.url,
+            # highlights is a list of strings
+            "highlights": list(getattr(article, "highlights", None) or []),
+            "published_date": getattr(article, "published_date", None),
+        }
+        for article in result.results
+    ]
+
+
+def format_news(cryptocurrency: str, articles: list) -> str:
+    """Render article dicts as prompt text; uses compressed 'sentences' when present"""
+    return NewsDigest.from_dicts(cryptocurrency, articles).render()
+
+
+def prepare_news(cryptocurrency: str, articles: list) -> NewsDigest:
+    """Deduplicate and compress articles to NEWS_TOKEN_BUDGET"""
+    if not config.NEWS_COMPRESSION_ENABLED:
+        return NewsDigest.from_dicts(cryptocurrency, articles)
+
+    with span("news.compress") as s:
+        compressed = compress_news(
+            articles,
+            focus_terms={cryptocurrency.lower(), _get_yahoo_symbol(cryptocurrency).lower()}
+        )
+        s.set(
+            duplicate_articles=compressed.duplicate_articles,
+            duplicate_sentences=compressed.duplicate_sentences,
+            news_tokens_before=compressed.tokens_before,
+            news_tokens_after=compressed.tokens_after,
+            news_tokens_saved=compressed.tokens_saved,
+        )
+    return NewsDigest.from_dicts(cryptocurrency, compressed.articles)
+
+
+@traced("fetch_crypto_news")
+def get_news(cryptocurrency: str, num_results: int = 5) -> Union[NewsDigest, ErrorResult]:
+    """
+    Recent news for a cryptocurrency, deduplicated and compressed.
+
+    Args:
+        cryptocurrency: Symbol or name of cryptocurrency (e.g., 'BTC', 'Bitcoin')
+        num_results: Number of news articles to fetch (max: 10)
+
+    Returns:
+        NewsDigest, or ErrorResult when the key is missing, the search
+        fails or nothing was found
+    """
+    if not os.getenv("EXA_API_KEY"):
+        return ErrorResult("news", cryptocurrency, "EXA_API_KEY not found. Please add the key in .env")
+
+    try:
+        articles = search_news(cryptocurrency, num_results)
+    except Exception as e:
+        return ErrorResult("news", cryptocurrency, str(e))
+    if not articles:
+        return ErrorResult("news", cryptocurrency, f"No recent news found on {cryptocurrency}", empty=True)
+    return prepare_news(cryptocurrency, articles)
+
+
+@tool
+def fetch_crypto_news(cryptocurrency: str, num_results: int = 5) -> str:
+    """
+    Fetch recent news articles about a cryptocurrency using Exa API.
+
+    Duplicate articles and repeated sentences are removed and the highlights
+    are compressed to a token budget before formatting.
+
+    Args:
+        cryptocurrency: Symbol or name of cryptocurrency (e.g., 'BTC', 'Bitcoin')
+        num_results: Number of news articles to fetch (default: 5, max: 10)
+
+    Returns:
+        Formatted string containing recent news articles with titles and snippets
+    """
+    return get_news(cryptocurrency, num_results).render()
+
 
-        if not result.results:
-            return f"No recent news found on {cryptocurrency}"
-        
-        formatted_news = f"Recent news for {cryptocurrency}:\n\n"
-        for i, article in enumerate(result.results, 1):
-            formatted_news += f"{i}. {article.title}\n"
-            # highlights is a list of strings, join them
-            if hasattr(article, 'highlights') and article.highlights:
-                formatted_news += f"   {' '.join(article.highlights)}\n"
-            formatted_news += f"   URL: {article.url}\n\n"
+@traced("fetch_current_price")
+def get_quote(cryptocurrency: str) -> Union[QuoteSnapshot, ErrorResult]:
+    """
+    Current price and key market metrics for a cryptocurrency.
 
-        return formatted_news
+    Args:
+        cryptocurrency: Symbol or name of cryptocurrency (e.g., 'BTC', 'ETH', 'Bitcoin')
 
+    Returns:
+        QuoteSnapshot, or ErrorResult when the fetch fails
+    """
+    try:
+        return get_market_snapshot(cryptocurrency, _get_yahoo_symbol(cryptocurrency), days=1).quote()
     except Exception as e:
-        return f"Error fetching news for {cryptocurrency}: {str(e)}"
+        return ErrorResult("current price", cryptocurrency, str(e))
 
-    
 
 @tool
 def fetch_current_price(cryptocurrency: str) -> str:
@@ -100,150 +172,93 @@ def fetch_current_price(cryptocurrency: str) -> str:
     Returns:
         Formatted string with current price, market cap, volume, and price changes
     """
-    yahoo_symbol = _get_yahoo_symbol(cryptocurrency)
-
-    try:
-        ticker = yf.Ticker(yahoo_symbol)
-        info = ticker.info
-
-        if not info or "currentPrice" not in info and "regularMarketPrice" not in info:
-            return f"Could not retrieve data for {cryptocurrency}. Please check the symbol."
-
-        # Extract metrics - yfinance uses different keys depending on asset type
-        current_price = info.get("currentPrice") or info.get("regularMarketPrice", 0)
-        prev_close = info.get("previousClose") or info.get("regularMarketPreviousClose", 0)
-        market_cap = info.get("marketCap", 0)
-        volume_24h = info.get("volume24Hr") or info.get("volume", 0)
-        day_high = info.get("dayHigh") or info.get("regularMarketDayHigh", 0)
-        day_low = info.get("dayLow") or info.get("regularMarketDayLow", 0)
-        fifty_two_week_high = info.get("fiftyTwoWeekHigh", 0)
-        fifty_two_week_low = info.get("fiftyTwoWeekLow", 0)
+    return get_quote(cryptocurrency).render()
 
-        # Calculate 24h change
-        change_24h = ((current_price - prev_close) / prev_close * 100) if prev_close else 0
 
-        result = f"""Current Market Data for {cryptocurrency} ({yahoo_symbol}):
+@traced("fetch_historical_prices")
+def get_price_stats(cryptocurrency: str, days: int = 30) -> Union[PriceStats, ErrorResult]:
+    """
+    OHLCV statistics and indicators for a cryptocurrency over a window.
 
-Price:          ${current_price:,.4f}
-24h Change:     {change_24h:+.2f}%
-24h High:       ${day_high:,.4f}
-24h Low:        ${day_low:,.4f}
+    Args:
+        cryptocurrency: Symbol or name of cryptocurrency (e.g., 'BTC', 'ETH')
+        days: Window in days (capped at MAX_HISTORY_DAYS)
 
-Market Cap:     ${market_cap:,.0f}
-24h Volume:     ${volume_24h:,.0f}
+    Returns:
+        PriceStats, or ErrorResult when no bars are available or the fetch fails
+    """
+    yahoo_symbol = _get_yahoo_symbol(cryptocurrency)
+    days = min(days, config.MAX_HISTORY_DAYS)
 
-52-Week High:   ${fifty_two_week_high:,.4f}
-52-Week Low:    ${fifty_two_week_low:,.4f}
-"""
-        return result
+    try:
+        # Served from the local OHLCV store; only the missing tail is downloaded
+        bars = default_store.window(yahoo_symbol, days)
+        if len(bars) == 0:
+            return ErrorResult(
+                "historical prices", cryptocurrency,
+                f"No historical data found for {cryptocurrency} ({yahoo_symbol})", empty=True
+            )
+        return PriceStats.from_indicators(cryptocurrency, days, indicators_for_bars(bars))
 
     except Exception as e:
-        return f"Error fetching current price for {cryptocurrency}: {str(e)}"
+        return ErrorResult("historical prices", cryptocurrency, str(e))
 
 
 @tool
-def fetch_historical_prices(cryptocurrency: str, days: int = 30) -> str:
+def fetch_historical_prices(cryptocurrency: str, days: int = 30, interval: str = "1d") -> str:
     """
     Fetch historical OHLCV price data and calculate key metrics for a cryptocurrency.
     Uses Yahoo Finance - no API key required.
 
     Args:
         cryptocurrency: Symbol or name of cryptocurrency (e.g., 'BTC', 'ETH')
-        days: Number of days of historical data to fetch (default: 30, max: 365)
+        days: Number of days of historical data to fetch (default: 30, max: MAX_HISTORY_DAYS)
+        interval: Bar size: '1d', or an intraday one ('1m', '5m', '15m', '1h' ...)
+            within Yahoo's lookback for it (30 days for 1m, 60 for 5m-30m, 730 for 1h)
 
     Returns:
         Formatted string with OHLCV stats, trend analysis, and volatility metrics
     """
-    yahoo_symbol = _get_yahoo_symbol(cryptocurrency)
-    days = min(days, 365)
-
-    # Convert days to yfinance period format
-    if days <= 7:
-        period = "7d"
-    elif days <= 30:
-        period = "1mo"
-    elif days <= 90:
-        period = "3mo"
-    elif days <= 180:
-        period = "6mo"
-    else:
-        period = "1y"
+    if interval != "1d":
+        return render_intraday(cryptocurrency, days, interval)
+    return get_price_stats(cryptocurrency, days).render()
 
-    try:
-        ticker = yf.Ticker(yahoo_symbol)
-        df = ticker.history(period=period)
-
-        if df.empty:
-            return f"No historical data found for {cryptocurrency} ({yahoo_symbol})"
-
-        # Core price metrics
-        current_price = df["Close"].iloc[-1]
-        start_price = df["Close"].iloc[0]
-        price_change = ((current_price - start_price) / start_price) * 100
-
-        high_price = df["High"].max()
-        low_price = df["Low"].min()
-        avg_close = df["Close"].mean()
-        avg_volume = df["Volume"].mean()
-
-        # Dates for high/low
-        high_date = df["High"].idxmax().strftime("%Y-%m-%d")
-        low_date = df["Low"].idxmin().strftime("%Y-%m-%d")
-
-        # Volatility - annualized standard deviation of daily returns
-        daily_returns = df["Close"].pct_change().dropna()
-        volatility = daily_returns.std() * 100
-
-        # 7-day momentum
-        if len(df) >= 14:
-            recent_avg = df["Close"].iloc[-7:].mean()
-            previous_avg = df["Close"].iloc[-14:-7].mean()
-            momentum = ((recent_avg - previous_avg) / previous_avg) * 100
-        else:
-            momentum = 0
-
-        # Simple moving averages
-        sma_7 = df["Close"].tail(7).mean() if len(df) >= 7 else current_price
-        sma_30 = df["Close"].tail(30).mean() if len(df) >= 30 else current_price
-
-        # Determine trend
-        if price_change > 10:
-            trend = "Strong Uptrend 📈"
-        elif price_change > 3:
-            trend = "Uptrend 📈"
-        elif price_change < -10:
-            trend = "Strong Downtrend 📉"
-        elif price_change < -3:
-            trend = "Downtrend 📉"
-        else:
-            trend = "Sideways / Consolidation ↔️"
-
-        result = f"""Historical Price Analysis for {cryptocurrency} ({days} days):
-
-Price Summary:
-- Current Close:    ${current_price:,.4f}
-- Period Start:     ${start_price:,.4f} ({df.index[0].strftime('%Y-%m-%d')})
-- Period Change:    {price_change:+.2f}%
-- Trend:            {trend}
-
-OHLCV Range:
-- Period High:      ${high_price:,.4f} (on {high_date})
-- Period Low:       ${low_price:,.4f} (on {low_date})
-- Average Close:    ${avg_close:,.4f}
-- Average Volume:   ${avg_volume:,.0f}
-
-Moving Averages:
-- 7-day SMA:        ${sma_7:,.4f}
-- 30-day SMA:       ${sma_30:,.4f}
-
-Momentum & Volatility:
-- 7-day Momentum:   {momentum:+.2f}%
-- Daily Volatility: {volatility:.2f}%
-"""
-        return result
 
+@traced("market_snapshot")
+def get_market_data(cryptocurrency: str, days: int = 30) -> Union[MarketData, ErrorResult]:
+    """
+    Current quote and window statistics from one MarketSnapshot (one Yahoo round-trip).
+
+    Args:
+        cryptocurrency: Symbol or name of cryptocurrency (e.g., 'BTC', 'ETH')
+        days: Number of days of historical data to analyze
+
+    Returns:
+        MarketData, or ErrorResult when the fetch fails
+    """
+    days = min(days, config.MAX_HISTORY_DAYS)
+    try:
+        snapshot = get_market_snapshot(cryptocurrency, _get_yahoo_symbol(cryptocurrency), days)
+        stats = PriceStats.from_indicators(cryptocurrency, days, indicators_for_bars(snapshot.window(days)))
     except Exception as e:
-        return f"Error fetching historical prices for {cryptocurrency}: {str(e)}"
+        return ErrorResult("market snapshot", cryptocurrency, str(e))
+    return MarketData(snapshot.quote(), stats)
+
+
+@tool
+@traced("fetch_market_snapshot")
+def fetch_market_snapshot(cryptocurrency: str, days: int = 30) -> str:
+    """
+    Fetch current market metrics and historical price analysis in one Yahoo round-trip.
+
+    Args:
+        cryptocurrency: Symbol or name of cryptocurrency (e.g., 'BTC', 'ETH')
+        days: Number of days of historical data to analyze (default: 30)
+
+    Returns:
+        Formatted current market data followed by the historical price analysis
+    """
+    return get_market_data(cryptocurrency, days).render()
 
 
 # ============================================================================
@@ -256,4 +271,5 @@ def get_all_tools():
         fetch_crypto_news,
         fetch_current_price,
         fetch_historical_prices,
+        fetch_market_snapshot,
     ]
\ No newline at end of file
@@ -0,0 +1,298 @@
+"""
+Vectorized technical indicators over a 2-D (symbols x bars) price matrix.
+
+Rows are symbols and columns are bars, oldest first. Series of different
+lengths are right-aligned and left-padded with NaN (see stack_field), so
+the last column is always the latest bar of every symbol. All indicators
+are computed for every symbol at once and returned as 1-D arrays holding
+the latest value per symbol; turning them into prompt text is left to the
+caller.
+"""
+import warnings
+from typing import Optional
+import numpy as np
+
+# Trend classification thresholds on the period change (%)
+STRONG_TREND_PCT = 10.0
+TREND_PCT = 3.0
+
+TREND_LABELS = np.array([
+    "Strong Uptrend 📈",
+    "Uptrend 📈",
+    "Strong Downtrend 📉",
+    "Downtrend 📉",
+    "Sideways / Consolidation ↔️",
+])
+
+
+def stack_field(bars_list: list, field: str = "close") -> np.ndarray:
+    """
+    Stack one field of several BAR_DTYPE arrays into a right-aligned matrix.
+
+    Args:
+        bars_list: List of per-symbol bar arrays (see tools.price_store)
+        field: Bar field to stack e.g. 'close', 'high'
+
+    Returns:
+        float64 array of shape (len(bars_list), longest length), NaN-padded on the left
+    """
+    width = max((len(b) for b in bars_list), default=0)
+    out = np.full((len(bars_list), width), np.nan)
+    for row, bars in enumerate(bars_list):
+        if len(bars):
+            out[row, width - len(bars):] = bars[field]
+    return out
+
+
+def align_field(bars_list: list, field: str = "close") -> tuple:
+    """
+    Place one field of several BAR_DTYPE arrays on a shared daily calendar.
+
+    Unlike stack_field, columns are dates, so a missing bar leaves a NaN
+    gap instead of shifting the rest of the series.
+
+    Args:
+        bars_list: List of per-symbol bar arrays (see tools.price_store)
+        field: Bar field to align e.g. 'close'
+
+    Returns:
+        Tuple of (dates, values): datetime64[D] array from the earliest to
+        the latest bar of any symbol, and a float64 (symbols, dates) matrix
+    """
+    present = [b for b in bars_list if len(b)]
+    if not present:
+        return np.array([], dtype="datetime64[D]"), np.zeros((len(bars_list), 0))
+    first = min(b["date"][0] for b in present)
+    last = max(b["date"][-1] for b in present)
+    dates = np.arange(first, last + np.timedelta64(1, "D"))
+    out = np.full((len(bars_list), len(dates)), np.nan)
+    for row, bars in enumerate(bars_list):
+        if len(bars):
+            out[row, (bars["date"] - first).astype(int)] = bars[field]
+    return dates, out
+
+
+def classify_trend(price_change: np.ndarray, strong: float = STRONG_TREND_PCT,
+                   weak: float = TREND_PCT) -> np.ndarray:
+    """Map period changes (%) to indices into TREND_LABELS"""
+    price_change = np.asarray(price_change)
+    return np.select(
+        [price_change > strong, price_change > weak,
+         price_change < -strong, price_change < -weak],
+        [0, 1, 2, 3],
+        default=4
+    )
+
+
+def _last_mean(x: np.ndarray, n: np.ndarray, k: int, offset: int = 0) -> np.ndarray:
+    """Mean of bars [-k-offset, -offset) per row; NaN where the row is too short"""
+    end = x.shape[1] - offset
+    window = x[:, max(end - k, 0):end]
+    mean = window.mean(axis=1) if window.shape[1] == k else np.full(len(x), np.nan)
+    return np.where(n >= k + offset, mean, np.nan)
+
+
+# Bars per block in _ema; small enough that decay**block never underflows
+_EMA_BLOCK = 32
+
+
+def _ema(x: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    Exponential moving average along the bar axis (pandas adjust=False).
+
+    Each row is seeded with its first non-NaN value. Instead of stepping
+    bar by bar, the recurrence is unrolled over blocks of _EMA_BLOCK bars:
+    within a block every output is a fixed weighted sum of the block's
+    inputs plus a decayed carry from the previous block, i.e. one small
+    matrix product per block for all symbols at once.
+    """
+    rows, width = x.shape
+    if width == 0:
+        return x.copy()
+
+    valid = ~np.isnan(x)
+    first = valid.argmax(axis=1)
+    # Left padding takes the seed value so the carry into the first real bar is exact
+    filled = np.where(valid, x, x[np.arange(rows), first][:, None])
+
+    decay = 1.0 - alpha
+    block = min(_EMA_BLOCK, width)
+    lag = np.arange(block)[:, None] - np.arange(block)[None, :]
+    weights = np.where(lag >= 0, alpha * decay ** np.clip(lag, 0, None), 0.0)
+    carry = decay ** np.arange(1, block + 1)
+
+    # Work bars-major so every block is a contiguous slab of rows
+    series = np.ascontiguousarray(filled.T)
+    out = np.empty_like(series)
+    prev = series[0]
+    for start in range(0, width, block):
+        size = min(block, width - start)
+        out[start:start + size] = (weights[:size, :size] @ series[start:start + size]
+                                   + carry[:size, None] * prev[None, :])
+        prev = out[start + size - 1]
+
+    out = out.T
+    out[np.arange(width)[None, :] < first[:, None]] = np.nan
+    return out
+
+
+def compute_indicators(close: np.ndarray, high: Optional[np.ndarray] = None,
+                       low: Optional[np.ndarray] = None,
+                       volume: Optional[np.ndarray] = None) -> dict:
+    """
+    Compute price metrics and technical indicators for every symbol.
+
+    Args:
+        close: Close prices, shape (symbols, bars), NaN-padded on the left
+        high: Highs with the same shape (defaults to close)
+        low: Lows with the same shape (defaults to close)
+        volume: Volumes with the same shape (optional)
+
+    Returns:
+        Dictionary of 1-D arrays with one entry per symbol. Indices
+        (start_index, high_index, low_index) are column positions into
+        the input matrix.
+    """
+    close = np.atleast_2d(np.asarray(close, dtype=np.float64))
+    high = close if high is None else np.atleast_2d(np.asarray(high, dtype=np.float64))
+    low = close if low is None else np.atleast_2d(np.asarray(low, dtype=np.float64))
+    if close.shape[1] == 0:
+        # No bars at all: a single NaN column keeps the shapes below valid
+        close = high = low = np.full((close.shape[0], 1), np.nan)
+        volume = None
+    rows, width = close.shape
+
+    valid = ~np.isnan(close)
+    n = valid.sum(axis=1)
+    start_index = np.where(n > 0, width - n, 0)
+    row_ids = np.arange(rows)
+
+    with np.errstate(all="ignore"), warnings.catch_warnings():
+        # All-NaN rows (symbols with no bars) legitimately produce NaN results
+        warnings.simplefilter("ignore", RuntimeWarning)
+
+        current = close[:, -1]
+        start = close[row_ids, start_index]
+        price_change = (current - start) / start * 100
+
+        # OHLCV range
+        filled_high = np.where(np.isnan(high), -np.inf, high)
+        filled_low = np.where(np.isnan(low), np.inf, low)
+        high_index = filled_high.argmax(axis=1)
+        low_index = filled_low.argmin(axis=1)
+        period_high = filled_high[row_ids, high_index]
+        period_low = filled_low[row_ids, low_index]
+        avg_close = np.nanmean(close, axis=1)
+        avg_volume = (np.nanmean(np.atleast_2d(volume), axis=1)
+                      if volume is not None else np.full(rows, np.nan))
+
+        # Daily volatility - standard deviation of daily returns
+        returns = close[:, 1:] / close[:, :-1] - 1
+        n_returns = (~np.isnan(returns)).sum(axis=1)
+        volatility = np.where(
+            n_returns >= 2,
+            np.nanstd(returns, axis=1, ddof=1) * 100 if returns.shape[1] >= 2 else np.nan,
+            np.nan
+        )
+
+        # 7-day momentum: last 7 bars vs the 7 before
+        recent_avg = _last_mean(close, n, 7)
+        previous_avg = _last_mean(close, n, 7, offset=7)
+        momentum = np.where(n >= 14, (recent_avg - previous_avg) / previous_avg * 100, 0.0)
+
+        # Simple moving averages fall back to the current price on short series
+        sma_7 = np.where(n >= 7, _last_mean(close, n, 7), current)
+        sma_30 = np.where(n >= 30, _last_mean(close, n, 30), current)
+
+        # RSI (14) with Wilder smoothing
+        delta = np.diff(close, axis=1)
+        avg_gain = _ema(np.where(np.isnan(delta), np.nan, np.clip(delta, 0, None)), 1 / 14)
+        avg_loss = _ema(np.where(np.isnan(delta), np.nan, np.clip(-delta, 0, None)), 1 / 14)
+        if delta.shape[1]:
+            gain, loss = avg_gain[:, -1], avg_loss[:, -1]
+            rsi = np.where(loss == 0, 100.0, 100 - 100 / (1 + gain / loss))
+            rsi = np.where(n >= 15, rsi, np.nan)
+        else:
+            rsi = np.full(rows, np.nan)
+
+        # MACD (12, 26, 9)
+        macd_line = _ema(close, 2 / 13) - _ema(close, 2 / 27)
+        signal_line = _ema(macd_line, 2 / 10)
+        enough_macd = n >= 26
+        macd = np.where(enough_macd, macd_line[:, -1], np.nan)
+        macd_signal = np.where(enough_macd, signal_line[:, -1], np.nan)
+
+        # Bollinger bands (20, 2 sigma)
+        tail = close[:, -20:]
+        bb_middle = np.where(n >= 20, tail.mean(axis=1), np.nan) if width >= 20 else np.full(rows, np.nan)
+        bb_std = np.where(n >= 20, tail.std(axis=1), np.nan) if width >= 20 else np.full(rows, np.nan)
+
+        # ATR (14) with Wilder smoothing
+        prev_close = close[:, :-1]
+        true_range = np.fmax(
+            high[:, 1:] - low[:, 1:],
+            np.fmax(np.abs(high[:, 1:] - prev_close), np.abs(low[:, 1:] - prev_close))
+        )
+        atr_series = _ema(true_range, 1 / 14)
+        atr = (np.where(n >= 15, atr_series[:, -1], np.nan)
+               if true_range.shape[1] else np.full(rows, np.nan))
+
+        # Drawdown from the running peak
+        running_peak = np.fmax.accumulate(close, axis=1)
+        drawdown = close / running_peak - 1
+        current_drawdown = drawdown[:, -1] * 100
+        max_drawdown = np.nanmin(drawdown, axis=1) * 100
+
+    return {
+        "bars": n,
+        "start_index": start_index,
+        "current_price": current,
+        "start_price": start,
+        "price_change": price_change,
+        "trend": classify_trend(price_change),
+        "period_high": period_high,
+        "period_low": period_low,
+        "high_index": high_index,
+        "low_index": low_index,
+        "avg_close": avg_close,
+        "avg_volume": avg_volume,
+        "volatility": volatility,
+        "momentum": momentum,
+        "sma_7": sma_7,
+        "sma_30": sma_30,
+        "rsi_14": rsi,
+        "macd": macd,
+        "macd_signal": macd_signal,
+        "macd_hist": macd - macd_signal,
+        "bb_upper": bb_middle + 2 * bb_std,
+        "bb_middle": bb_middle,
+        "bb_lower": bb_middle - 2 * bb_std,
+        "atr_14": atr,
+        "drawdown": current_drawdown,
+        "max_drawdown": max_drawdown,
+    }
+
+
+def indicators_for_bars(bars: np.ndarray) -> dict:
+    """
+    Compute indicators for a single symbol's bars.
+
+    Args:
+        bars: BAR_DTYPE array (see tools.price_store)
+
+    Returns:
+        Dictionary of Python scalars, plus 'trend_label' and the
+        'start_date', 'high_date' and 'low_date' of the window
+    """
+    stats = compute_indicators(
+        bars["close"][None, :],
+        bars["high"][None, :],
+        bars["low"][None, :],
+        bars["volume"][None, :]
+    )
+    result = {key: value[0].item() for key, value in stats.items()}
+    result["trend_label"] = str(TREND_LABELS[result["trend"]])
+    for key, index in (("start_date", "start_index"), ("high_date", "high_index"),
+                       ("low_date", "low_index")):
+        result[key] = str(bars["date"][result[index]])
+    return result
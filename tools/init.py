@@ -1,3 +1,10 @@
-from .data_fetch import fetch_crypto_news, fetch_current_price, fetch_historical_prices, get_all_tools
+import importlib
 
-__all__ = ['fetch_crypto_news', 'fetch_current_price', 'fetch_historical_prices', 'get_all_tools']
\ No newline at end of file
+__all__ = ['fetch_crypto_news', 'fetch_current_price', 'fetch_historical_prices', 'fetch_market_snapshot', 'get_all_tools']
+
+
+def __getattr__(name):
+    # Loaded on first use; tools.data_fetch pulls in LangChain
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module('tools.data_fetch'), name)
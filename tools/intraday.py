@@ -0,0 +1,358 @@
+"""
+Intraday bars (1m to 1h) with chunked downloads and warm streaming indicators.
+
+Yahoo Finance limits how much intraday history one request may span and
+how far back each interval goes (see INTERVALS). download_intraday splits
+a long range into requests that respect the span limit, and
+IntradayStore keeps the bars on disk per symbol and interval, topping up
+only the tail like the daily PriceStore.
+
+Series of tens of thousands of bars are not re-analyzed on every call:
+IntradayStream holds a StreamingIndicators per symbol and interval, feeds
+it only the closed bars newer than the last one it saw, and persists its
+state next to the bars, so a restarted process carries on without
+re-reading the history.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+import numpy as np
+from utils import config
+from tools import providers
+from tools.price_store import BarStore, merge_bars
+from tools.streaming import StreamingIndicators
+from utils.scheduler import default_scheduler, timeout as scheduler_timeout
+from utils.tracing import span
+
+# interval -> (bar length in seconds, longest span of one request in days,
+# how many days back Yahoo serves the interval)
+INTERVALS = {
+    "1m": (60, 7, 30),
+    "2m": (120, 60, 60),
+    "5m": (300, 60, 60),
+    "15m": (900, 60, 60),
+    "30m": (1800, 60, 60),
+    "60m": (3600, 730, 730),
+    "1h": (3600, 730, 730),
+    "90m": (5400, 60, 60),
+}
+
+# Same fields as BAR_DTYPE, with second-resolution timestamps
+INTRADAY_DTYPE = np.dtype([
+    ("date", "datetime64[s]"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+])
+
+# Bars fed to a new stream: enough for its windows and for the EMAs to converge
+_EMA_WARMUP_SPANS = 10
+
+
+def _now() -> np.datetime64:
+    return np.datetime64(datetime.now(timezone.utc).replace(tzinfo=None), "s")
+
+
+def interval_for_days(days: int) -> Optional[str]:
+    """Intraday interval for a request of `days` days (INTRADAY_HORIZONS), or None"""
+    for max_days, interval in config.INTRADAY_HORIZONS:
+        if days <= max_days:
+            return interval
+    return None
+
+
+def frame_to_intraday(df) -> np.ndarray:
+    """Convert a yfinance intraday history DataFrame into an INTRADAY_DTYPE array (UTC)"""
+    if df is None or df.empty:
+        return np.zeros(0, dtype=INTRADAY_DTYPE)
+    df = df.dropna(subset=["Close"])
+    index = df.index.tz_convert("UTC").tz_localize(None) if df.index.tz is not None else df.index
+    bars = np.empty(len(df), dtype=INTRADAY_DTYPE)
+    bars["date"] = index.to_numpy().astype("datetime64[s]")
+    bars["open"] = df["Open"].to_numpy(dtype="f8")
+    bars["high"] = df["High"].to_numpy(dtype="f8")
+    bars["low"] = df["Low"].to_numpy(dtype="f8")
+    bars["close"] = df["Close"].to_numpy(dtype="f8")
+    bars["volume"] = df["Volume"].to_numpy(dtype="f8")
+    return bars
+
+
+def _epoch(t: np.datetime64) -> int:
+    """Unix seconds; yfinance parses string dates as '%Y-%m-%d' only"""
+    return int(np.datetime64(t, "s").astype("int64"))
+
+
+def chunk_ranges(start: np.datetime64, end: np.datetime64, interval: str) -> list:
+    """Split [start, end) into consecutive ranges no longer than the interval's request span"""
+    step = np.timedelta64(INTERVALS[interval][1] * 86400, "s")
+    ranges = []
+    while start < end:
+        ranges.append((start, min(start + step, end)))
+        start += step
+    return ranges
+
+
+def download_intraday(yahoo_symbol: str, interval: str, start: np.datetime64,
+                      end: Optional[np.datetime64] = None, ticker=None) -> np.ndarray:
+    """
+    Download intraday bars for [start, end) in span-limited chunks.
+
+    Args:
+        yahoo_symbol: Yahoo Finance symbol e.g. BTC-USD
+        interval: Key of INTERVALS e.g. '5m'
+        start: First bar time (clipped to how far back Yahoo serves the interval)
+        end: End of the range, default now
+        ticker: Existing yf.Ticker to download with, instead of a new one
+
+    Returns:
+        INTRADAY_DTYPE array sorted by time
+    """
+    now = _now()
+    end = now if end is None else end
+    start = max(start, now - np.timedelta64(INTERVALS[interval][2] * 86400 - 3600, "s"))
+    ticker = ticker or providers.yahoo().Ticker(yahoo_symbol)
+    bars = np.zeros(0, dtype=INTRADAY_DTYPE)
+    with span("yahoo.intraday", symbol=yahoo_symbol, interval=interval) as s:
+        chunks = chunk_ranges(start, end, interval)
+        for chunk_start, chunk_end in chunks:
+            df = default_scheduler.call(
+                "yahoo",
+                ticker.history,
+                start=_epoch(chunk_start),
+                end=_epoch(chunk_end) if chunk_end < now else None,
+                interval=interval,
+                timeout=scheduler_timeout()
+            )
+            bars = merge_bars(bars, frame_to_intraday(df))
+        s.set(chunks=len(chunks), bars=len(bars))
+    return bars
+
+
+class IntradayStore(BarStore):
+    """
+    On-disk intraday bars, one memory-mapped file per symbol and interval.
+
+    update() downloads only the bars from the last stored one on (it is
+    re-fetched because it may still have been forming) and backfills the
+    head when a longer window is asked for, within what Yahoo serves.
+    """
+
+    dtype = INTRADAY_DTYPE
+
+    def __init__(self, root: str = config.INTRADAY_STORE_DIR,
+                 refresh_seconds: float = config.INTRADAY_REFRESH_SECONDS):
+        super().__init__(root, refresh_seconds)
+
+    @staticmethod
+    def key(yahoo_symbol: str, interval: str) -> str:
+        return f"{yahoo_symbol}_{interval}"
+
+    def update(self, yahoo_symbol: str, interval: str, days: float, max_age: Optional[float] = None):
+        """
+        Make sure the store covers the last `days` days of `interval` bars.
+
+        Args:
+            yahoo_symbol: Yahoo Finance symbol e.g. BTC-USD
+            interval: Key of INTERVALS e.g. '5m'
+            days: Size of the window that must be covered
+            max_age: Re-fetch the tail if older than this (default: refresh interval)
+        """
+        if interval not in INTERVALS:
+            raise ValueError(f"Unsupported intraday interval {interval!r}; use one of {', '.join(INTERVALS)}")
+        key = self.key(yahoo_symbol, interval)
+        with self._lock(key):
+            now = _now()
+            window_start = now - np.timedelta64(int(min(days, INTERVALS[interval][2]) * 86400), "s")
+            bars = np.array(self.read(key))
+            meta = self._read_meta(key)
+            changed = False
+
+            # Top up the tail
+            if len(bars) == 0:
+                bars = download_intraday(yahoo_symbol, interval, window_start)
+                meta["history_start"] = str(window_start)
+                changed = True
+            elif not self.is_fresh(key, max_age):
+                bars = merge_bars(bars, download_intraday(yahoo_symbol, interval, bars["date"][-1]))
+                changed = True
+
+            # Backfill the head if a longer window than ever before is asked for
+            history_start = np.datetime64(meta.get("history_start", str(now)), "s")
+            if len(bars) and window_start < history_start:
+                head = download_intraday(yahoo_symbol, interval, window_start, end=bars["date"][0])
+                bars = merge_bars(bars, head)
+                meta["history_start"] = str(window_start)
+                changed = True
+
+            if changed and len(bars):
+                meta["refreshed_at"] = time.time()
+                self.write(key, bars, **meta)
+
+    def window(self, yahoo_symbol: str, interval: str, days: float, refresh: bool = True) -> np.ndarray:
+        """
+        Return the `interval` bars of the last `days` days as a view into the store.
+
+        Args:
+            yahoo_symbol: Yahoo Finance symbol e.g. BTC-USD
+            interval: Key of INTERVALS e.g. '5m'
+            days: Number of days in the window
+            refresh: Top up from Yahoo first if the stored data is stale
+        """
+        if refresh:
+            self.update(yahoo_symbol, interval, days)
+        bars = self.read(self.key(yahoo_symbol, interval))
+        start = _now() - np.timedelta64(int(days * 86400), "s")
+        return bars[np.searchsorted(bars["date"], start):]
+
+
+default_intraday_store = IntradayStore()
+
+
+class IntradayStream:
+    """
+    Warm StreamingIndicators per symbol and interval.
+
+    get() tops up the intraday store, feeds the stream the stored closed
+    bars it hasn't seen (each in O(1)) and saves its state, so repeated
+    calls in a long-lived process, or after a restart, never replay the
+    history. A stream whose last bar the store can't continue from without
+    a gap starts over from the latest bars.
+    """
+
+    def __init__(self, store: IntradayStore = default_intraday_store):
+        self.store = store
+        self.streams = {}
+        self.stats_counts = {"cold_starts": 0, "bars_fed": 0}
+        self._lock = threading.Lock()
+
+    def _state_path(self, key: str) -> str:
+        return os.path.join(self.store.root, f"{key}.stream.json")
+
+    def _load(self, key: str) -> Optional[StreamingIndicators]:
+        try:
+            with open(self._state_path(key), "r", encoding="utf-8") as f:
+                return StreamingIndicators.loads(f.read())
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save(self, key: str, stream: StreamingIndicators):
+        os.makedirs(self.store.root, exist_ok=True)
+        path = self._state_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(stream.dumps())
+        os.replace(tmp_path, path)
+
+    def get(self, yahoo_symbol: str, interval: str, days: float) -> tuple:
+        """
+        Bring the stream of a symbol and interval up to date.
+
+        Args:
+            yahoo_symbol: Yahoo Finance symbol e.g. BTC-USD
+            interval: Key of INTERVALS e.g. '5m'
+            days: History to make sure is stored (a new stream also needs
+                enough bars for its windows)
+
+        Returns:
+            Tuple of (StreamingIndicators, latest bar, which may still be forming)
+        """
+        key = self.store.key(yahoo_symbol, interval)
+        latest = self.store.window(yahoo_symbol, interval, days)
+        if not len(latest):
+            raise ValueError(f"No {interval} bars found for {yahoo_symbol}")
+        # All stored bars, not just the window: a warm stream continues from its own last bar
+        bar_seconds = INTERVALS[interval][0]
+        bars = self.store.read(key)
+        closed = bars[:np.searchsorted(bars["date"], _now() - np.timedelta64(bar_seconds, "s"), side="right")]
+
+        with self._lock:
+            stream = self.streams.get(key) or self._load(key)
+            new = None if stream is None else self._continuation(stream, closed, bar_seconds)
+            if new is None:
+                stream = StreamingIndicators()
+                self.stats_counts["cold_starts"] += 1
+                warmup = max(stream.window, *stream.sma_windows,
+                             _EMA_WARMUP_SPANS * max(stream.ema_spans, default=1))
+                new = closed[-warmup:]
+            for bar in new:
+                stream.update(bar["date"], bar["high"], bar["low"], bar["close"])
+            self.stats_counts["bars_fed"] += len(new)
+            self.streams[key] = stream
+            if len(new):
+                self._save(key, stream)
+        return stream, latest[-1]
+
+    @staticmethod
+    def _continuation(stream: StreamingIndicators, closed: np.ndarray, bar_seconds: int) -> Optional[np.ndarray]:
+        """
+        Closed bars that continue a warm stream, or None when it has to start over.
+
+        A stream starts over when the store no longer reaches back to its
+        last bar, or when the bars after it skip more than a window's worth
+        of time (e.g. a tail top-up clipped to Yahoo's lookback): its
+        rolling state would otherwise treat the series as contiguous.
+        """
+        if stream.last_time is None or not len(closed) or closed["date"][0] > stream.last_time:
+            return None
+        new = closed[np.searchsorted(closed["date"], stream.last_time, side="right"):]
+        if len(new):
+            steps = np.diff(np.concatenate([[stream.last_time], new["date"]]))
+            if steps.max() > np.timedelta64(bar_seconds * stream.window, "s"):
+                return None
+        return new
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.stats_counts, "streams": len(self.streams)}
+
+
+default_intraday_stream = IntradayStream()
+
+
+def render_intraday(cryptocurrency: str, days: float, interval: Optional[str] = None) -> str:
+    """
+    Intraday section for the price analysis.
+
+    Args:
+        cryptocurrency: Symbol e.g. BTC
+        days: Request timeframe in days
+        interval: Key of INTERVALS e.g. '5m'; picked from INTRADAY_HORIZONS when None
+
+    Returns:
+        Formatted intraday indicators, a short note when unavailable, or ""
+        when the timeframe is too long for intraday bars
+    """
+    from tools.symbols import _get_yahoo_symbol
+
+    interval = interval or interval_for_days(days)
+    if interval is None:
+        return ""
+    try:
+        stream, latest = default_intraday_stream.get(_get_yahoo_symbol(cryptocurrency), interval, days)
+    except Exception as e:
+        return f"Intraday data unavailable for {cryptocurrency}: {e}"
+
+    v = stream.values()
+
+    def fmt(value, spec):
+        return "n/a" if value != value else format(value, spec)
+
+    window = stream.window
+    lines = [
+        f"Intraday {interval} Bars for {cryptocurrency} (last closed bar {v['time']} UTC, {v['bars']} bars streamed):",
+        "",
+        f"- Latest Price:        ${latest['close']:,.4f} (bar {latest['date']} UTC)",
+        f"- Change ({window} bars):    {fmt(v['change'], '+.2f')}%",
+        f"- Range ({window} bars):     ${fmt(v['low'], ',.4f')} - ${fmt(v['high'], ',.4f')}",
+        f"- Mean / Std ({window}):     ${fmt(v['mean'], ',.4f')} / ${fmt(v['std'], ',.4f')}",
+        f"- Bar Volatility:      {fmt(v['volatility'], '.3f')}% per {interval} bar",
+    ]
+    lines += [f"- SMA ({k} bars):{'':<{max(0, 7 - len(str(k)))}}${fmt(v[f'sma_{k}'], ',.4f')}"
+              for k in stream.sma_windows]
+    lines += [f"- EMA ({s} bars):{'':<{max(0, 7 - len(str(s)))}}${fmt(v[f'ema_{s}'], ',.4f')}"
+              for s in stream.ema_spans]
+    return "\n".join(lines) + "\n"
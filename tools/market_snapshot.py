@@ -0,0 +1,140 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+from utils import config
+from tools import providers
+from tools.price_store import default_store, tail_days
+from tools.records import QuoteSnapshot
+from utils.scheduler import default_scheduler
+from utils.tracing import span
+
+# Bars needed to derive the 52-week range
+_YEAR_DAYS = 365
+_supply_locks = {}
+_supply_locks_guard = threading.Lock()
+
+
+@dataclass
+class MarketSnapshot:
+    """Current quote metrics plus the daily bar history they were derived from"""
+    cryptocurrency: str
+    yahoo_symbol: str
+    current_price: float
+    prev_close: float
+    change_24h: float
+    day_high: float
+    day_low: float
+    volume_24h: float
+    fifty_two_week_high: float
+    fifty_two_week_low: float
+    market_cap: Optional[float]
+    bars: np.ndarray
+
+    def window(self, days: int) -> np.ndarray:
+        """Bars of the last `days` days (a view, no copy)"""
+        return tail_days(self.bars, days)
+
+    def quote(self) -> QuoteSnapshot:
+        """The quote metrics without the bar history"""
+        return QuoteSnapshot(
+            cryptocurrency=self.cryptocurrency,
+            yahoo_symbol=self.yahoo_symbol,
+            current_price=self.current_price,
+            prev_close=self.prev_close,
+            change_24h=self.change_24h,
+            day_high=self.day_high,
+            day_low=self.day_low,
+            volume_24h=self.volume_24h,
+            fifty_two_week_high=self.fifty_two_week_high,
+            fifty_two_week_low=self.fifty_two_week_low,
+            market_cap=self.market_cap,
+        )
+
+
+def _circulating_supply(yahoo_symbol: str, ticker) -> Optional[float]:
+    """
+    Circulating supply from ticker.info, cached in the price store metadata.
+
+    Supply moves slowly, so the heavy info endpoint is hit at most once per
+    SNAPSHOT_SUPPLY_TTL_SECONDS per symbol; market cap is supply x price.
+    Concurrent snapshots of one symbol (e.g. a speculative prefetch and the
+    PriceAnalyst) share a single lookup. A failed lookup returns None and is
+    not cached, so the quote is still served (without market cap) and the
+    next snapshot tries again.
+    """
+    with _supply_locks_guard:
+        lock = _supply_locks.setdefault(yahoo_symbol, threading.Lock())
+    with lock:
+        meta = default_store.read_meta(yahoo_symbol)
+        if time.time() - meta.get("supply_fetched_at", 0) < config.SNAPSHOT_SUPPLY_TTL_SECONDS:
+            return meta.get("circulating_supply")
+
+        with span("yahoo.info", symbol=yahoo_symbol) as s:
+            try:
+                info = default_scheduler.call("yahoo", lambda: ticker.info) or {}
+            except Exception as e:
+                s.set(error=type(e).__name__)
+                return None
+        supply = info.get("circulatingSupply")
+        if not supply and info.get("marketCap"):
+            price = info.get("regularMarketPrice") or info.get("currentPrice")
+            supply = info["marketCap"] / price if price else None
+        default_store.write_meta(yahoo_symbol, circulating_supply=supply, supply_fetched_at=time.time())
+        return supply
+
+
+def get_market_snapshot(cryptocurrency: str, yahoo_symbol: str, days: int = 30,
+                        include_market_cap: bool = True) -> MarketSnapshot:
+    """
+    Fetch current metrics and price history with a single Yahoo round-trip.
+
+    The local OHLCV store is topped up through one Ticker (one history
+    request for the missing tail), and price, previous close, day range,
+    volume and 52-week range are all derived from those daily bars; the
+    day values are those of the current UTC day. Only market cap needs
+    ticker.info, and only via the cached supply; it is None when that
+    lookup fails.
+
+    Args:
+        cryptocurrency: Symbol as requested e.g. BTC
+        yahoo_symbol: Yahoo Finance symbol e.g. BTC-USD
+        days: History window that must be available in the snapshot
+        include_market_cap: Look up circulating supply for market cap
+
+    Returns:
+        MarketSnapshot; raises ValueError when no bars are available
+    """
+    history_days = max(days, _YEAR_DAYS)
+    ticker = providers.yahoo().Ticker(yahoo_symbol)
+    default_store.update(yahoo_symbol, history_days, max_age=config.SNAPSHOT_MAX_AGE_SECONDS, ticker=ticker)
+    bars = default_store.window(yahoo_symbol, history_days, refresh=False)
+
+    if len(bars) == 0:
+        raise ValueError(f"No price data found for {cryptocurrency} ({yahoo_symbol})")
+
+    last = bars[-1]
+    current_price = float(last["close"])
+    prev_close = float(bars["close"][-2]) if len(bars) > 1 else current_price
+    year = tail_days(bars, _YEAR_DAYS)
+
+    market_cap = None
+    if include_market_cap:
+        supply = _circulating_supply(yahoo_symbol, ticker)
+        market_cap = supply * current_price if supply else None
+
+    return MarketSnapshot(
+        cryptocurrency=cryptocurrency,
+        yahoo_symbol=yahoo_symbol,
+        current_price=current_price,
+        prev_close=prev_close,
+        change_24h=(current_price - prev_close) / prev_close * 100 if prev_close else 0.0,
+        day_high=float(last["high"]),
+        day_low=float(last["low"]),
+        volume_24h=float(last["volume"]),
+        fifty_two_week_high=float(year["high"].max()),
+        fifty_two_week_low=float(year["low"].min()),
+        market_cap=market_cap,
+        bars=bars,
+    )
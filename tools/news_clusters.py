@@ -0,0 +1,154 @@
+"""
+Cross-coin news clustering for multi-coin runs.
+
+Searches for different coins return many of the same market-wide stories,
+sometimes under the same URL and sometimes syndicated under another.
+cluster_articles() groups articles that share a normalized URL or whose
+MinHash signatures (over word shingles of title and highlights) agree
+closely, using LSH banding so only likely pairs are compared.
+split_shared() then separates clusters seen for several coins, which can
+be summarized once per run, from each coin's own articles.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List
+import numpy as np
+from utils import config
+from tools.news_compress import normalize_url, shingles
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240101)
+_params = {}
+
+
+def _rng_params(num_perm: int) -> tuple:
+    # Fixed per process so signatures from different calls are comparable
+    if num_perm not in _params:
+        _params[num_perm] = (
+            _rng.integers(1, _PRIME, num_perm, dtype=np.uint64),
+            _rng.integers(0, _PRIME, num_perm, dtype=np.uint64),
+        )
+    return _params[num_perm]
+
+
+@dataclass
+class NewsCluster:
+    """Articles telling the same story, and the coins whose searches returned them"""
+    articles: List[dict] = field(default_factory=list)
+    coins: List[str] = field(default_factory=list)
+
+    @property
+    def title(self) -> str:
+        return self.articles[0].get("title", "")
+
+    @property
+    def shared(self) -> bool:
+        return len(self.coins) > 1
+
+
+def minhash_signatures(shingle_sets: List[set], num_perm: int = config.NEWS_MINHASH_PERMUTATIONS) -> np.ndarray:
+    """
+    MinHash signatures, one row per shingle set.
+
+    Uses universal hashes (a*x + b) mod p over the 32-bit shingle hashes;
+    the fraction of equal columns between two rows estimates the Jaccard
+    similarity of their sets.
+    """
+    a, b = _rng_params(num_perm)
+    signatures = np.full((len(shingle_sets), num_perm), _PRIME, dtype=np.uint64)
+    for row, items in enumerate(shingle_sets):
+        if not items:
+            continue
+        x = np.fromiter((h & 0xFFFFFFFF for h in items), dtype=np.uint64, count=len(items))
+        signatures[row] = ((np.outer(x, a) + b) % _PRIME).min(axis=0)
+    return signatures
+
+
+def _find(parent: list, i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def cluster_articles(items: List[tuple], threshold: float = config.NEWS_NEAR_DUPLICATE_THRESHOLD,
+                     num_perm: int = config.NEWS_MINHASH_PERMUTATIONS,
+                     bands: int = config.NEWS_MINHASH_BANDS) -> List[NewsCluster]:
+    """
+    Group (coin, article) pairs into clusters of the same story.
+
+    Args:
+        items: (coin symbol, article dict with title, url, highlights) pairs
+        threshold: Estimated Jaccard similarity at which two articles match
+        num_perm: MinHash signature length
+        bands: LSH bands (num_perm must be divisible by it)
+
+    Returns:
+        Clusters in order of first appearance
+    """
+    parent = list(range(len(items)))
+
+    def union(i, j):
+        root_i, root_j = _find(parent, i), _find(parent, j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    by_url = {}
+    for i, (_, article) in enumerate(items):
+        url = normalize_url(article.get("url", ""))
+        if url:
+            if url in by_url:
+                union(by_url[url], i)
+            else:
+                by_url[url] = i
+
+    signatures = minhash_signatures([
+        shingles(f"{article.get('title', '')} {' '.join(article.get('highlights') or [])}")
+        for _, article in items
+    ], num_perm)
+
+    rows = num_perm // bands
+    checked = set()
+    for band in range(bands):
+        buckets = {}
+        for i, signature in enumerate(signatures):
+            buckets.setdefault(signature[band * rows:(band + 1) * rows].tobytes(), []).append(i)
+        for members in buckets.values():
+            for n, i in enumerate(members):
+                for j in members[n + 1:]:
+                    if (i, j) in checked:
+                        continue
+                    checked.add((i, j))
+                    if np.mean(signatures[i] == signatures[j]) >= threshold:
+                        union(i, j)
+
+    clusters = {}
+    for i, (coin, article) in enumerate(items):
+        cluster = clusters.setdefault(_find(parent, i), NewsCluster())
+        if normalize_url(article.get("url", "")) not in {normalize_url(a.get("url", "")) for a in cluster.articles}:
+            cluster.articles.append(article)
+        if coin not in cluster.coins:
+            cluster.coins.append(coin)
+    return list(clusters.values())
+
+
+def split_shared(news_by_coin: Dict[str, List[dict]],
+                 min_coins: int = config.NEWS_SHARED_MIN_COINS) -> tuple:
+    """
+    Split a run's news into market-wide clusters and per-coin articles.
+
+    Args:
+        news_by_coin: Coin symbol -> articles from its search
+        min_coins: Coins a cluster must appear for to count as market-wide
+
+    Returns:
+        Tuple of (shared clusters, dict of coin -> articles only that coin's
+        search returned)
+    """
+    items = [(coin, article) for coin, articles in news_by_coin.items() for article in articles]
+    shared, specific = [], {coin: [] for coin in news_by_coin}
+    for cluster in cluster_articles(items):
+        if len(cluster.coins) >= min_coins:
+            shared.append(cluster)
+        else:
+            specific[cluster.coins[0]].extend(cluster.articles)
+    return shared, specific
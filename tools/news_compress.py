@@ -0,0 +1,208 @@
+"""
+Deduplication and extractive compression of news before it reaches the LLM.
+
+Syndicated crypto news repeats itself: the same wire story shows up under
+several URLs, and highlights from different outlets share whole
+sentences. compress_news() drops near-identical articles (word-shingle
+Jaccard similarity), removes sentences already seen in an earlier article,
+and then keeps the highest-scoring sentences until the text fits a token
+budget. Every article keeps at least its best sentence, and sentences
+stay in their original order.
+
+Token counts use tiktoken when its encoding is available locally and fall
+back to a characters / 4 estimate otherwise.
+"""
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List, Optional
+from utils import config
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+(?=[\"'A-Z0-9$])")
+_WORD = re.compile(r"[a-z0-9$%.]+")
+_STOPWORDS = frozenset("""
+a an and are as at be been but by for from has have in into is it its of on or that the
+their this to was were will with after over amid than more most new says said also
+""".split())
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Prompt tokens for text (tiktoken, or a characters / 4 estimate)"""
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_SPLIT.split(text) if s.strip()]
+
+
+def _words(text: str) -> List[str]:
+    return [w.strip(".") for w in _WORD.findall(text.lower()) if w.strip(".")]
+
+
+def _sentence_key(sentence: str) -> str:
+    """Normalized form used to spot the same sentence in different articles"""
+    return " ".join(_words(sentence))
+
+
+def shingles(text: str, k: int = 5) -> set:
+    """Set of k-word shingles (hashed) of text"""
+    words = _words(text)
+    if len(words) < k:
+        return {hash(" ".join(words))} if words else set()
+    return {hash(" ".join(words[i:i + k])) for i in range(len(words) - k + 1)}
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def normalize_url(url: str) -> str:
+    """URL without scheme, www., query string, fragment or trailing slash"""
+    url = re.sub(r"^https?://(www\.)?", "", (url or "").strip().lower())
+    return re.split(r"[?#]", url, 1)[0].rstrip("/")
+
+
+@dataclass
+class CompressedNews:
+    """Articles after dedup and compression, with what it saved"""
+    articles: List[dict]
+    tokens_before: int
+    tokens_after: int
+    duplicate_articles: int = 0
+    duplicate_sentences: int = 0
+    dropped_sentences: int = 0
+    removed: List[str] = field(default_factory=list)
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.tokens_before - self.tokens_after)
+
+
+def _article_text(article: dict) -> str:
+    return " ".join(article.get("highlights") or [])
+
+
+def dedupe_articles(articles: List[dict],
+                    threshold: float = config.NEWS_NEAR_DUPLICATE_THRESHOLD) -> tuple:
+    """
+    Drop articles whose URL or content repeats an earlier one.
+
+    Returns:
+        Tuple of (kept articles, URLs of removed duplicates)
+    """
+    kept, kept_shingles, seen_urls, removed = [], [], set(), []
+    for article in articles:
+        url = normalize_url(article.get("url", ""))
+        signature = shingles(f"{article.get('title', '')} {_article_text(article)}")
+        if (url and url in seen_urls) or any(jaccard(signature, s) >= threshold for s in kept_shingles):
+            removed.append(article.get("url", ""))
+            continue
+        seen_urls.add(url)
+        kept.append(article)
+        kept_shingles.append(signature)
+    return kept, removed
+
+
+def _score_sentences(sentences: List[str], focus_terms: set) -> List[float]:
+    """
+    Score sentences by how central their content words are to the whole set.
+
+    A sentence scores the average corpus frequency of its content words,
+    with a bonus for mentioning the coin and for numbers (prices, % moves),
+    which are what the analyst needs most.
+    """
+    tokenized = [[w for w in _words(s) if w not in _STOPWORDS] for s in sentences]
+    frequency = Counter(w for words in tokenized for w in set(words))
+    scores = []
+    for words in tokenized:
+        if not words:
+            scores.append(0.0)
+            continue
+        score = sum(frequency[w] for w in words) / len(words)
+        if focus_terms & set(words):
+            score *= 1.5
+        if any(ch.isdigit() for w in words for ch in w):
+            score *= 1.2
+        scores.append(score)
+    return scores
+
+
+def compress_news(articles: List[dict], token_budget: int = config.NEWS_TOKEN_BUDGET,
+                  focus_terms: Optional[set] = None) -> CompressedNews:
+    """
+    Deduplicate articles and sentences, then compress highlights to a token budget.
+
+    Args:
+        articles: Dicts with title, url and highlights (list of strings)
+        token_budget: Maximum tokens for all highlights together
+        focus_terms: Lower-case words (e.g. coin symbol and name) that make
+            a sentence more important
+
+    Returns:
+        CompressedNews whose articles carry the kept 'sentences'
+    """
+    tokens_before = sum(count_tokens(_article_text(a)) for a in articles)
+    articles, removed = dedupe_articles(articles)
+
+    # Split into sentences, dropping any sentence an earlier article already had
+    seen, duplicate_sentences = set(), 0
+    candidates = []  # (article index, position, sentence)
+    for index, article in enumerate(articles):
+        position = 0
+        for highlight in article.get("highlights") or []:
+            for sentence in split_sentences(highlight):
+                key = _sentence_key(sentence)
+                if not key or key in seen:
+                    duplicate_sentences += 1
+                    continue
+                seen.add(key)
+                candidates.append((index, position, sentence))
+                position += 1
+
+    scores = _score_sentences([c[2] for c in candidates], focus_terms or set())
+    costs = [count_tokens(c[2]) + 1 for c in candidates]
+
+    # Each article's best sentence first (so no story disappears), then the
+    # rest by score, while they fit the budget
+    best = {}
+    for i, (index, _, _) in enumerate(candidates):
+        if index not in best or scores[i] > scores[best[index]]:
+            best[index] = i
+    order = sorted(best.values(), key=lambda i: -scores[i]) + sorted(
+        (i for i in range(len(candidates)) if i not in best.values()), key=lambda i: -scores[i]
+    )
+    chosen, used = set(), 0
+    for i in order:
+        if used + costs[i] <= token_budget:
+            chosen.add(i)
+            used += costs[i]
+
+    compressed = []
+    for index, article in enumerate(articles):
+        sentences = [c[2] for i, c in enumerate(candidates) if c[0] == index and i in chosen]
+        compressed.append({**article, "sentences": sentences})
+
+    return CompressedNews(
+        articles=compressed,
+        tokens_before=tokens_before,
+        tokens_after=used,
+        duplicate_articles=len(removed),
+        duplicate_sentences=duplicate_sentences,
+        dropped_sentences=len(candidates) - len(chosen),
+        removed=removed,
+    )
@@ -0,0 +1,182 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional
+from utils import config
+from utils.tracing import span
+
+
+class NewsStore:
+    """
+    SQLite store of news articles per symbol with incremental Exa refresh.
+
+    Articles are keyed by (symbol, URL) and remember when they were fetched.
+    Reads within NEWS_STORE_FRESH_SECONDS of the last refresh are served
+    locally; after that a refresh asks the provider only for articles
+    published since the newest one stored and merges them in. Articles
+    older than NEWS_STORE_MAX_AGE_DAYS are evicted, and each symbol keeps
+    at most NEWS_STORE_MAX_PER_SYMBOL of its newest articles.
+    """
+
+    def __init__(
+        self,
+        path: str = config.NEWS_STORE_PATH,
+        fresh_seconds: float = config.NEWS_STORE_FRESH_SECONDS,
+        max_per_symbol: int = config.NEWS_STORE_MAX_PER_SYMBOL,
+        max_age_days: float = config.NEWS_STORE_MAX_AGE_DAYS
+    ):
+        self.path = path
+        self.fresh_seconds = fresh_seconds
+        self.max_per_symbol = max_per_symbol
+        self.max_age_days = max_age_days
+        self.stats_counts = {"fresh_hits": 0, "refreshes": 0, "full_fetches": 0,
+                             "articles_fetched": 0, "evictions": 0}
+        self._conn = None
+        self._conn_path = None
+        self._lock = threading.Lock()
+        self._locks = {}
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open (or reopen, if path changed) the database; call with self._lock held"""
+        if self._conn is None or self._conn_path != self.path:
+            if self._conn is not None:
+                self._conn.close()
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS articles (
+                    symbol TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    highlights TEXT NOT NULL,
+                    published_date TEXT,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (symbol, url)
+                );
+                CREATE INDEX IF NOT EXISTS idx_articles_published ON articles(symbol, published_date);
+                CREATE TABLE IF NOT EXISTS refreshes (
+                    symbol TEXT PRIMARY KEY,
+                    refreshed_at REAL NOT NULL
+                );
+            """)
+            self._conn.commit()
+            self._conn_path = self.path
+        return self._conn
+
+    def _symbol_lock(self, symbol: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats_counts[key] += amount
+
+    def refreshed_at(self, symbol: str) -> float:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT refreshed_at FROM refreshes WHERE symbol = ?", (symbol,)
+            ).fetchone()
+        return row[0] if row else 0.0
+
+    def latest(self, symbol: str, limit: int) -> List[dict]:
+        """Newest stored articles for symbol, most recent first"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT title, url, highlights, published_date FROM articles WHERE symbol = ? "
+                "ORDER BY published_date IS NULL, published_date DESC, fetched_at DESC LIMIT ?",
+                (symbol, limit)
+            ).fetchall()
+        return [
+            {"title": title, "url": url, "highlights": json.loads(highlights), "published_date": published}
+            for title, url, highlights, published in rows
+        ]
+
+    def newest_published(self, symbol: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT MAX(published_date) FROM articles WHERE symbol = ?", (symbol,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def add(self, symbol: str, articles: List[dict]):
+        """Insert or update articles, mark the symbol refreshed and evict old ones"""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO articles "
+                "(symbol, url, title, highlights, published_date, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (symbol, a["url"], a.get("title") or "", json.dumps(a.get("highlights") or []),
+                     a.get("published_date"), now)
+                    for a in articles
+                ]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO refreshes (symbol, refreshed_at) VALUES (?, ?)", (symbol, now)
+            )
+            self._evict(conn, symbol, now)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection, symbol: str, now: float):
+        """Drop articles past the age limit, then the oldest beyond the per-symbol cap"""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=self.max_age_days)).isoformat()
+        cursor = conn.execute(
+            "DELETE FROM articles WHERE (published_date IS NOT NULL AND published_date < ?) "
+            "OR (published_date IS NULL AND fetched_at < ?)",
+            (cutoff, now - self.max_age_days * 86400)
+        )
+        evicted = cursor.rowcount
+        cursor = conn.execute(
+            "DELETE FROM articles WHERE symbol = ? AND url NOT IN ("
+            "SELECT url FROM articles WHERE symbol = ? "
+            "ORDER BY published_date IS NULL, published_date DESC, fetched_at DESC LIMIT ?)",
+            (symbol, symbol, self.max_per_symbol)
+        )
+        self.stats_counts["evictions"] += evicted + cursor.rowcount
+
+    def get(self, symbol: str, num_results: int, fetch: Callable) -> List[dict]:
+        """
+        Newest articles for symbol, refreshing from the provider when stale.
+
+        Args:
+            symbol: Cryptocurrency symbol the articles are stored under
+            num_results: Number of articles to return
+            fetch: fetch(num_results, start_published_date) returning article
+                dicts (title, url, highlights, published_date); called with
+                start_published_date=None for a full search
+
+        Returns:
+            Up to num_results articles, most recent first
+        """
+        symbol = symbol.upper()
+        with self._symbol_lock(symbol), span("news_store", symbol=symbol) as s:
+            stored = self.latest(symbol, num_results)
+            # Fresh whatever the count: a coin with few recent articles still
+            # has few after another search
+            if time.time() - self.refreshed_at(symbol) < self.fresh_seconds:
+                self._count("fresh_hits")
+                s.set(source="fresh")
+                return stored
+
+            since = self.newest_published(symbol) if len(stored) >= num_results else None
+            articles = fetch(num_results, since)
+            self._count("refreshes" if since else "full_fetches")
+            self._count("articles_fetched", len(articles))
+            s.set(source="incremental" if since else "full", fetched=len(articles))
+            self.add(symbol, articles)
+            return self.latest(symbol, num_results)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.stats_counts)
+            counts["articles"] = self._connection().execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+        return counts
+
+
+default_news_store = NewsStore()
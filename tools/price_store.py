@@ -0,0 +1,340 @@
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+import numpy as np
+from utils import config
+from tools import providers
+from utils.scheduler import default_scheduler, timeout as scheduler_timeout
+from utils.tracing import span
+
+# One row per daily bar. Stored as a .npy file per symbol so reads can be
+# memory-mapped and sliced without copying.
+BAR_DTYPE = np.dtype([
+    ("date", "datetime64[D]"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+])
+
+EMPTY_BARS = np.zeros(0, dtype=BAR_DTYPE)
+
+
+def _today() -> np.datetime64:
+    """Current UTC date - Yahoo stamps crypto daily bars at UTC midnight"""
+    return np.datetime64(datetime.now(timezone.utc).date(), "D")
+
+
+def tail_days(bars: np.ndarray, days: int) -> np.ndarray:
+    """Slice the bars of the last `days` days from a sorted bar array (a view)"""
+    start = _today() - np.timedelta64(days, "D")
+    return bars[np.searchsorted(bars["date"], start):]
+
+
+def frame_to_bars(df) -> np.ndarray:
+    """Convert a yfinance history DataFrame into a BAR_DTYPE array"""
+    if df is None or df.empty:
+        return EMPTY_BARS
+    df = df.dropna(subset=["Close"])
+    bars = np.empty(len(df), dtype=BAR_DTYPE)
+    bars["date"] = np.array(df.index.strftime("%Y-%m-%d"), dtype="datetime64[D]")
+    bars["open"] = df["Open"].to_numpy(dtype="f8")
+    bars["high"] = df["High"].to_numpy(dtype="f8")
+    bars["low"] = df["Low"].to_numpy(dtype="f8")
+    bars["close"] = df["Close"].to_numpy(dtype="f8")
+    bars["volume"] = df["Volume"].to_numpy(dtype="f8")
+    return bars
+
+
+def merge_bars(existing: np.ndarray, new: np.ndarray) -> np.ndarray:
+    """Merge two sorted bar arrays, letting new bars replace same-dated ones"""
+    if len(existing) == 0:
+        return np.ascontiguousarray(new)
+    if len(new) == 0:
+        return np.ascontiguousarray(existing)
+    keep = ~np.isin(existing["date"], new["date"])
+    merged = np.concatenate([existing[keep], new])
+    return merged[np.argsort(merged["date"], kind="stable")]
+
+
+def _download_bars(yahoo_symbol: str, start: np.datetime64,
+                   end: Optional[np.datetime64] = None, ticker=None) -> np.ndarray:
+    """Download daily bars for [start, end) from Yahoo Finance"""
+    ticker = ticker or providers.yahoo().Ticker(yahoo_symbol)
+    with span("yahoo.history", symbol=yahoo_symbol) as s:
+        df = default_scheduler.call(
+            "yahoo",
+            ticker.history,
+            start=str(start),
+            end=str(end) if end is not None else None,
+            interval="1d",
+            timeout=scheduler_timeout()
+        )
+        bars = frame_to_bars(df)
+        s.set(bars=len(bars))
+    return bars
+
+
+def _download_errors(yahoo_symbols: list) -> set:
+    """
+    Symbols the last yf.download recorded an error for.
+
+    yf.download catches per-ticker failures, 429s included, into
+    yfinance.shared._ERRORS and returns an empty column instead of raising,
+    so the scheduler never sees them.
+    """
+    yf = sys.modules.get("yfinance")
+    errors = getattr(getattr(yf, "shared", None), "_ERRORS", None) or {}
+    return {s for s in yahoo_symbols if s.upper() in errors}
+
+
+def _download_bulk(yahoo_symbols: list, start: np.datetime64) -> dict:
+    """
+    Download daily bars for many symbols in a single yfinance request.
+
+    Symbols the bulk request failed for (an error recorded by yfinance, or
+    no bars at all) are re-fetched one by one with history(), which raises
+    on throttling and so is retried by the scheduler. A symbol that still
+    fails is left out of the result.
+    """
+    with span("yahoo.download", symbols=len(yahoo_symbols)) as s:
+        df = default_scheduler.call(
+            "yahoo",
+            providers.yahoo().download,
+            yahoo_symbols,
+            start=str(start),
+            interval="1d",
+            group_by="ticker",
+            auto_adjust=True,
+            progress=False,
+            threads=True,
+            timeout=scheduler_timeout()
+        )
+        failed = _download_errors(yahoo_symbols)
+
+        result = {}
+        for yahoo_symbol in yahoo_symbols:
+            if df is None or df.empty or yahoo_symbol in failed:
+                continue
+            if df.columns.nlevels > 1:
+                if yahoo_symbol not in df.columns.get_level_values(0):
+                    continue
+                bars = frame_to_bars(df[yahoo_symbol])
+            else:
+                bars = frame_to_bars(df)
+            if len(bars):
+                result[yahoo_symbol] = bars
+
+        retry = [y for y in yahoo_symbols if y not in result]
+        errors = 0
+        for yahoo_symbol in retry:
+            try:
+                result[yahoo_symbol] = _download_bars(yahoo_symbol, start)
+            except Exception:
+                errors += 1
+        s.set(fallbacks=len(retry), failed=errors)
+    return result
+
+
+class BarStore:
+    """
+    Bar arrays on disk, one memory-mapped .npy file plus JSON metadata per key.
+
+    Holds the file handling shared by the daily PriceStore and the
+    intraday store (tools.intraday); subclasses decide what to download.
+    """
+
+    dtype = BAR_DTYPE
+
+    def __init__(self, root: str, refresh_seconds: float):
+        self.root = root
+        self.refresh_seconds = refresh_seconds
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, yahoo_symbol: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(yahoo_symbol, threading.Lock())
+
+    def _bars_path(self, yahoo_symbol: str) -> str:
+        return os.path.join(self.root, f"{yahoo_symbol}.npy")
+
+    def _meta_path(self, yahoo_symbol: str) -> str:
+        return os.path.join(self.root, f"{yahoo_symbol}.json")
+
+    def _read_meta(self, yahoo_symbol: str) -> dict:
+        try:
+            with open(self._meta_path(yahoo_symbol), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def read(self, yahoo_symbol: str) -> np.ndarray:
+        """Memory-map all stored bars for a symbol (read-only, no copy)"""
+        try:
+            return np.load(self._bars_path(yahoo_symbol), mmap_mode="r")
+        except (OSError, ValueError):
+            return np.zeros(0, dtype=self.dtype)
+
+    def write(self, yahoo_symbol: str, bars: np.ndarray, **meta):
+        """Atomically replace the stored bars and metadata for a symbol"""
+        os.makedirs(self.root, exist_ok=True)
+        path = self._bars_path(yahoo_symbol)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(bars, dtype=self.dtype))
+        os.replace(tmp_path, path)
+        self._write_meta(yahoo_symbol, **meta)
+
+    def _write_meta(self, yahoo_symbol: str, **meta):
+        os.makedirs(self.root, exist_ok=True)
+        stored = self._read_meta(yahoo_symbol)
+        stored.update(meta)
+        meta_path = self._meta_path(yahoo_symbol)
+        tmp_meta = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump(stored, f)
+        os.replace(tmp_meta, meta_path)
+
+    def last_date(self, yahoo_symbol: str) -> Optional[np.datetime64]:
+        """Date of the newest stored bar, or None if nothing is stored"""
+        bars = self.read(yahoo_symbol)
+        return bars["date"][-1] if len(bars) else None
+
+    def read_meta(self, yahoo_symbol: str) -> dict:
+        """Metadata stored alongside a symbol's bars"""
+        return self._read_meta(yahoo_symbol)
+
+    def write_meta(self, yahoo_symbol: str, **meta):
+        """Merge extra fields into a symbol's metadata"""
+        with self._lock(yahoo_symbol):
+            self._write_meta(yahoo_symbol, **meta)
+
+    def is_fresh(self, yahoo_symbol: str, max_age: Optional[float] = None) -> bool:
+        """True if the symbol was topped up within max_age (default: the refresh interval)"""
+        max_age = self.refresh_seconds if max_age is None else max_age
+        refreshed_at = self._read_meta(yahoo_symbol).get("refreshed_at", 0)
+        return time.time() - refreshed_at < max_age
+
+
+class PriceStore(BarStore):
+    """
+    On-disk store of daily OHLCV bars, one memory-mapped file per symbol.
+
+    Each update only downloads the bars after the last stored one (the last
+    bar is re-fetched because today's bar is still forming). Requests for a
+    longer window than what is stored backfill the missing head, so history
+    grows over time past any single download.
+    """
+
+    def __init__(self, root: str = config.PRICE_STORE_DIR,
+                 refresh_seconds: float = config.PRICE_STORE_REFRESH_SECONDS):
+        super().__init__(root, refresh_seconds)
+
+    def update(self, yahoo_symbol: str, days: int, max_age: Optional[float] = None, ticker=None):
+        """
+        Make sure the store covers the last `days` days for a symbol.
+
+        Args:
+            yahoo_symbol: Yahoo Finance symbol e.g. BTC-USD
+            days: Size of the window that must be covered
+            max_age: Re-fetch the tail if older than this (default: refresh interval)
+            ticker: Existing yf.Ticker to download with, instead of a new one
+        """
+        with self._lock(yahoo_symbol):
+            today = _today()
+            window_start = today - np.timedelta64(days, "D")
+            bars = np.array(self.read(yahoo_symbol))
+            meta = self._read_meta(yahoo_symbol)
+            changed = False
+
+            # Top up the tail
+            if len(bars) == 0:
+                bootstrap = max(days, config.PRICE_STORE_BOOTSTRAP_DAYS)
+                bars = _download_bars(yahoo_symbol, today - np.timedelta64(bootstrap, "D"), ticker=ticker)
+                meta["history_start"] = str(today - np.timedelta64(bootstrap, "D"))
+                changed = True
+            elif not self.is_fresh(yahoo_symbol, max_age):
+                bars = merge_bars(bars, _download_bars(yahoo_symbol, bars["date"][-1], ticker=ticker))
+                changed = True
+
+            # Backfill the head if a longer window than ever before is asked for
+            history_start = np.datetime64(meta.get("history_start", str(today)), "D")
+            if len(bars) and window_start < history_start:
+                head = _download_bars(yahoo_symbol, window_start, end=bars["date"][0], ticker=ticker)
+                bars = merge_bars(bars, head)
+                meta["history_start"] = str(window_start)
+                changed = True
+
+            if changed and len(bars):
+                meta["refreshed_at"] = time.time()
+                self.write(yahoo_symbol, bars, **meta)
+
+    def bulk_update(self, yahoo_symbols: list, days: int):
+        """
+        Top up many symbols with one bulk Yahoo download.
+
+        The request starts at the earliest bar any stale symbol is missing;
+        bars a symbol already has are simply overwritten by the merge.
+        Symbols that need a head backfill fall back to update(). A symbol
+        whose download fails is not marked refreshed, so the next call
+        retries it.
+
+        Args:
+            yahoo_symbols: Yahoo Finance symbols e.g. ['BTC-USD', 'ETH-USD']
+            days: Size of the window that must be covered for each symbol
+        """
+        today = _today()
+        window_start = today - np.timedelta64(days, "D")
+        bootstrap_start = today - np.timedelta64(max(days, config.PRICE_STORE_BOOTSTRAP_DAYS), "D")
+
+        starts = {}
+        for yahoo_symbol in dict.fromkeys(yahoo_symbols):
+            last = self.last_date(yahoo_symbol)
+            if last is None:
+                starts[yahoo_symbol] = bootstrap_start
+            elif not self.is_fresh(yahoo_symbol):
+                starts[yahoo_symbol] = last
+
+        if starts:
+            downloaded = _download_bulk(list(starts), min(starts.values()))
+            for yahoo_symbol, new_bars in downloaded.items():
+                if not len(new_bars):
+                    continue
+                with self._lock(yahoo_symbol):
+                    meta = self._read_meta(yahoo_symbol)
+                    existing = self.read(yahoo_symbol)
+                    if not len(existing):
+                        meta["history_start"] = str(bootstrap_start)
+                    meta["refreshed_at"] = time.time()
+                    self.write(yahoo_symbol, merge_bars(np.array(existing), new_bars), **meta)
+
+        # Head backfills are per-symbol and rare; let update() handle them
+        for yahoo_symbol in dict.fromkeys(yahoo_symbols):
+            history_start = self._read_meta(yahoo_symbol).get("history_start")
+            if history_start and window_start < np.datetime64(history_start, "D"):
+                self.update(yahoo_symbol, days)
+
+    def window(self, yahoo_symbol: str, days: int, refresh: bool = True) -> np.ndarray:
+        """
+        Return the bars of the last `days` days as a view into the store.
+
+        Args:
+            yahoo_symbol: Yahoo Finance symbol e.g. BTC-USD
+            days: Number of days in the window
+            refresh: Top up from Yahoo first if the stored data is stale
+
+        Returns:
+            Read-only BAR_DTYPE array sliced from the memory-mapped file
+        """
+        if refresh:
+            self.update(yahoo_symbol, days)
+        return tail_days(self.read(yahoo_symbol), days)
+
+
+default_store = PriceStore()
@@ -0,0 +1,141 @@
+"""
+Pooled Exa and Yahoo Finance clients.
+
+Imported lazily by tools/providers.py: exa_py, yfinance and curl_cffi
+account for most of the CLI's import time, and runs served from the local
+price and news stores never need them.
+"""
+import json
+import threading
+import requests
+import yfinance as yf
+from curl_cffi import CurlInfo, CurlOpt
+from curl_cffi import requests as curl_requests
+from exa_py import Exa
+from exa_py.api import ExaJSONEncoder
+from requests.adapters import HTTPAdapter
+from utils import config, scheduler
+
+
+class _PoolStats:
+    """Thread-safe request / connection counters for one provider"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"requests": 0, "new_connections": 0, "errors": 0}
+
+    def add(self, **amounts):
+        with self._lock:
+            for key, amount in amounts.items():
+                self.counts[key] += amount
+
+    def to_dict(self, pool_size: int, new_connections: int = None) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        if new_connections is not None:
+            counts["new_connections"] = new_connections
+        counts["reused_connections"] = max(0, counts["requests"] - counts["new_connections"] - counts["errors"])
+        counts["pool_size"] = pool_size
+        return counts
+
+
+class _YahooSession(curl_requests.Session):
+    """curl_cffi session that counts requests and freshly opened connections"""
+
+    def __init__(self, pool_size: int, stats: _PoolStats):
+        super().__init__(
+            impersonate="chrome",
+            timeout=config.PROVIDER_TIMEOUT_SECONDS,
+            curl_options={CurlOpt.MAXCONNECTS: pool_size},
+            curl_infos=[CurlInfo.NUM_CONNECTS],
+        )
+        self.pool_size = pool_size
+        self.stats = stats
+
+    def request(self, *args, **kwargs):
+        try:
+            response = super().request(*args, **kwargs)
+        except Exception:
+            self.stats.add(requests=1, errors=1)
+            raise
+        connects = (getattr(response, "infos", None) or {}).get(CurlInfo.NUM_CONNECTS, 1)
+        self.stats.add(requests=1, new_connections=int(connects or 0))
+        return response
+
+
+class PooledYahoo:
+    """yfinance facade whose Ticker and download calls share one session"""
+
+    def __init__(self, pool_size: int = config.PROVIDER_POOL_SIZE):
+        self.stats = _PoolStats()
+        self.session = _YahooSession(pool_size, self.stats)
+
+    def Ticker(self, symbol: str, **kwargs):
+        return yf.Ticker(symbol, session=self.session)
+
+    def download(self, *args, **kwargs):
+        return yf.download(*args, session=self.session, **kwargs)
+
+    def pool_stats(self) -> dict:
+        return self.stats.to_dict(self.session.pool_size)
+
+    def close(self):
+        self.session.close()
+
+
+class PooledExa(Exa):
+    """
+    Exa client on a keep-alive connection pool.
+
+    exa_py sends requests through the module-level requests functions, which
+    open a new connection each time; plain GET/POST calls are routed through
+    a shared requests.Session instead. Streaming and other methods use the
+    stock implementation.
+    """
+
+    def __init__(self, api_key: str, pool_size: int = config.PROVIDER_POOL_SIZE):
+        super().__init__(api_key)
+        self.pool_size = pool_size
+        self.stats = _PoolStats()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._adapter = adapter
+
+    def request(self, endpoint: str, data=None, method: str = "POST", params=None, headers=None):
+        streaming = (isinstance(data, dict) and data.get("stream")) or (
+            params and params.get("stream") == "true"
+        )
+        if streaming or method.upper() not in ("GET", "POST"):
+            return super().request(endpoint, data, method, params, headers)
+
+        if data is not None and not isinstance(data, str):
+            data = json.dumps(data, cls=ExaJSONEncoder)
+        try:
+            response = self.session.request(
+                method.upper(),
+                self.base_url + endpoint,
+                data=data or None,
+                params=params,
+                headers={**self.headers, **(headers or {})},
+                timeout=scheduler.timeout(),
+            )
+        except Exception:
+            self.stats.add(requests=1, errors=1)
+            raise
+        self.stats.add(requests=1)
+        if response.status_code >= 400:
+            raise ValueError(
+                f"Request failed with status code {response.status_code}: {response.text}"
+            )
+        return response.json()
+
+    def pool_stats(self) -> dict:
+        manager = self._adapter.poolmanager
+        pools = [manager.pools[key] for key in manager.pools.keys()] if manager else []
+        # urllib3 counts the connections each host pool has opened
+        return self.stats.to_dict(self.pool_size, sum(pool.num_connections for pool in pools))
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,105 @@
+"""
+Provider access points for Exa and Yahoo Finance.
+
+Tools never construct provider clients directly; they go through
+exa_client() and yahoo() so that local stand-ins (see utils/fakes.py) can
+be installed for offline runs and benchmarks.
+
+Clients are created once per process and reused. The Exa client sends
+its requests through a pooled requests.Session and Yahoo calls share one
+curl_cffi session, so repeated fetches in batch and server runs reuse
+keep-alive connections instead of paying for TLS setup every time.
+pool_stats() reports how many requests went out and how many needed a
+new connection.
+
+The clients live in tools/provider_clients.py, which imports exa_py,
+yfinance and curl_cffi; it is loaded on the first real client request, so
+runs served from the local stores (or from fakes) never pay for those
+imports.
+"""
+import threading
+
+_overrides = {}
+_clients = {}
+_lock = threading.Lock()
+
+
+def install(exa=None, yahoo=None):
+    """
+    Replace the real providers.
+
+    Args:
+        exa: Callable taking an API key and returning an Exa-like client
+        yahoo: Object exposing Ticker(symbol) and download(...) like yfinance
+    """
+    if exa is not None:
+        _overrides["exa"] = exa
+    if yahoo is not None:
+        _overrides["yahoo"] = yahoo
+    _close_clients()
+
+
+def reset():
+    """Go back to the real providers"""
+    _overrides.clear()
+    _close_clients()
+
+
+def _close_clients():
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        close = getattr(client, "close", None)
+        if close is not None:
+            close()
+
+
+def exa_client(api_key: str):
+    """Exa search client, created once per API key and reused"""
+    key = ("exa", api_key)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                if "exa" in _overrides:
+                    client = _overrides["exa"](api_key)
+                else:
+                    from tools.provider_clients import PooledExa
+                    client = PooledExa(api_key)
+                _clients[key] = client
+    return client
+
+
+def yahoo():
+    """yfinance facade on the shared session, or the installed stand-in"""
+    if "yahoo" in _overrides:
+        return _overrides["yahoo"]
+    client = _clients.get("yahoo")
+    if client is None:
+        with _lock:
+            client = _clients.get("yahoo")
+            if client is None:
+                from tools.provider_clients import PooledYahoo
+                client = PooledYahoo()
+                _clients["yahoo"] = client
+    return client
+
+
+def pool_stats() -> dict:
+    """
+    Request and connection counters for the pooled clients created so far.
+
+    Returns:
+        Dict keyed by provider ('exa', 'yahoo') with requests,
+        new_connections, reused_connections, errors and pool_size
+    """
+    stats = {}
+    with _lock:
+        clients = dict(_clients)
+    for key, client in clients.items():
+        if hasattr(client, "pool_stats"):
+            name = key[0] if isinstance(key, tuple) else key
+            stats[name] = client.pool_stats()
+    return stats
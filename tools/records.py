@@ -0,0 +1,296 @@
+"""
+Typed results passed between the data tools and the agents.
+
+The fetch functions in tools/data_fetch.py return these records instead of
+preformatted text, and failures come back as an ErrorResult rather than a
+string the caller has to search for "Error". Rendering to prompt text is
+the last step (render()), done by the @tool wrappers and the analysts.
+
+Records serialize to compact positional MessagePack (field values in
+declaration order, no key names) with dumps()/loads(), so they can be
+cached or sent to another process and rebuilt without re-parsing any
+text. Every payload carries the format version and a fingerprint of the
+record's field layout; loads() rejects a payload written with a different
+layout instead of silently assigning values to the wrong fields.
+"""
+import zlib
+from dataclasses import dataclass, fields, is_dataclass
+from typing import ClassVar, Optional, Tuple, Union
+import ormsgpack
+
+# Bump when the envelope written by dumps() changes
+FORMAT_VERSION = 1
+
+
+def _fmt_optional(value: float, fmt: str) -> str:
+    """Format a possibly-NaN indicator value"""
+    return "n/a" if value != value else format(value, fmt)
+
+
+class _Record:
+    """Positional row conversion shared by the records"""
+    __slots__ = ()
+
+    # Field name -> (record class, whether the field is a tuple of them)
+    _nested: ClassVar[dict] = {}
+
+    def to_row(self) -> list:
+        return [_encode(getattr(self, f.name)) for f in fields(self)]
+
+    @classmethod
+    def from_row(cls, row: list):
+        values = []
+        for f, value in zip(fields(cls), row):
+            nested, many = cls._nested.get(f.name, (None, False))
+            if nested and value is not None:
+                value = tuple(nested.from_row(v) for v in value) if many else nested.from_row(value)
+            elif isinstance(value, list):
+                value = tuple(value)
+            values.append(value)
+        return cls(*values)
+
+
+def _encode(value):
+    if is_dataclass(value):
+        return value.to_row()
+    if isinstance(value, tuple):
+        return [_encode(v) for v in value]
+    return value
+
+
+@dataclass(frozen=True, slots=True)
+class ErrorResult(_Record):
+    """A fetch that produced no data"""
+    source: str                 # What was being fetched e.g. "news", "current price"
+    cryptocurrency: str
+    message: str
+    empty: bool = False         # The provider answered, but had nothing for the coin
+
+    def render(self) -> str:
+        if self.empty:
+            return self.message
+        return f"Error fetching {self.source} for {self.cryptocurrency}: {self.message}"
+
+
+@dataclass(frozen=True, slots=True)
+class NewsArticle(_Record):
+    """One article; sentences are the highlights kept by news compression"""
+    title: str
+    url: str
+    highlights: Tuple[str, ...] = ()
+    published_date: Optional[str] = None
+    sentences: Optional[Tuple[str, ...]] = None
+
+    @classmethod
+    def from_dict(cls, article: dict) -> "NewsArticle":
+        """Build from the article dicts of search_news / compress_news"""
+        sentences = article.get("sentences")
+        return cls(
+            title=article.get("title") or "",
+            url=article.get("url") or "",
+            highlights=tuple(article.get("highlights") or ()),
+            published_date=article.get("published_date"),
+            sentences=tuple(sentences) if sentences is not None else None,
+        )
+
+    def render(self, number: int) -> str:
+        text = self.sentences if self.sentences is not None else self.highlights
+        body = f"   {' '.join(text)}\n" if text else ""
+        return f"{number}. {self.title}\n{body}   URL: {self.url}\n"
+
+
+@dataclass(frozen=True, slots=True)
+class NewsDigest(_Record):
+    """The news a NewsAnalyst reads for one coin"""
+    cryptocurrency: str
+    articles: Tuple[NewsArticle, ...] = ()
+    # Summaries of market-wide stories shared with other coins of a batch run
+    stories: Tuple[str, ...] = ()
+
+    _nested: ClassVar[dict] = {"articles": (NewsArticle, True)}
+
+    @classmethod
+    def from_dicts(cls, cryptocurrency: str, articles: list, stories: tuple = ()) -> "NewsDigest":
+        return cls(cryptocurrency, tuple(NewsArticle.from_dict(a) for a in articles), tuple(stories))
+
+    @property
+    def urls(self) -> list:
+        return [a.url for a in self.articles]
+
+    def render(self) -> str:
+        sections = []
+        if self.articles:
+            sections.append(f"Recent news for {self.cryptocurrency}:\n\n" + "".join(
+                article.render(i) + "\n" for i, article in enumerate(self.articles, 1)
+            ))
+        if self.stories:
+            sections.append(
+                "Market-wide stories (also reported for other coins, already summarized):\n"
+                + "\n".join(self.stories)
+            )
+        return "\n".join(sections)
+
+
+@dataclass(frozen=True, slots=True)
+class QuoteSnapshot(_Record):
+    """
+    Current quote metrics of one coin (see tools.market_snapshot).
+
+    The day range, volume and change come from the current UTC daily bar,
+    so they cover the day so far rather than a trailing 24 hours.
+    """
+    cryptocurrency: str
+    yahoo_symbol: str
+    current_price: float
+    prev_close: float
+    change_24h: float
+    day_high: float
+    day_low: float
+    volume_24h: float
+    fifty_two_week_high: float
+    fifty_two_week_low: float
+    market_cap: Optional[float]
+
+    def render(self) -> str:
+        market_cap = f"${self.market_cap:,.0f}" if self.market_cap else "n/a"
+        return f"""Current Market Data for {self.cryptocurrency} ({self.yahoo_symbol}):
+
+Price:              ${self.current_price:,.4f}
+Change Today (UTC): {self.change_24h:+.2f}%
+Day High (UTC):     ${self.day_high:,.4f}
+Day Low (UTC):      ${self.day_low:,.4f}
+
+Market Cap:         {market_cap}
+Day Volume (UTC):   ${self.volume_24h:,.0f}
+
+52-Week High:       ${self.fifty_two_week_high:,.4f}
+52-Week Low:        ${self.fifty_two_week_low:,.4f}
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class PriceStats(_Record):
+    """Indicator values of one coin over a window (see tools.indicators.indicators_for_bars)"""
+    cryptocurrency: str
+    days: int
+    bars: int
+    current_price: float
+    start_price: float
+    start_date: str
+    price_change: float
+    trend_label: str
+    period_high: float
+    high_date: str
+    period_low: float
+    low_date: str
+    avg_close: float
+    avg_volume: float
+    sma_7: float
+    sma_30: float
+    momentum: float
+    volatility: float
+    rsi_14: float
+    macd: float
+    macd_signal: float
+    macd_hist: float
+    bb_upper: float
+    bb_middle: float
+    bb_lower: float
+    atr_14: float
+    drawdown: float
+    max_drawdown: float
+
+    @classmethod
+    def from_indicators(cls, cryptocurrency: str, days: int, stats: dict) -> "PriceStats":
+        values = {"cryptocurrency": cryptocurrency, "days": days}
+        return cls(**{f.name: values[f.name] if f.name in values else stats[f.name] for f in fields(cls)})
+
+    def render(self) -> str:
+        return f"""Historical Price Analysis for {self.cryptocurrency} ({self.days} days):
+
+Price Summary:
+- Current Close:    ${self.current_price:,.4f}
+- Period Start:     ${self.start_price:,.4f} ({self.start_date})
+- Period Change:    {self.price_change:+.2f}%
+- Trend:            {self.trend_label}
+
+OHLCV Range:
+- Period High:      ${self.period_high:,.4f} (on {self.high_date})
+- Period Low:       ${self.period_low:,.4f} (on {self.low_date})
+- Average Close:    ${self.avg_close:,.4f}
+- Average Volume:   ${self.avg_volume:,.0f}
+
+Moving Averages:
+- 7-day SMA:        ${self.sma_7:,.4f}
+- 30-day SMA:       ${self.sma_30:,.4f}
+
+Momentum & Volatility:
+- 7-day Momentum:   {self.momentum:+.2f}%
+- Daily Volatility: {self.volatility:.2f}%
+
+Technical Indicators:
+- RSI (14):         {_fmt_optional(self.rsi_14, '.1f')}
+- MACD (12/26/9):   {_fmt_optional(self.macd, ',.4f')} (signal {_fmt_optional(self.macd_signal, ',.4f')}, histogram {_fmt_optional(self.macd_hist, '+,.4f')})
+- Bollinger (20,2): ${_fmt_optional(self.bb_lower, ',.4f')} / ${_fmt_optional(self.bb_middle, ',.4f')} / ${_fmt_optional(self.bb_upper, ',.4f')}
+- ATR (14):         ${_fmt_optional(self.atr_14, ',.4f')}
+- Drawdown:         {_fmt_optional(self.drawdown, '+.2f')}% from peak (max {_fmt_optional(self.max_drawdown, '+.2f')}%)
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class MarketData(_Record):
+    """Quote and window statistics from one market snapshot"""
+    quote: QuoteSnapshot
+    stats: PriceStats
+
+    _nested: ClassVar[dict] = {"quote": (QuoteSnapshot, False), "stats": (PriceStats, False)}
+
+    def render(self) -> str:
+        return f"{self.quote.render()}\n{self.stats.render()}"
+
+
+Record = Union[ErrorResult, NewsArticle, NewsDigest, QuoteSnapshot, PriceStats, MarketData]
+_RECORDS = {cls.__name__: cls for cls in (ErrorResult, NewsArticle, NewsDigest, QuoteSnapshot,
+                                          PriceStats, MarketData)}
+
+
+def _schema(cls) -> int:
+    """Fingerprint of a record's field names and order, nested records included"""
+    layout = []
+    for f in fields(cls):
+        nested, many = cls._nested.get(f.name, (None, False))
+        layout.append(f"{f.name}:{_schema(nested)}{'*' if many else ''}" if nested else f.name)
+    return zlib.crc32(f"{cls.__name__}({','.join(layout)})".encode("utf-8"))
+
+
+_SCHEMAS = {name: _schema(cls) for name, cls in _RECORDS.items()}
+
+
+def _default(value):
+    # numpy scalars from the indicator code
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Type is not serializable: {type(value).__name__}")
+
+
+def dumps(record: Record) -> bytes:
+    """Serialize a record as versioned, positional MessagePack"""
+    name = type(record).__name__
+    return ormsgpack.packb([FORMAT_VERSION, name, _SCHEMAS[name], record.to_row()], default=_default)
+
+
+def loads(data: bytes) -> Record:
+    """
+    Rebuild a record serialized with dumps().
+
+    Raises ValueError when the payload was written by another format
+    version or another field layout of the record.
+    """
+    version, name, schema, row = ormsgpack.unpackb(data)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Record format version {version}, expected {FORMAT_VERSION}")
+    if name not in _RECORDS:
+        raise ValueError(f"Unknown record type {name!r}")
+    if schema != _SCHEMAS[name]:
+        raise ValueError(f"{name} was serialized with a different field layout")
+    return _RECORDS[name].from_row(row)
@@ -0,0 +1,255 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+from utils import config
+
+_FILENAME = re.compile(r"^([A-Z0-9-]+)_report_(\d{8}_\d{6})(?:_\d+)?\.md$")
+_FOOTER = re.compile(r"\| Timeframe: (\d+) days \| Focus: (.*?)\*")
+
+
+def normalize_focus(focus: Optional[str]) -> str:
+    return " ".join((focus or "").lower().split())
+
+
+def input_hash(text: Optional[str]) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+class ReportIndex:
+    """
+    SQLite index of the reports saved in Reports/.
+
+    Each saved report is recorded with its symbol, days, focus, generation
+    time and the hashes of the analyses it was written from; its text goes
+    into an FTS5 table. find_fresh() serves a report for the same coin,
+    window and focus saved within REPORT_FRESH_SECONDS, and list()/search()
+    answer from the index instead of scanning the directory. Reports saved
+    before the index existed can be added with sync().
+    """
+
+    def __init__(self, path: str = config.REPORT_INDEX_PATH,
+                 fresh_seconds: float = config.REPORT_FRESH_SECONDS):
+        self.path = path
+        self.fresh_seconds = fresh_seconds
+        self.stats_counts = {"reused": 0, "missed": 0, "indexed": 0}
+        self._conn = None
+        self._conn_path = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open (or reopen, if path changed) the database; call with self._lock held"""
+        if self._conn is None or self._conn_path != self.path:
+            if self._conn is not None:
+                self._conn.close()
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS reports (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT NOT NULL UNIQUE,
+                    symbol TEXT NOT NULL,
+                    days INTEGER,
+                    focus TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    news_hash TEXT,
+                    price_hash TEXT,
+                    chars INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_reports_request ON reports(symbol, days, focus, created_at);
+                CREATE INDEX IF NOT EXISTS idx_reports_created ON reports(created_at);
+                CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(symbol, focus, content);
+            """)
+            self._conn.commit()
+            self._conn_path = self.path
+        return self._conn
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats_counts[key] += 1
+
+    def add(self, path: str, symbol: str, content: str, days: Optional[int] = None,
+            focus: Optional[str] = None, news_analysis: Optional[str] = None,
+            price_analysis: Optional[str] = None, created_at: Optional[float] = None) -> int:
+        """
+        Record a saved report, replacing any entry for the same path.
+
+        Args:
+            path: Report file path
+            symbol: Crypto symbol the report is about
+            content: Report markdown
+            days: Timeframe in days (None when unknown; such reports are never reused)
+            focus: User's area of interest
+            news_analysis: NewsAnalyst output the report was written from
+            price_analysis: PriceAnalyst output the report was written from
+            created_at: Generation time (epoch seconds), default now
+
+        Returns:
+            Row id of the report
+        """
+        created_at = time.time() if created_at is None else created_at
+        focus = normalize_focus(focus)
+        hashes = [input_hash(a) if a is not None else None for a in (news_analysis, price_analysis)]
+        with self._lock:
+            conn = self._connection()
+            old = conn.execute("SELECT id FROM reports WHERE path = ?", (path,)).fetchone()
+            if old:
+                conn.execute("DELETE FROM reports_fts WHERE rowid = ?", old)
+                conn.execute("DELETE FROM reports WHERE id = ?", old)
+            cursor = conn.execute(
+                "INSERT INTO reports (path, symbol, days, focus, created_at, news_hash, price_hash, chars) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, symbol.upper(), days, focus, created_at, *hashes, len(content))
+            )
+            conn.execute(
+                "INSERT INTO reports_fts (rowid, symbol, focus, content) VALUES (?, ?, ?, ?)",
+                (cursor.lastrowid, symbol.upper(), focus, content)
+            )
+            conn.commit()
+            self.stats_counts["indexed"] += 1
+        return cursor.lastrowid
+
+    def remove(self, path: str):
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT id FROM reports WHERE path = ?", (path,)).fetchone()
+            if row:
+                conn.execute("DELETE FROM reports_fts WHERE rowid = ?", row)
+                conn.execute("DELETE FROM reports WHERE id = ?", row)
+                conn.commit()
+
+    def find_fresh(self, symbol: str, days: int, focus: str,
+                   max_age: Optional[float] = None) -> Optional[dict]:
+        """
+        Newest saved report for the same coin, window and focus, if fresh.
+
+        Entries whose file has been deleted are dropped from the index.
+
+        Args:
+            symbol: Crypto symbol
+            days: Timeframe in days
+            focus: User's area of interest (compared case- and whitespace-insensitively)
+            max_age: Freshness limit in seconds, default REPORT_FRESH_SECONDS
+
+        Returns:
+            Dict with path, filename, created_at, age and report content, or None
+        """
+        max_age = self.fresh_seconds if max_age is None else max_age
+        now = time.time()
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT path, created_at FROM reports WHERE symbol = ? AND days = ? AND focus = ? "
+                "AND created_at >= ? ORDER BY created_at DESC",
+                (symbol.upper(), days, normalize_focus(focus), now - max_age)
+            ).fetchall()
+        for path, created_at in rows:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    content = f.read()
+            except FileNotFoundError:
+                self.remove(path)
+                continue
+            self._count("reused")
+            return {
+                "path": path,
+                "filename": os.path.basename(path),
+                "created_at": created_at,
+                "age": now - created_at,
+                "report": content,
+            }
+        self._count("missed")
+        return None
+
+    @staticmethod
+    def _rows(cursor) -> List[dict]:
+        names = [d[0] for d in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def list(self, symbol: Optional[str] = None, limit: int = 20) -> List[dict]:
+        """Most recent reports (optionally for one symbol), newest first"""
+        query = "SELECT path, symbol, days, focus, created_at, chars FROM reports"
+        params = []
+        if symbol:
+            query += " WHERE symbol = ?"
+            params.append(symbol.upper())
+        query += " ORDER BY created_at DESC LIMIT ?"
+        with self._lock:
+            return self._rows(self._connection().execute(query, (*params, limit)))
+
+    def search(self, text: str, symbol: Optional[str] = None, limit: int = 20) -> List[dict]:
+        """
+        Full-text search over report content, best matches first.
+
+        Args:
+            text: Words to look for (all must appear; FTS5 query syntax is
+                not interpreted)
+            symbol: Restrict to one crypto symbol
+            limit: Maximum results
+
+        Returns:
+            Report rows with a highlighted 'snippet' of the match
+        """
+        terms = re.findall(r"\w+", text)
+        if not terms:
+            return []
+        match = " ".join(f'"{term}"' for term in terms)
+        query = (
+            "SELECT r.path, r.symbol, r.days, r.focus, r.created_at, "
+            "snippet(reports_fts, 2, '[', ']', '...', 12) AS snippet "
+            "FROM reports_fts JOIN reports r ON r.id = reports_fts.rowid "
+            "WHERE reports_fts MATCH ?"
+        )
+        params = [match]
+        if symbol:
+            query += " AND r.symbol = ?"
+            params.append(symbol.upper())
+        query += " ORDER BY bm25(reports_fts) LIMIT ?"
+        with self._lock:
+            return self._rows(self._connection().execute(query, (*params, limit)))
+
+    def sync(self, reports_dir: str = "Reports") -> int:
+        """
+        Index report files not yet in the index (e.g. saved before it existed).
+
+        Days and focus are read from the report footer and the generation
+        time from the filename.
+
+        Returns:
+            Number of reports added
+        """
+        if not os.path.isdir(reports_dir):
+            return 0
+        with self._lock:
+            known = {row[0] for row in self._connection().execute("SELECT path FROM reports")}
+        added = 0
+        for name in sorted(os.listdir(reports_dir)):
+            match = _FILENAME.match(name)
+            path = os.path.join(reports_dir, name)
+            if not match or path in known:
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read()
+            footer = _FOOTER.search(content)
+            self.add(
+                path, match.group(1), content,
+                days=int(footer.group(1)) if footer else None,
+                focus=footer.group(2) if footer else None,
+                created_at=datetime.strptime(match.group(2), "%Y%m%d_%H%M%S").timestamp()
+            )
+            added += 1
+        return added
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.stats_counts)
+            counts["reports"] = self._connection().execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+        return counts
+
+
+default_report_index = ReportIndex()
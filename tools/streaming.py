@@ -0,0 +1,260 @@
+"""
+Incrementally updated indicators for long intraday bar streams.
+
+StreamingIndicators keeps just enough state to move every indicator
+forward by one bar in constant time:
+
+- SMAs: a running sum per window over a ring buffer of recent closes
+- EMAs: the previous value (seeded with the first close, like pandas
+  adjust=False and tools.indicators._ema)
+- rolling mean / variance of closes and of bar returns: Welford updates
+  that add the new value and remove the one leaving the window
+- rolling high / low: monotonic deques, whose front is the extreme of the
+  window; each bar is pushed and popped at most once (amortized O(1))
+
+Running sums are recomputed from the buffer once per window of updates,
+which keeps floating-point drift bounded at amortized O(1) cost. The
+state is a plain dict (to_dict / from_dict) and JSON-serializable, so a
+warm process can persist it and carry on from the last bar it saw
+without re-reading the history.
+"""
+import json
+from collections import deque
+from typing import Optional, Sequence
+import numpy as np
+from utils import config
+
+
+class _Ring:
+    """Fixed-capacity buffer of the most recent values with O(1) append and indexing"""
+
+    def __init__(self, capacity: int, values: Sequence[float] = ()):
+        self.data = np.zeros(capacity)
+        self.size = 0
+        self.head = 0       # Next write position
+        for value in values[-capacity:]:
+            self.append(value)
+
+    def append(self, value: float) -> Optional[float]:
+        """Add a value; returns the value it overwrote once the buffer is full"""
+        capacity = len(self.data)
+        evicted = self.data[self.head] if self.size == capacity else None
+        self.data[self.head] = value
+        self.head = (self.head + 1) % capacity
+        self.size = min(self.size + 1, capacity)
+        return evicted
+
+    def ago(self, k: int) -> float:
+        """The value appended k appends before the newest (0 = newest)"""
+        return self.data[(self.head - 1 - k) % len(self.data)]
+
+    def values(self) -> list:
+        """Contents oldest first"""
+        return [float(self.ago(k)) for k in range(self.size - 1, -1, -1)]
+
+
+class _Moments:
+    """Mean and variance of a sliding window with Welford add / remove"""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x: float):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def remove(self, x: float):
+        if self.n <= 1:
+            self.n, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        self.n -= 1
+        delta = x - self.mean
+        self.mean -= delta / self.n
+        self.m2 = max(self.m2 - delta * (x - self.mean), 0.0)
+
+    def reset(self, values: Sequence[float]):
+        values = np.asarray(values, dtype=float)
+        self.n = len(values)
+        self.mean = float(values.mean()) if self.n else 0.0
+        self.m2 = float(((values - self.mean) ** 2).sum()) if self.n else 0.0
+
+    def variance(self) -> float:
+        """Sample variance (ddof=1), NaN with fewer than two values"""
+        return self.m2 / (self.n - 1) if self.n > 1 else float("nan")
+
+
+class StreamingIndicators:
+    """
+    O(1)-per-bar SMA, EMA, rolling mean / variance and rolling high / low.
+
+    Bars must arrive in time order; a bar not newer than the last one is
+    ignored, so feeding an overlapping range twice is harmless. Feed only
+    closed bars: a still-forming bar would be counted as final.
+
+    Args:
+        window: Bars in the rolling mean / variance / high / low window
+        sma_windows: SMA lengths in bars
+        ema_spans: EMA spans in bars (alpha = 2 / (span + 1))
+    """
+
+    def __init__(self, window: int = config.STREAM_WINDOW_BARS,
+                 sma_windows: Sequence[int] = config.STREAM_SMA_BARS,
+                 ema_spans: Sequence[int] = config.STREAM_EMA_SPANS):
+        self.window = int(window)
+        self.sma_windows = tuple(int(k) for k in sma_windows)
+        self.ema_spans = tuple(int(s) for s in ema_spans)
+        capacity = max((self.window, *self.sma_windows))
+        self.closes = _Ring(capacity)
+        self.returns = _Ring(self.window)
+        self.sma_sums = {k: 0.0 for k in self.sma_windows}
+        self.emas = {s: None for s in self.ema_spans}
+        self.close_moments = _Moments()
+        self.return_moments = _Moments()
+        # (sequence number, value); values strictly decreasing / increasing from the front
+        self.highs = deque()
+        self.lows = deque()
+        self.bars = 0
+        self.last_time = None
+        self._since_rebuild = 0
+
+    def update(self, bar_time, high: float, low: float, close: float) -> bool:
+        """
+        Advance every indicator by one closed bar.
+
+        Args:
+            bar_time: Bar timestamp (anything np.datetime64 accepts)
+            high: Bar high
+            low: Bar low
+            close: Bar close
+
+        Returns:
+            False if the bar was not newer than the last one and was ignored
+        """
+        bar_time = np.datetime64(bar_time, "s")
+        if self.last_time is not None and bar_time <= self.last_time:
+            return False
+        high, low, close = float(high), float(low), float(close)
+        seq = self.bars
+
+        previous = self.closes.ago(0) if self.closes.size else None
+        # Values leaving each SMA window (read before the ring overwrites anything)
+        leaving = {k: self.closes.ago(k - 1) if self.closes.size >= k else None for k in self.sma_windows}
+        leaving_close = self.closes.ago(self.window - 1) if self.closes.size >= self.window else None
+        self.closes.append(close)
+
+        for k, old in leaving.items():
+            self.sma_sums[k] += close - (old if old is not None else 0.0)
+        for span, value in self.emas.items():
+            alpha = 2 / (span + 1)
+            self.emas[span] = close if value is None else value + alpha * (close - value)
+
+        self.close_moments.add(close)
+        if leaving_close is not None:
+            self.close_moments.remove(leaving_close)
+
+        if previous:
+            ret = close / previous - 1
+            leaving_return = self.returns.append(ret)
+            self.return_moments.add(ret)
+            if leaving_return is not None:
+                self.return_moments.remove(leaving_return)
+
+        while self.highs and self.highs[-1][1] <= high:
+            self.highs.pop()
+        self.highs.append((seq, high))
+        while self.lows and self.lows[-1][1] >= low:
+            self.lows.pop()
+        self.lows.append((seq, low))
+        cutoff = seq - self.window
+        while self.highs[0][0] <= cutoff:
+            self.highs.popleft()
+        while self.lows[0][0] <= cutoff:
+            self.lows.popleft()
+
+        self.bars += 1
+        self.last_time = bar_time
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.window:
+            self._rebuild()
+        return True
+
+    def _rebuild(self):
+        """Recompute the running sums from the buffers to shed floating-point drift"""
+        closes = self.closes.values()
+        for k in self.sma_windows:
+            self.sma_sums[k] = float(sum(closes[-k:]))
+        self.close_moments.reset(closes[-self.window:])
+        self.return_moments.reset(self.returns.values())
+        self._since_rebuild = 0
+
+    def values(self) -> dict:
+        """
+        Current indicator values.
+
+        Returns:
+            Dictionary with close, bars, sma_<k>, ema_<span>, mean and std of
+            closes over the window, volatility (std of bar returns, %),
+            high / low over the window and change over the window (%); NaN
+            where there aren't enough bars yet
+        """
+        nan = float("nan")
+        size = self.closes.size
+        close = float(self.closes.ago(0)) if size else nan
+        result = {
+            "time": str(self.last_time) if self.last_time is not None else None,
+            "bars": self.bars,
+            "close": close,
+        }
+        for k in self.sma_windows:
+            result[f"sma_{k}"] = self.sma_sums[k] / k if size >= k else nan
+        for span, value in self.emas.items():
+            result[f"ema_{span}"] = value if value is not None else nan
+        full = size >= self.window
+        result["mean"] = self.close_moments.mean if full else nan
+        result["std"] = float(np.sqrt(self.close_moments.variance())) if full else nan
+        result["volatility"] = float(np.sqrt(self.return_moments.variance())) * 100 \
+            if self.returns.size >= 2 else nan
+        result["high"] = self.highs[0][1] if self.highs else nan
+        result["low"] = self.lows[0][1] if self.lows else nan
+        start = self.closes.ago(self.window - 1) if full else nan
+        result["change"] = (close / start - 1) * 100 if full else nan
+        return result
+
+    def to_dict(self) -> dict:
+        """JSON-serializable state; from_dict(to_dict()) continues identically"""
+        return {
+            "window": self.window,
+            "sma_windows": list(self.sma_windows),
+            "ema_spans": list(self.ema_spans),
+            "closes": self.closes.values(),
+            "returns": self.returns.values(),
+            "emas": {str(span): value for span, value in self.emas.items()},
+            "highs": [list(item) for item in self.highs],
+            "lows": [list(item) for item in self.lows],
+            "bars": self.bars,
+            "last_time": str(self.last_time) if self.last_time is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "StreamingIndicators":
+        stream = cls(state["window"], state["sma_windows"], state["ema_spans"])
+        stream.closes = _Ring(len(stream.closes.data), state["closes"])
+        stream.returns = _Ring(stream.window, state["returns"])
+        stream.emas = {int(span): value for span, value in state["emas"].items()}
+        stream.highs = deque((int(seq), value) for seq, value in state["highs"])
+        stream.lows = deque((int(seq), value) for seq, value in state["lows"])
+        stream.bars = state["bars"]
+        stream.last_time = np.datetime64(state["last_time"], "s") if state["last_time"] else None
+        stream._rebuild()
+        return stream
+
+    def dumps(self) -> str:
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    @classmethod
+    def loads(cls, data: str) -> "StreamingIndicators":
+        return cls.from_dict(json.loads(data))
@@ -0,0 +1,39 @@
+"""
+Crypto symbol to Yahoo Finance symbol mapping.
+
+Kept free of third-party imports so the query parser, the backtest and
+other short-lived entry points can use it without loading LangChain or
+the data stores. tools.data_fetch re-exports both names.
+"""
+
+SYMBOL_TO_YAHOO = {
+    "BTC": "BTC-USD",
+    "ETH": "ETH-USD",
+    "SOL": "SOL-USD",
+    "ADA": "ADA-USD",
+    "DOT": "DOT-USD",
+    "MATIC": "MATIC-USD",
+    "AVAX": "AVAX-USD",
+    "LINK": "LINK-USD",
+    "UNI": "UNI-USD",
+    "XRP": "XRP-USD",
+    "DOGE": "DOGE-USD",
+    "SHIB": "SHIB-USD",
+    "LTC": "LTC-USD",
+    "BCH": "BCH-USD",
+    "ATOM": "ATOM-USD",
+    "XLM": "XLM-USD",
+    "ALGO": "ALGO-USD",
+    "VET": "VET-USD",
+    "ICP": "ICP-USD",
+    "FIL": "FIL-USD",
+}
+
+
+def _get_yahoo_symbol(symbol: str) -> str:
+    """Convert crypto symbol to Yahoo Finance format"""
+    symbol = symbol.upper()
+    # If already in Yahoo format (e.g., BTC-USD), return as is
+    if "-USD" in symbol:
+        return symbol
+    return SYMBOL_TO_YAHOO.get(symbol, f"{symbol}-USD")
@@ -9,3 +9,118 @@ EXA_API_KEY = os.getenv("EXA_API_KEY")
 MODEL_NAME = "gpt-5-mini"
 TEMPERATURE = 0.7
 
+# Local OHLCV store (tools/price_store.py)
+PRICE_STORE_DIR = os.path.join("Data", "ohlcv")
+PRICE_STORE_REFRESH_SECONDS = 300      # Skip the Yahoo top-up if refreshed more recently
+PRICE_STORE_BOOTSTRAP_DAYS = 365       # History downloaded the first time a symbol is seen
+MAX_HISTORY_DAYS = 1825                # Longest window fetch_historical_prices will serve
+
+# Intraday bars and streaming indicators (tools/intraday.py, tools/streaming.py)
+INTRADAY_STORE_DIR = os.path.join("Data", "intraday")
+INTRADAY_REFRESH_SECONDS = 60          # Skip the Yahoo top-up of intraday bars if refreshed more recently
+INTRADAY_HORIZONS = ((1, "5m"), (7, "1h"))  # Requests of at most N days also get bars of this interval
+STREAM_WINDOW_BARS = 60                # Rolling mean / variance / high / low window
+STREAM_SMA_BARS = (20, 50)
+STREAM_EMA_SPANS = (12, 26)
+
+# Batch mode (main.py --batch / --watchlist)
+BATCH_CONCURRENCY = 4                  # Coins in their LLM stages at the same time
+
+# LLM response cache (utils/llm_cache.py)
+LLM_CACHE_ENABLED = True
+LLM_CACHE_PATH = os.path.join("Data", "llm_cache.sqlite")
+LLM_CACHE_TTL_SECONDS = 900            # Roughly the market-data refresh interval
+LLM_CACHE_MAX_ENTRIES = 5000
+LLM_CACHE_MAX_BYTES = 50 * 1024 * 1024
+
+# Requirement extraction fast path (crypto_agents/query_parser.py)
+FAST_PATH_ENABLED = True
+FAST_PATH_MIN_CONFIDENCE = 0.8         # Below this the LLM parses the query
+
+# Speculative prefetch while requirements are parsed (crypto_agents/pipeline.py)
+SPECULATIVE_PREFETCH = True
+SPECULATIVE_MAX_SYMBOLS = 2            # Coins from the lexical scan fetched ahead of the parse
+
+# Market snapshot (tools/market_snapshot.py)
+SNAPSHOT_MAX_AGE_SECONDS = 60          # Quote staleness tolerated before re-fetching the tail
+SNAPSHOT_SUPPLY_TTL_SECONDS = 86400    # How long circulating supply (for market cap) is reused
+
+# Cross-asset correlation (tools/correlation.py)
+CORRELATION_ENABLED = True             # Add correlation / beta / dispersion context to the price analysis
+CORRELATION_WINDOWS = (30, 90)         # Rolling windows in days
+CORRELATION_BENCHMARK = "BTC"          # Betas are measured against this coin
+CORRELATION_MIN_OBSERVATIONS = 10      # Shared days a pair needs before it gets a correlation
+CORRELATION_REBUILD_EVERY = 250        # Incremental updates between exact float32 recomputes
+
+# Trend label backtest (backtest.py, tools/backtest.py)
+BACKTEST_HISTORY_DAYS = 1825           # History evaluated per symbol
+BACKTEST_LOOKBACK_DAYS = (30,)         # Analysis windows whose labels are tested
+BACKTEST_HORIZONS = (7, 30)            # Forward-return horizons in days
+
+# Profiling (main.py --profile, utils/tracing.py)
+TRACE_DIR = "Traces"
+
+# Watchlist refresh daemon (watchlist.py)
+WATCHLIST_INTERVAL_SECONDS = 900       # Default time between checks of a symbol
+WATCHLIST_CONCURRENCY = 8              # Symbols checked / regenerated at the same time
+WATCHLIST_STATE_PATH = os.path.join("Data", "watchlist_state.json")
+WATCHLIST_MAX_REPORT_AGE_SECONDS = 86400  # Regenerate at least this often, material change or not
+WATCHLIST_THRESHOLDS = {
+    "price_change": 2.0,               # Period change moved by this many percentage points
+    "momentum": 2.0,                   # 7-day momentum moved by this many percentage points
+    "volatility": 0.25,                # Daily volatility changed by this fraction of its old value
+    "new_articles": 2,                 # Article URLs the last news analysis hadn't seen
+}
+
+# HTTP service mode (server.py)
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8080
+SERVER_WORKERS = 4                     # Analyses computed at the same time
+SERVER_QUEUE_SIZE = 32                 # Distinct analyses waiting for a worker before 503s
+SERVER_MAX_BODY_BYTES = 64 * 1024
+
+# Provider clients (tools/providers.py)
+PROVIDER_POOL_SIZE = 10                # Keep-alive connections kept per provider
+PROVIDER_TIMEOUT_SECONDS = 30
+
+# Provider scheduling (utils/scheduler.py)
+PROVIDER_LIMITS = {
+    "exa":   {"rate": 5.0, "burst": 5, "concurrency": 5},    # requests/s, bucket size, in flight
+    "yahoo": {"rate": 4.0, "burst": 8, "concurrency": 4},
+}
+OPENAI_REQUESTS_PER_SECOND = 8.0
+OPENAI_MAX_BURST = 16
+OPENAI_MAX_RETRIES = 3                 # 429/5xx retries done by the OpenAI client
+SCHEDULER_MAX_ATTEMPTS = 4
+SCHEDULER_BACKOFF_BASE_SECONDS = 0.5
+SCHEDULER_BACKOFF_MAX_SECONDS = 8.0
+ANALYST_DEADLINE_SECONDS = 90          # News / price branch budget before the report goes ahead without it
+
+# News preprocessing (tools/news_compress.py)
+NEWS_COMPRESSION_ENABLED = True
+NEWS_TOKEN_BUDGET = 1200               # Tokens of article text sent to the NewsAnalyst
+NEWS_NEAR_DUPLICATE_THRESHOLD = 0.8    # Shingle Jaccard similarity treated as the same story
+
+# Cross-coin news clustering in batch runs (tools/news_clusters.py)
+NEWS_SHARED_CLUSTERING = True
+NEWS_SHARED_MIN_COINS = 2              # Coins a story must appear for to be summarized once for all
+NEWS_MINHASH_PERMUTATIONS = 64
+NEWS_MINHASH_BANDS = 16                # 4 rows per band: pairs around 0.5+ similarity become candidates
+
+# Local news store (tools/news_store.py)
+NEWS_STORE_ENABLED = True
+NEWS_STORE_PATH = os.path.join("Data", "news.sqlite")
+NEWS_STORE_FRESH_SECONDS = 900         # Serve stored articles without asking Exa for this long
+NEWS_STORE_MAX_PER_SYMBOL = 50
+NEWS_STORE_MAX_AGE_DAYS = 14
+
+# Report generation (crypto_agents/report_writer.py)
+REPORT_SECTIONED = False               # Draft sections concurrently, then a summary pass (main.py --sectioned)
+REPORT_SECTION_WORDS = 180             # Length cap for each concurrently drafted section
+REPORT_SUMMARY_WORDS = 200             # Length cap for the Executive Summary / Key Insights / Outlook pass
+
+# Saved-report index (tools/report_index.py)
+REPORT_INDEX_ENABLED = True
+REPORT_INDEX_PATH = os.path.join("Data", "reports.sqlite")
+REPORT_REUSE_ENABLED = True            # Serve a fresh saved report instead of regenerating (main.py --regenerate)
+REPORT_FRESH_SECONDS = 1800            # Age up to which a report for the same coin, days and focus is reused
@@ -0,0 +1,318 @@
+"""
+Offline stand-ins for ChatOpenAI, Exa and yfinance.
+
+Each fake has configurable latency and returns deterministic canned
+payloads derived from its inputs, so pipeline runs are reproducible and
+need no network or API keys. install_fakes() wires the Exa and Yahoo
+fakes into tools.providers and returns a fake chat model to pass to the
+agents in place of ChatOpenAI.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Optional
+import numpy as np
+import pandas as pd
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_SENTENCES = [
+    "Momentum has cooled after a strong run and price is consolidating near the short-term average.",
+    "On-chain activity remains steady while exchange balances continue to decline.",
+    "Derivatives funding is neutral, suggesting leverage has been flushed from the market.",
+    "Regulatory headlines continue to weigh on sentiment across large-cap assets.",
+    "Institutional inflows picked up over the period according to recent fund flow data.",
+    "Volatility compressed into the end of the window, which often precedes a larger move.",
+    "Support held on the last retest and buyers stepped in on elevated volume.",
+    "Developers shipped a network upgrade that reduced fees and improved throughput.",
+]
+
+# Articles every coin's search returns - the syndicated market-wide stories
+_MARKET_WIDE = [
+    ("Crypto markets steady as traders await central bank decision",
+     "https://example.com/markets/central-bank-wait"),
+    ("Spot ETF flows turn positive for the third straight week",
+     "https://example.com/markets/etf-flows"),
+]
+
+
+def _digest(text: str) -> int:
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:12], 16)
+
+
+def _pick_sentences(seed: int, count: int) -> list:
+    return [_SENTENCES[(seed + i * 7) % len(_SENTENCES)] for i in range(count)]
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model returning deterministic canned text after a fixed latency"""
+
+    latency: float = 0.5
+    response_sentences: int = 12
+    # When streaming, latency is time-to-first-token and each word adds this
+    token_latency: float = 0.005
+    # Per-word generation time added to non-streaming calls (0 = fixed latency)
+    decode_latency: float = 0.0
+    model_name: str = "fake-chat"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model_name": self.model_name, "response_sentences": self.response_sentences}
+
+    def _respond(self, messages: list) -> AIMessage:
+        prompt = "\n".join(str(m.content) for m in messages)
+        if "extracts cryptocurrency" in prompt:
+            from crypto_agents.query_parser import parse_query
+            parsed = parse_query(str(messages[-1].content))
+            content = json.dumps({
+                "cryptocurrency": parsed["cryptocurrency"] or "BTC",
+                "days": parsed["days"],
+                "focus": parsed["focus"],
+            })
+        else:
+            seed = _digest(prompt)
+            content = "\n\n".join(_pick_sentences(seed, self.response_sentences))
+            # Honour "under N words" length caps in the prompt
+            cap = re.search(r"under (\d+) words", prompt)
+            if cap and len(content.split()) > int(cap.group(1)):
+                content = " ".join(content.split(" ")[:int(cap.group(1))])
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": len(prompt) // 4,
+                "output_tokens": len(content) // 4,
+                "total_tokens": (len(prompt) + len(content)) // 4,
+            }
+        )
+
+    def _generate(self, messages: list, stop: Optional[list] = None,
+                  run_manager: Any = None, **kwargs) -> ChatResult:
+        message = self._respond(messages)
+        time.sleep(self.latency + self.decode_latency * len(message.content.split()))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: list, stop: Optional[list] = None,
+                         run_manager: Any = None, **kwargs) -> ChatResult:
+        message = self._respond(messages)
+        await asyncio.sleep(self.latency + self.decode_latency * len(message.content.split()))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages: list, stop: Optional[list] = None,
+                       run_manager: Any = None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        message = self._respond(messages)
+        words = message.content.split(" ")
+        await asyncio.sleep(self.latency)
+        for i, word in enumerate(words):
+            text = word if i == len(words) - 1 else word + " "
+            chunk = ChatGenerationChunk(message=AIMessageChunk(
+                content=text,
+                usage_metadata=message.usage_metadata if i == len(words) - 1 else None
+            ))
+            if run_manager:
+                await run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+            await asyncio.sleep(self.token_latency)
+
+
+class _FakeArticle:
+    def __init__(self, title: str, url: str, highlights: list, published_date: str):
+        self.id = url
+        self.title = title
+        self.url = url
+        self.highlights = highlights
+        self.published_date = published_date
+
+
+class _FakeSearchResult:
+    def __init__(self, results: list):
+        self.results = results
+
+
+class FakeExa:
+    """Exa client stand-in; use FakeExa.factory(...) as the provider"""
+
+    def __init__(self, api_key: str = "", latency: float = 0.3):
+        self.latency = latency
+
+    @classmethod
+    def factory(cls, latency: float = 0.3):
+        return lambda api_key: cls(api_key, latency=latency)
+
+    def search(self, query: str, num_results: int = 5, **kwargs) -> _FakeSearchResult:
+        time.sleep(self.latency)
+        coin = query.split()[0].upper()
+        seed = _digest(coin)
+        now = datetime.now(timezone.utc)
+        articles = []
+        for i, (title, url) in enumerate(_MARKET_WIDE):
+            articles.append(_FakeArticle(
+                title, url, _pick_sentences(i, 3),
+                (now - timedelta(hours=2 + i)).isoformat()
+            ))
+        # The same wire story syndicated under a coin-specific URL
+        title, _ = _MARKET_WIDE[0]
+        articles.append(_FakeArticle(
+            title, f"https://example.com/{coin.lower()}/wire-central-bank",
+            _pick_sentences(0, 3), (now - timedelta(hours=3)).isoformat()
+        ))
+        i = 0
+        while len(articles) < num_results:
+            articles.append(_FakeArticle(
+                f"{coin} update #{i + 1}: developers and traders react",
+                f"https://example.com/{coin.lower()}/story-{i + 1}",
+                [f"For {coin}, {s[0].lower()}{s[1:]}" for s in _pick_sentences(seed + i, 3)],
+                (now - timedelta(hours=5 + i)).isoformat()
+            ))
+            i += 1
+        since = kwargs.get("start_published_date")
+        if since:
+            articles = [a for a in articles if a.published_date >= since]
+        return _FakeSearchResult(articles[:num_results])
+
+
+def _parse_dt(dt) -> pd.Timestamp:
+    """Read a history() start/end the way yfinance does (strings must be YYYY-MM-DD)"""
+    if isinstance(dt, int):
+        return pd.Timestamp(dt, unit="s", tz="UTC")
+    if isinstance(dt, str):
+        dt = datetime.strptime(dt, "%Y-%m-%d")
+    timestamp = pd.Timestamp(dt)
+    return timestamp.tz_localize("UTC") if timestamp.tz is None else timestamp.tz_convert("UTC")
+
+
+# Synthetic history starts here; prices are a seeded random walk per symbol
+_HISTORY_START = pd.Timestamp("2015-01-01", tz="UTC")
+
+
+class _FakeTicker:
+    def __init__(self, symbol: str, yahoo: "FakeYahoo"):
+        self.symbol = symbol
+        self._yahoo = yahoo
+
+    def history(self, period: Optional[str] = None, start=None, end=None,
+                interval: str = "1d", **kwargs) -> pd.DataFrame:
+        time.sleep(self._yahoo.latency)
+        if interval != "1d":
+            return self._yahoo._intraday_bars(self.symbol, interval, start, end)
+        return self._yahoo._bars(self.symbol, period, start, end)
+
+    @property
+    def info(self) -> dict:
+        time.sleep(self._yahoo.info_latency)
+        price = float(self._yahoo._frame(self.symbol)["Close"].iloc[-1])
+        supply = 1e6 + _digest(self.symbol) % 1e9
+        return {
+            "regularMarketPrice": price,
+            "circulatingSupply": supply,
+            "marketCap": supply * price,
+        }
+
+
+class FakeYahoo:
+    """yfinance stand-in exposing Ticker(symbol) and download(...)"""
+
+    def __init__(self, latency: float = 0.2, info_latency: float = 0.6):
+        self.latency = latency
+        self.info_latency = info_latency
+        self._frames = {}
+
+    def Ticker(self, symbol: str, **kwargs) -> _FakeTicker:
+        return _FakeTicker(symbol, self)
+
+    def _frame(self, symbol: str) -> pd.DataFrame:
+        if symbol not in self._frames:
+            today = pd.Timestamp.now(tz="UTC").normalize()
+            index = pd.date_range(_HISTORY_START, today, freq="D")
+            rng = np.random.default_rng(_digest(symbol))
+            close = (10 + _digest(symbol) % 1000) * np.exp(np.cumsum(rng.normal(0, 0.03, len(index))))
+            spread = np.abs(rng.normal(0, 0.015, len(index)))
+            self._frames[symbol] = pd.DataFrame({
+                "Open": close * (1 + rng.normal(0, 0.005, len(index))),
+                "High": close * (1 + spread),
+                "Low": close * (1 - spread),
+                "Close": close,
+                "Volume": rng.uniform(1e7, 1e9, len(index)),
+            }, index=index)
+        return self._frames[symbol]
+
+    def _intraday_frame(self, symbol: str, interval: str) -> pd.DataFrame:
+        """Bars over the interval's lookback, continuing from the daily close"""
+        from tools.intraday import INTERVALS
+
+        key = (symbol, interval)
+        if key not in self._frames:
+            seconds, _, lookback = INTERVALS[interval]
+            now = pd.Timestamp.now(tz="UTC").floor(f"{seconds}s")
+            index = pd.date_range(now - pd.Timedelta(days=lookback), now, freq=f"{seconds}s")
+            rng = np.random.default_rng(_digest(f"{symbol}:{interval}"))
+            scale = 0.03 * np.sqrt(seconds / 86400)
+            anchor = float(self._frame(symbol)["Close"].iloc[-2])
+            close = anchor * np.exp(np.cumsum(rng.normal(0, scale, len(index))))
+            spread = np.abs(rng.normal(0, scale / 2, len(index)))
+            self._frames[key] = pd.DataFrame({
+                "Open": close * (1 + rng.normal(0, scale / 4, len(index))),
+                "High": close * (1 + spread),
+                "Low": close * (1 - spread),
+                "Close": close,
+                "Volume": rng.uniform(1e4, 1e6, len(index)),
+            }, index=index)
+        return self._frames[key]
+
+    def _intraday_bars(self, symbol: str, interval: str, start, end) -> pd.DataFrame:
+        """Like Yahoo, refuses requests spanning more than the interval allows"""
+        from tools.intraday import INTERVALS
+
+        frame = self._intraday_frame(symbol, interval)
+        start = _parse_dt(start) if start is not None else frame.index[0]
+        end = _parse_dt(end) if end is not None else pd.Timestamp.now(tz="UTC")
+        max_span = INTERVALS[interval][1]
+        if end - start > pd.Timedelta(days=max_span):
+            raise ValueError(f"Only {max_span} days worth of {interval} granularity data "
+                             f"are allowed to be fetched per request.")
+        return frame[(frame.index >= start) & (frame.index < end)]
+
+    def _bars(self, symbol: str, period: Optional[str], start, end) -> pd.DataFrame:
+        frame = self._frame(symbol)
+        if period is not None:
+            days = {"7d": 7, "1mo": 30, "3mo": 90, "6mo": 180, "1y": 365}.get(period, 30)
+            return frame.iloc[-(days + 1):]
+        if start is not None:
+            frame = frame[frame.index >= _parse_dt(start)]
+        if end is not None:
+            frame = frame[frame.index < _parse_dt(end)]
+        return frame
+
+    def download(self, tickers, start=None, end=None, period=None, **kwargs) -> pd.DataFrame:
+        time.sleep(self.latency)
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        return pd.concat(
+            {symbol: self._bars(symbol, period, start, end) for symbol in tickers},
+            axis=1
+        )
+
+
+def install_fakes(llm_latency: float = 0.5, exa_latency: float = 0.3,
+                  yahoo_latency: float = 0.2, info_latency: float = 0.6) -> FakeChatModel:
+    """
+    Route Exa and Yahoo calls to fakes and build a fake chat model.
+
+    Returns:
+        FakeChatModel to pass to the agents instead of ChatOpenAI
+    """
+    from tools import providers
+
+    os.environ.setdefault("EXA_API_KEY", "fake")
+    providers.install(
+        exa=FakeExa.factory(latency=exa_latency),
+        yahoo=FakeYahoo(latency=yahoo_latency, info_latency=info_latency)
+    )
+    return FakeChatModel(latency=llm_latency)
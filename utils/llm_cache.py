@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from typing import Optional
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from utils import config
+from utils.tracing import current_span
+
+
+class LLMCache(BaseCache):
+    """
+    SQLite-backed LangChain LLM cache with TTL and size-bounded LRU eviction.
+
+    Entries are keyed on a hash of the model's llm_string (model name,
+    temperature and every other generation parameter) together with a hash
+    of the fully rendered prompt, so any change to the inputs is a miss.
+    Pass an instance as ChatOpenAI(cache=...) and every chain built on that
+    model is cached, for both invoke and ainvoke.
+    """
+
+    def __init__(
+        self,
+        path: str = config.LLM_CACHE_PATH,
+        ttl_seconds: float = config.LLM_CACHE_TTL_SECONDS,
+        max_entries: int = config.LLM_CACHE_MAX_ENTRIES,
+        max_bytes: int = config.LLM_CACHE_MAX_BYTES
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        llm_hash = hashlib.sha256(llm_string.encode("utf-8")).hexdigest()
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return f"{llm_hash[:16]}:{prompt_hash}"
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[list]:
+        """Return cached generations for this prompt and model, or None"""
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                current_span().add("llm_cache_misses")
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            current_span().add("llm_cache_hits")
+
+        with warnings.catch_warnings():
+            # langchain_core.load.loads is marked beta
+            warnings.simplefilter("ignore")
+            return [loads(item) for item in json.loads(row[0])]
+
+    def update(self, prompt: str, llm_string: str, return_val: list):
+        """Store generations and evict expired / least recently used entries"""
+        value = json.dumps([dumps(generation) for generation in return_val])
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        """Drop expired entries, then the least recently used until within bounds"""
+        cursor = self._conn.execute(
+            "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+        )
+        self.evictions += cursor.rowcount
+
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        # Walk entries from least to most recently used until both bounds hold
+        doomed = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM llm_cache ORDER BY accessed_at ASC"
+        ):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", doomed)
+        self.evictions += len(doomed)
+
+    def clear(self, **kwargs):
+        """Remove every cached entry"""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters and current size"""
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": total,
+        }
+
+
+_default_cache = None
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Process-wide cache instance, or None when LLM_CACHE_ENABLED is off"""
+    global _default_cache
+    if not config.LLM_CACHE_ENABLED:
+        return None
+    if _default_cache is None:
+        _default_cache = LLMCache()
+    return _default_cache
@@ -0,0 +1,239 @@
+"""
+Rate-limit-aware scheduling for provider calls.
+
+Every Exa and Yahoo request goes through Scheduler.call(), which applies,
+per provider:
+
+- a token bucket, so requests go out no faster than the provider allows
+  while short bursts still use the bucket's capacity,
+- a cap on concurrent in-flight requests,
+- retries with jittered exponential backoff on 429s and transient network
+  errors (a Retry-After hint, when the error carries one, is honoured).
+
+Deadlines propagate through a ContextVar: code running inside
+deadline(seconds), including asyncio tasks and to_thread workers started
+from it, sees the remaining budget through remaining()/timeout(), and the
+scheduler never waits, sleeps or retries past it.
+
+OpenAI calls are made by LangChain, so they are throttled by the token
+bucket from openai_rate_limiter() and retried by the OpenAI client itself.
+"""
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from utils import config
+from utils.tracing import current_span
+
+_TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+_TRANSIENT_NAMES = ("RateLimit", "Timeout", "ConnectionError", "ConnectError")
+_STATUS_IN_MESSAGE = re.compile(r"(?:status code|HTTP Error|HTTP)\s*:?\s*(\d{3})", re.IGNORECASE)
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a call would start or wait beyond the current deadline"""
+
+
+@contextmanager
+def deadline(seconds: float):
+    """Bound everything in the block to `seconds` (an outer, earlier deadline wins)"""
+    end = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(end if outer is None else min(outer, end))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None when there is none"""
+    end = _deadline.get()
+    return None if end is None else max(0.0, end - time.monotonic())
+
+
+def timeout(default: float = config.PROVIDER_TIMEOUT_SECONDS) -> float:
+    """Per-request timeout: the provider default, shortened to the remaining deadline"""
+    left = remaining()
+    return default if left is None else max(0.1, min(default, left))
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None) or getattr(error, "status_code", None)
+    if status is None:
+        match = _STATUS_IN_MESSAGE.search(str(error))
+        status = int(match.group(1)) if match else None
+    return status
+
+
+def is_transient(error: Exception) -> bool:
+    """True for throttling (429), 5xx responses and timeouts / dropped connections"""
+    if isinstance(error, DeadlineExceeded):
+        return False
+    status = _status_code(error)
+    if status is not None:
+        return status in _TRANSIENT_STATUS
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    names = [cls.__name__ for cls in type(error).__mro__]
+    return any(marker in name for name in names for marker in _TRANSIENT_NAMES)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After") or headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `rate` tokens per second"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Take one token, going into debt if the bucket is empty.
+
+        Returns:
+            Seconds the caller must wait before using the token
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self):
+        """Give back a reserved token that was not used"""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + 1)
+
+
+class _ProviderLimits:
+    def __init__(self, rate: float, burst: float, concurrency: int):
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(rate, burst)
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "throttled_seconds": 0.0}
+        self.stats_lock = threading.Lock()
+
+    def add(self, key: str, amount: float = 1):
+        with self.stats_lock:
+            self.stats[key] += amount
+
+
+class Scheduler:
+    def __init__(self, limits: dict = config.PROVIDER_LIMITS,
+                 max_attempts: int = config.SCHEDULER_MAX_ATTEMPTS,
+                 backoff_base: float = config.SCHEDULER_BACKOFF_BASE_SECONDS,
+                 backoff_max: float = config.SCHEDULER_BACKOFF_MAX_SECONDS):
+        """
+        Args:
+            limits: Provider name -> {"rate": requests/s, "burst": bucket size, "concurrency": n}
+            max_attempts: Attempts per call, including the first
+            backoff_base: First retry delay ceiling in seconds (doubles per attempt)
+            backoff_max: Largest retry delay ceiling in seconds
+        """
+        self.providers = {name: _ProviderLimits(**spec) for name, spec in limits.items()}
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def _wait(self, seconds: float, limits: _ProviderLimits):
+        """Sleep for a throttle delay, failing fast if it would cross the deadline"""
+        if seconds <= 0:
+            return
+        left = remaining()
+        if left is not None and seconds > left:
+            raise DeadlineExceeded(f"would wait {seconds:.1f}s with {left:.1f}s left")
+        limits.add("throttled_seconds", seconds)
+        current_span().add("throttled_ms", round(seconds * 1000, 1))
+        time.sleep(seconds)
+
+    def _acquire(self, limits: _ProviderLimits):
+        """Take a rate token and a concurrency slot, both bounded by the deadline"""
+        if remaining() == 0:
+            raise DeadlineExceeded("deadline already passed")
+        wait = limits.bucket.reserve()
+        try:
+            self._wait(wait, limits)
+        except DeadlineExceeded:
+            limits.bucket.refund()
+            raise
+        if not limits.slots.acquire(timeout=remaining()):
+            raise DeadlineExceeded("no free provider slot before the deadline")
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential delay for the given retry number (0-based)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def call(self, provider: str, func, *args, **kwargs):
+        """
+        Call a blocking provider function under that provider's limits.
+
+        Args:
+            provider: Key in the scheduler's limits, e.g. 'exa' or 'yahoo'
+            func: Function performing one provider request
+            *args, **kwargs: Passed to func
+
+        Returns:
+            func's return value; the last error is raised once retries are
+            exhausted, the error is not transient, or the deadline is hit
+        """
+        limits = self.providers[provider]
+        limits.add("calls")
+        for attempt in range(self.max_attempts):
+            self._acquire(limits)
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if attempt == self.max_attempts - 1 or not is_transient(e):
+                    limits.add("failures")
+                    raise
+                delay = _retry_after(e) or self.backoff(attempt)
+            finally:
+                limits.slots.release()
+
+            limits.add("retries")
+            current_span().add("retries")
+            left = remaining()
+            if left is not None and delay >= left:
+                limits.add("failures")
+                raise DeadlineExceeded(f"{provider} call still failing at the deadline")
+            time.sleep(delay)
+
+    def stats(self) -> dict:
+        """Per-provider call, retry, failure and throttle-wait counters"""
+        result = {}
+        for name, limits in self.providers.items():
+            with limits.stats_lock:
+                result[name] = {**limits.stats, "rate": limits.rate, "concurrency": limits.concurrency}
+        return result
+
+
+def openai_rate_limiter():
+    """LangChain token-bucket rate limiter to pass as ChatOpenAI(rate_limiter=...)"""
+    from langchain_core.rate_limiters import InMemoryRateLimiter
+    return InMemoryRateLimiter(
+        requests_per_second=config.OPENAI_REQUESTS_PER_SECOND,
+        max_bucket_size=config.OPENAI_MAX_BURST,
+        check_every_n_seconds=0.05
+    )
+
+
+default_scheduler = Scheduler()
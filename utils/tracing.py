@@ -0,0 +1,197 @@
+"""
+Lightweight span tracing for pipeline profiling.
+
+Spans are only recorded inside start_trace(); everywhere else span() and
+@traced are a context-variable lookup and nothing more. The current span is
+held in a ContextVar, so asyncio tasks and asyncio.to_thread workers
+started inside a span nest under it automatically.
+"""
+import functools
+import inspect
+import json
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+from utils import config
+
+
+class Span:
+    def __init__(self, name: str, parent: Optional["Span"] = None, **attrs):
+        self.name = name
+        self.parent = parent
+        self.attrs = dict(attrs)
+        self.children = []
+        self.start = time.perf_counter()
+        self.end = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+    def set(self, **attrs):
+        """Set attributes on the span"""
+        self.attrs.update(attrs)
+
+    def add(self, key: str, amount: float = 1):
+        """Increment a numeric attribute"""
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+
+    def record_llm(self, message):
+        """Record token usage from an AIMessage returned by a chat model"""
+        usage = getattr(message, "usage_metadata", None) or {}
+        self.add("prompt_tokens", usage.get("input_tokens", 0))
+        self.add("completion_tokens", usage.get("output_tokens", 0))
+        content = getattr(message, "content", "")
+        self.add("response_bytes", len(content) if isinstance(content, str) else 0)
+
+    def to_dict(self, origin: Optional[float] = None) -> dict:
+        origin = self.start if origin is None else origin
+        return {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+            "attrs": self.attrs,
+            "children": [child.to_dict(origin) for child in self.children],
+        }
+
+
+class _NoopSpan:
+    """Returned outside a trace so instrumented code never has to check"""
+
+    def set(self, **attrs):
+        pass
+
+    def add(self, key: str, amount: float = 1):
+        pass
+
+    def record_llm(self, message):
+        pass
+
+
+_NOOP = _NoopSpan()
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span():
+    """The innermost active span, or a no-op span outside a trace"""
+    return _current_span.get() or _NOOP
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Record a child span of the current span (no-op outside a trace)"""
+    parent = _current_span.get()
+    if parent is None:
+        yield _NOOP
+        return
+
+    child = Span(name, parent, **attrs)
+    parent.children.append(child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.set(error=type(e).__name__)
+        raise
+    finally:
+        child.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+def traced(name: str):
+    """
+    Decorator that wraps a sync or async function in a span.
+
+    String results are measured as the span's payload size.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name) as s:
+                    result = await func(*args, **kwargs)
+                    if isinstance(result, str):
+                        s.set(payload_bytes=len(result))
+                    return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name) as s:
+                result = func(*args, **kwargs)
+                if isinstance(result, str):
+                    s.set(payload_bytes=len(result))
+                return result
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def start_trace(name: str = "run"):
+    """Start recording spans; yields the root span"""
+    root = Span(name)
+    token = _current_span.set(root)
+    try:
+        yield root
+    finally:
+        root.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+def _totals(root: Span) -> dict:
+    """Sum token and cache counters over the whole tree"""
+    totals = {}
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        for key in ("prompt_tokens", "completion_tokens", "llm_cache_hits", "llm_cache_misses",
+                    "news_tokens_saved"):
+            if key in node.attrs:
+                totals[key] = totals.get(key, 0) + node.attrs[key]
+        stack.extend(node.children)
+    return totals
+
+
+def format_flame(root: Span, width: int = 40) -> str:
+    """
+    Render a span tree as an indented, flame-style text summary.
+
+    Each line shows a bar positioned and sized by the span's start offset
+    and duration relative to the root, followed by its attributes.
+    """
+    total = root.duration or 1e-9
+    lines = []
+
+    def walk(node: Span, depth: int):
+        offset = int((node.start - root.start) / total * width)
+        length = max(1, int(node.duration / total * width))
+        bar = " " * offset + "█" * min(length, width - offset)
+        attrs = " ".join(f"{k}={v}" for k, v in node.attrs.items())
+        label = f"{'  ' * depth}{node.name}"
+        lines.append(f"{label:<40} {node.duration * 1000:>9.1f}ms |{bar:<{width}}| {attrs}")
+        for child in sorted(node.children, key=lambda c: c.start):
+            walk(child, depth + 1)
+
+    walk(root, 0)
+    totals = _totals(root)
+    if totals:
+        lines.append("totals: " + " ".join(f"{k}={v}" for k, v in totals.items()))
+    return "\n".join(lines)
+
+
+def write_trace(root: Span, trace_dir: str = config.TRACE_DIR) -> str:
+    """
+    Save a span tree as JSON.
+
+    Returns:
+        Path to the written trace file
+    """
+    os.makedirs(trace_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filepath = os.path.join(trace_dir, f"trace_{timestamp}.json")
+    with open(filepath, "w", encoding="utf-8") as f:
+        json.dump({**root.to_dict(), "totals": _totals(root)}, f, indent=2, default=str)
+    return filepath
@@ -0,0 +1,336 @@
+"""
+Watchlist refresh daemon.
+
+Keeps a current report for every symbol of a fixed watchlist without
+re-running the whole pipeline on a timer. Each symbol is checked on its own
+interval. The prices of all symbols due at the same time are topped up with
+one bulk Yahoo download and their metrics computed together
+(tools.indicators); news comes through the local news store. The new
+inputs are compared with the ones the current report was written from:
+
+- price: the period change or 7-day momentum moved by more than its
+  threshold, daily volatility changed by more than its threshold, or the
+  trend label changed -> the PriceAnalyst re-runs
+- news: enough article URLs the last news analysis hadn't seen
+  -> the NewsAnalyst re-runs
+- either -> the ReportWriter re-runs, reusing the other branch's last
+  analysis
+
+Symbols whose inputs did not move are skipped. A report older than
+WATCHLIST_MAX_REPORT_AGE_SECONDS is regenerated anyway. State is kept in
+WATCHLIST_STATE_PATH, so a restarted daemon carries on where it stopped.
+
+Usage:
+    python watchlist.py --symbols BTC,ETH,SOL:300    # SOL every 5 minutes
+    python watchlist.py --symbols all --interval 600
+    python watchlist.py --symbols BTC,ETH --once --fake
+"""
+import argparse
+import asyncio
+import heapq
+import json
+import os
+import time
+from dotenv import load_dotenv
+from utils import config
+from utils.scheduler import deadline, remaining
+from utils.tracing import span
+from tools.data_fetch import prepare_news, search_news
+from tools.symbols import SYMBOL_TO_YAHOO, _get_yahoo_symbol
+from tools.indicators import TREND_LABELS, compute_indicators, stack_field
+from tools.price_store import default_store
+
+load_dotenv()
+
+
+def parse_symbols(spec: str, interval: float = config.WATCHLIST_INTERVAL_SECONDS) -> dict:
+    """
+    Parse a watchlist spec like 'BTC,ETH:300' or 'all'.
+
+    Returns:
+        Dict of symbol -> check interval in seconds
+    """
+    if spec.strip().lower() == "all":
+        return {symbol: interval for symbol in SYMBOL_TO_YAHOO}
+    intervals = {}
+    for item in spec.split(","):
+        symbol, _, seconds = item.strip().partition(":")
+        if symbol:
+            intervals[symbol.upper()] = float(seconds) if seconds else interval
+    return intervals
+
+
+def price_changes(old: dict, new: dict, thresholds: dict = config.WATCHLIST_THRESHOLDS) -> list:
+    """
+    Compare price metrics with the ones the last price analysis used.
+
+    Args:
+        old: Metrics of the last price analysis
+        new: Current metrics (price_change, momentum, volatility, trend_label)
+        thresholds: See WATCHLIST_THRESHOLDS
+
+    Returns:
+        Reasons the PriceAnalyst should re-run; empty when nothing moved enough
+    """
+    reasons = []
+    for key in ("price_change", "momentum"):
+        delta = new[key] - old[key]
+        if abs(delta) >= thresholds[key]:
+            reasons.append(f"{key} {delta:+.2f}pt")
+    if old["volatility"] and abs(new["volatility"] / old["volatility"] - 1) >= thresholds["volatility"]:
+        reasons.append(f"volatility {new['volatility'] / old['volatility'] - 1:+.0%}")
+    if new["trend_label"] != old["trend_label"]:
+        reasons.append(f"trend now {new['trend_label']}")
+    return reasons
+
+
+class WatchlistDaemon:
+    def __init__(self, pipeline, intervals: dict, days: int = 30, focus: str = "general overview",
+                 concurrency: int = config.WATCHLIST_CONCURRENCY,
+                 thresholds: dict = config.WATCHLIST_THRESHOLDS,
+                 max_report_age: float = config.WATCHLIST_MAX_REPORT_AGE_SECONDS,
+                 state_path: str = config.WATCHLIST_STATE_PATH):
+        """
+        Args:
+            pipeline: AnalysisPipeline whose agents write the reports
+            intervals: Symbol -> seconds between checks (see parse_symbols)
+            days: Timeframe of every report
+            focus: Focus of every report
+            concurrency: Symbols checked or regenerated at the same time
+            thresholds: Material-change thresholds (see WATCHLIST_THRESHOLDS)
+            max_report_age: Seconds after which a report is regenerated regardless
+            state_path: JSON file holding what each report was written from
+        """
+        self.pipeline = pipeline
+        self.intervals = intervals
+        self.days = min(days, config.MAX_HISTORY_DAYS)
+        self.focus = focus
+        self.concurrency = concurrency
+        self.semaphore = None
+        self.thresholds = thresholds
+        self.max_report_age = max_report_age
+        self.state_path = state_path
+        self.state = self._load_state()
+        self.stats = {"cycles": 0, "checks": 0, "skipped": 0, "regenerated": 0,
+                      "price_reruns": 0, "news_reruns": 0, "errors": 0}
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def save_state(self):
+        """Write the state atomically so a crash never leaves it half-written"""
+        if os.path.dirname(self.state_path):
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp = f"{self.state_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.state_path)
+
+    def price_metrics(self, symbols: list) -> dict:
+        """
+        Top up the prices of symbols with one bulk download and compute their
+        metrics in one vectorized pass.
+
+        Returns:
+            Dict of symbol -> metrics; symbols without bars are left out
+        """
+        yahoo_symbols = [_get_yahoo_symbol(s) for s in symbols]
+        try:
+            default_store.bulk_update(yahoo_symbols, self.days)
+            refresh = False
+        except Exception as e:
+            print(f"Bulk price download failed, falling back to per-coin fetches: {e}")
+            refresh = True
+
+        bars = []
+        for yahoo_symbol in yahoo_symbols:
+            try:
+                bars.append(default_store.window(yahoo_symbol, self.days, refresh=refresh))
+            except Exception:
+                bars.append(default_store.window(yahoo_symbol, self.days, refresh=False))
+        stats = compute_indicators(
+            stack_field(bars, "close"), stack_field(bars, "high"), stack_field(bars, "low")
+        )
+        return {
+            symbol: {
+                "price_change": float(stats["price_change"][i]),
+                "momentum": float(stats["momentum"][i]),
+                "volatility": float(stats["volatility"][i]),
+                "trend_label": str(TREND_LABELS[stats["trend"][i]]),
+            }
+            for i, symbol in enumerate(symbols) if len(bars[i])
+        }
+
+    def _decide(self, state: dict, metrics: dict, urls: list) -> tuple:
+        """
+        Which stages to re-run for a symbol.
+
+        Returns:
+            Tuple of (rerun price, rerun news, reasons)
+        """
+        if "report_at" not in state:
+            return True, True, ["first report"]
+        if time.time() - state["report_at"] >= self.max_report_age:
+            return True, True, ["report expired"]
+        reasons = price_changes(state["metrics"], metrics, self.thresholds)
+        rerun_price = bool(reasons)
+        new_urls = set(urls) - set(state.get("urls", []))
+        rerun_news = len(new_urls) >= self.thresholds["new_articles"]
+        if rerun_news:
+            reasons.append(f"{len(new_urls)} new articles")
+        return rerun_price, rerun_news, reasons
+
+    async def refresh(self, symbol: str, metrics: dict) -> bool:
+        """
+        Check one symbol and regenerate its report if its inputs moved.
+
+        Returns:
+            True if a new report was written
+        """
+        async with self.semaphore:
+            self.stats["checks"] += 1
+            try:
+                articles = await asyncio.to_thread(search_news, symbol, 5)
+            except Exception as e:
+                print(f"News refresh failed for {symbol}: {e}")
+                articles = []
+            urls = sorted(a["url"] for a in articles if a.get("url"))
+
+            state = self.state.get(symbol, {})
+            rerun_price, rerun_news, reasons = self._decide(state, metrics, urls)
+            state["checked_at"] = time.time()
+            self.state[symbol] = state
+            if not (rerun_price or rerun_news):
+                self.stats["skipped"] += 1
+                return False
+
+            with span("watchlist.regenerate", symbol=symbol, price=rerun_price, news=rerun_news):
+                news_analysis, price_analysis = await self._analyses(
+                    symbol, state, rerun_price, rerun_news,
+                    prepare_news(symbol, articles) if articles else None
+                )
+                report = await self.pipeline.write_report(
+                    symbol, self.days, self.focus, news_analysis, price_analysis, {}
+                )
+            filepath = self.pipeline.report_writer.save(
+                report, symbol, days=self.days, focus=self.focus,
+                news_analysis=news_analysis, price_analysis=price_analysis
+            )
+
+            if rerun_price:
+                state.update(metrics=metrics, price_analysis=price_analysis)
+                self.stats["price_reruns"] += 1
+            if rerun_news:
+                state.update(urls=urls, news_analysis=news_analysis)
+                self.stats["news_reruns"] += 1
+            state.update(report_at=time.time(), filepath=filepath, reasons=reasons)
+            self.stats["regenerated"] += 1
+            print(f"🔄 {symbol}: {', '.join(reasons)} -> {filepath}")
+            return True
+
+    async def _analyses(self, symbol: str, state: dict, rerun_price: bool, rerun_news: bool,
+                        digest) -> tuple:
+        """Re-run the stale analyses under the analyst deadline and reuse the others"""
+        async def news():
+            if not rerun_news:
+                return state["news_analysis"]
+            return await self.pipeline.news_analyst.aanalyze(symbol, digest)
+
+        async def price():
+            if not rerun_price:
+                return state["price_analysis"]
+            return await self.pipeline.price_analyst.aanalyze(symbol, self.days)
+
+        with deadline(config.ANALYST_DEADLINE_SECONDS):
+            return await asyncio.wait_for(asyncio.gather(news(), price()), remaining())
+
+    async def cycle(self, symbols: list):
+        """Check every due symbol once"""
+        self.stats["cycles"] += 1
+        metrics = await asyncio.to_thread(self.price_metrics, symbols)
+        missing = [s for s in symbols if s not in metrics]
+        if missing:
+            self.stats["errors"] += len(missing)
+            print(f"No price data for {', '.join(missing)}")
+
+        results = await asyncio.gather(
+            *(self.refresh(s, metrics[s]) for s in symbols if s in metrics),
+            return_exceptions=True
+        )
+        for symbol, result in zip([s for s in symbols if s in metrics], results):
+            if isinstance(result, BaseException):
+                self.stats["errors"] += 1
+                print(f"❌ {symbol}: {result!r}")
+        self.save_state()
+
+    async def run(self, once: bool = False):
+        """
+        Check each symbol on its interval, forever (or one pass with once=True).
+
+        Symbols that come due together are handled in one cycle, so they
+        share the bulk price download.
+        """
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        due = [(0.0, symbol) for symbol in self.intervals]
+        heapq.heapify(due)
+        while due:
+            now = time.monotonic()
+            if due[0][0] > now:
+                await asyncio.sleep(due[0][0] - now)
+                continue
+
+            symbols = []
+            while due and due[0][0] <= now:
+                symbols.append(heapq.heappop(due)[1])
+            await self.cycle(symbols)
+            s = self.stats
+            print(f"🔁 Cycle {s['cycles']}: {len(symbols)} checked | totals: {s['regenerated']} regenerated "
+                  f"({s['price_reruns']} price / {s['news_reruns']} news reruns), "
+                  f"{s['skipped']} skipped, {s['errors']} errors")
+
+            if not once:
+                for symbol in symbols:
+                    heapq.heappush(due, (now + self.intervals[symbol], symbol))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Cryptocurrency Analysis Agent - watchlist refresh daemon")
+    parser.add_argument("--symbols", required=True,
+                        help="Comma-separated symbols with optional per-symbol intervals "
+                             "(e.g. BTC,ETH:300), or 'all' for every mapped coin")
+    parser.add_argument("--interval", type=float, default=config.WATCHLIST_INTERVAL_SECONDS,
+                        help="Seconds between checks of a symbol without its own interval")
+    parser.add_argument("--days", type=int, default=30, help="Timeframe of the reports")
+    parser.add_argument("--focus", default="general overview", help="Focus of the reports")
+    parser.add_argument("--concurrency", type=int, default=config.WATCHLIST_CONCURRENCY,
+                        help="Symbols checked or regenerated at the same time")
+    parser.add_argument("--once", action="store_true", help="Check every symbol once and exit")
+    parser.add_argument("--fake", action="store_true",
+                        help="Use the offline fake LLM, Exa and Yahoo providers (no API keys)")
+    return parser.parse_args(argv)
+
+
+def main():
+    from server import build_pipeline
+
+    args = parse_args()
+    daemon = WatchlistDaemon(
+        build_pipeline(args.fake),
+        parse_symbols(args.symbols, args.interval),
+        days=args.days,
+        focus=args.focus,
+        concurrency=args.concurrency
+    )
+    print(f"👀 Watching {len(daemon.intervals)} symbols")
+    try:
+        asyncio.run(daemon.run(once=args.once))
+    except KeyboardInterrupt:
+        print("\n👋 Watchlist daemon stopped")
+
+
+if __name__ == "__main__":
+    main()